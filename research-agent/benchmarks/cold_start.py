@@ -0,0 +1,124 @@
+"""
+Cold-start benchmark for the API process.
+
+Measures, against a startup-time budget:
+- the import time of `main` with a per-module breakdown (python -X importtime)
+- the time from process start until the server answers
+- the time from process start until the first successful /call-agent
+
+Run from anywhere with the usual environment (.env or exported variables):
+
+    python research-agent/benchmarks/cold_start.py --import-budget 1.0 --ready-budget 3.0
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import httpx
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+# Levels of imports below main that are listed
+PROFILED_IMPORT_LEVELS = 2
+
+
+def profile_imports(top: int) -> Tuple[float, List[Tuple[float, str]]]:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            cwd=SRC_DIR, capture_output=True, text=True, env=os.environ.copy())
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing main failed:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            # -X importtime indents a module by one space plus two per level it is nested below main
+            cumulative_us, level, name = int(match.group(2)), (len(match.group(3)) - 1) // 2, match.group(4)
+            modules.append((cumulative_us / 1e6, level, name))
+
+    total = next((seconds for seconds, _, name in modules if name == "main"), 0.0)
+    # Only main and the modules up to PROFILED_IMPORT_LEVELS below it are listed, deeper ones count in their parents
+    heaviest = sorted(((seconds, name) for seconds, level, name in modules if level <= PROFILED_IMPORT_LEVELS),
+                      reverse=True)
+    return total, heaviest[:top]
+
+
+def measure_startup(host: str, port: int, user_name: str, query: str, timeout: float) -> Tuple[float, float]:
+    env = {**os.environ, "APP_HOST": host, "APP_PORT": str(port)}
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "main.py"], cwd=SRC_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://{host}:{port}"
+
+    try:
+        ready_at = None
+        with httpx.Client(base_url=base_url, timeout=timeout) as client:
+            while ready_at is None:
+                if process.poll() is not None:
+                    raise RuntimeError(f"API process exited with code {process.returncode}")
+                if time.perf_counter() - started > timeout:
+                    raise TimeoutError("API did not become ready in time")
+                try:
+                    if client.get("/api/openapi.json").status_code == 200:
+                        ready_at = time.perf_counter() - started
+                except httpx.TransportError:
+                    time.sleep(0.05)
+
+            response = client.get("/call-agent", params={"user_name": user_name, "query": query})
+            body = response.json()
+            if response.status_code != 200 or body.get("status") != "completed":
+                raise RuntimeError(f"/call-agent did not succeed: {response.status_code} {body}")
+            first_success_at = time.perf_counter() - started
+
+        return ready_at, first_success_at
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--import-budget", type=float, default=float(os.getenv("STARTUP_IMPORT_BUDGET", "1.0")))
+    parser.add_argument("--ready-budget", type=float, default=float(os.getenv("STARTUP_READY_BUDGET", "3.0")))
+    parser.add_argument("--first-call-budget", type=float, default=None)
+    parser.add_argument("--skip-server", action="store_true", help="only profile imports")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--user-name", default="cold-start-benchmark")
+    parser.add_argument("--query", default="What is the difference between a list and a tuple?")
+    parser.add_argument("--timeout", type=float, default=180.0)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    failures = []
+
+    import_seconds, heaviest = profile_imports(args.top)
+    print(f"import main: {import_seconds:.3f}s (budget {args.import_budget:.3f}s)")
+    for seconds, name in heaviest:
+        print(f"  {seconds:8.3f}s  {name}")
+    if import_seconds > args.import_budget:
+        failures.append("import")
+
+    if not args.skip_server:
+        ready_seconds, first_success_seconds = measure_startup(args.host, args.port, args.user_name,
+                                                               args.query, args.timeout)
+        print(f"process start -> ready: {ready_seconds:.3f}s (budget {args.ready_budget:.3f}s)")
+        print(f"process start -> first successful /call-agent: {first_success_seconds:.3f}s")
+        if ready_seconds > args.ready_budget:
+            failures.append("ready")
+        if args.first_call_budget is not None and first_success_seconds > args.first_call_budget:
+            failures.append("first call")
+
+    if failures:
+        print(f"Over budget: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
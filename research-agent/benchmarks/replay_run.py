@@ -0,0 +1,102 @@
+"""
+Offline replay of recorded research runs.
+
+Record the LLM, embedding and search calls of real runs first:
+
+    CASSETTE_MODE=record CASSETTE_DIR=cassettes/slow-run python research-agent/src/main.py
+
+Then run the same query through the full orchestrator graph against the cassettes, without any provider call:
+
+    python research-agent/benchmarks/replay_run.py cassettes/slow-run --query "..." --repeat 5 --profile
+
+By default replay runs at full speed. --reproduce-timing sleeps as long as each recorded call took.
+Every run prints its status, token usage and a hash of the final plan, so a parser or prompt change
+can be checked for regressions against the recorded outputs.
+"""
+import argparse
+import asyncio
+import cProfile
+import hashlib
+import json
+import os
+import pstats
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+async def replay(query: str, user_name: str, repeat: int) -> int:
+    from api.dependency_injection import Dependencies
+    from domain.states.token_usage import summarize_token_usage
+    from services.orchestrator_processing_service import _create_initial_state
+
+    # Same wiring as the API warm-up, minus persistence, sessions and admission control
+    llm_service = Dependencies.llm_service()
+    tools_service = Dependencies.get_tools_service(llm_service=llm_service)
+    nodes = Dependencies.orchestrator_nodes(tools_service=tools_service,
+                                            token_budget_service=Dependencies.token_budget_service(),
+                                            query_routing_service=Dependencies.query_routing_service(
+                                                llm_service=llm_service),
+                                            model_tier_service=Dependencies.model_tier_service(),
+                                            speculative_retrieval_service=Dependencies.speculative_retrieval_service(
+                                                tools_service=tools_service),
+                                            query_consolidation_service=Dependencies.query_consolidation_service(
+                                                llm_service=llm_service),
+                                            deadline_service=Dependencies.deadline_service())
+    graph = Dependencies.orchestrator_graph(orchestrator_nodes=nodes).graph.compile()
+
+    failures = 0
+    for attempt in range(1, repeat + 1):
+        started = time.perf_counter()
+        try:
+            state = await graph.ainvoke(_create_initial_state(user_name, query))
+        except Exception as e:
+            failures += 1
+            print(json.dumps({"run": attempt, "status": "error", "error": str(e)}))
+            continue
+
+        plan = json.dumps(state.get("final_plan") or state.get("response"), sort_keys=True, default=str)
+        print(json.dumps({
+            "run": attempt,
+            "status": "completed",
+            "seconds": round(time.perf_counter() - started, 3),
+            "complexity": state.get("complexity"),
+            "tokens": summarize_token_usage(state.get("tokens_used"))["total_tokens"],
+            "output_sha256": hashlib.sha256(plan.encode("utf-8")).hexdigest()[:16],
+        }))
+
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cassette_dir", help="directory holding the recorded *.jsonl.gz cassettes")
+    parser.add_argument("--query", required=True, help="the user query of the recorded run")
+    parser.add_argument("--user-name", default="replay")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--reproduce-timing", action="store_true")
+    parser.add_argument("--profile", action="store_true", help="print the hottest functions under cProfile")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    # Read by the configuration, so they have to be in place before it is first built
+    os.environ.update(CASSETTE_MODE="replay",
+                      CASSETTE_DIR=str(Path(args.cassette_dir).resolve()),
+                      CASSETTE_REPRODUCE_TIMING=str(args.reproduce_timing).lower())
+    sys.path.insert(0, str(SRC_DIR))
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    failures = asyncio.run(replay(args.query, args.user_name, args.repeat))
+    if profiler:
+        profiler.disable()
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(args.top)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Batch research client.
+
+Streams a JSONL file of queries to the /batch endpoint and writes the JSONL results as they complete,
+so neither side holds the whole batch in memory. Every input line is an object like
+
+    {"id": "q-1", "user_name": "nightly", "query": "How should we shard our event store?"}
+
+Run from anywhere against a running API:
+
+    python research-agent/scripts/batch_research.py queries.jsonl --output results.jsonl --user-name nightly
+"""
+import argparse
+import json
+import sys
+from typing import Iterator
+
+import httpx
+
+
+def read_chunks(path: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        while chunk := stream.read(chunk_size):
+            yield chunk
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+def run_batch(base_url: str, input_path: str, output_path: str, user_name: str, timeout: float) -> int:
+    failures = 0
+    output = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8")
+
+    try:
+        with httpx.Client(base_url=base_url, timeout=httpx.Timeout(timeout, read=None)) as client:
+            params = {"user_name": user_name} if user_name else {}
+            with client.stream("POST", "/batch", params=params, content=read_chunks(input_path),
+                               headers={"Content-Type": "application/x-ndjson"}) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    output.write(line + "\n")
+                    output.flush()
+                    if json.loads(line).get("status") != "completed":
+                        failures += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL batch of research queries")
+    parser.add_argument("input", help="JSONL file of queries, - for stdin")
+    parser.add_argument("--output", default="-", help="JSONL file for the results, - for stdout")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--user-name", default=None, help="User for lines that do not name one")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Connect/write timeout in seconds")
+    args = parser.parse_args()
+
+    failures = run_batch(args.base_url, args.input, args.output, args.user_name, args.timeout)
+    print(f"Batch finished with {failures} failed items", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
-from langgraph.graph import StateGraph
+from langgraph.graph import StateGraph, START, END
 
 from agents.orchestrator_nodes import OrchestratorNodes
+from config.constants import GraphNodeConstants
 from domain.states.orchestrator_state import ResearchState
 
 
@@ -15,21 +16,35 @@ class OrchestratorGraph:
 
         workflow = StateGraph(ResearchState)
 
-        workflow.add_node("decompose", self.nodes.task_decomposer)
-        workflow.add_node("planner", self.nodes.research_planner)
-        workflow.add_node("executor", self.nodes.research_executor)
-        workflow.add_node("comparator", self.nodes.approach_comparator)
-        workflow.add_node("synthesizer", self.nodes.solution_synthesizer)
-        workflow.add_node("generator", self.nodes.plan_generator)
-
-        workflow.set_entry_point("decompose")
-
-        workflow.add_edge("decompose", "planner")
-        workflow.add_edge("planner", "executor")
-        workflow.add_edge("executor", "comparator")
-        workflow.add_edge("comparator", "synthesizer")
-        workflow.add_edge("synthesizer", "generator")
+        workflow.add_node(GraphNodeConstants.ROUTER, self.nodes.query_router)
+        workflow.add_node(GraphNodeConstants.QUICK_ANSWER, self.nodes.quick_answer)
+        workflow.add_node(GraphNodeConstants.DECOMPOSE, self.nodes.task_decomposer)
+        workflow.add_node(GraphNodeConstants.PLANNER, self.nodes.research_planner)
+        workflow.add_node(GraphNodeConstants.EXECUTOR, self.nodes.research_executor)
+        workflow.add_node(GraphNodeConstants.COMPARATOR, self.nodes.approach_comparator)
+        workflow.add_node(GraphNodeConstants.MERGER, self.nodes.approach_merger)
+        workflow.add_node(GraphNodeConstants.SYNTHESIZER, self.nodes.solution_synthesizer)
+        workflow.add_node(GraphNodeConstants.GENERATOR, self.nodes.plan_generator)
+
+        workflow.add_conditional_edges(START, self.nodes.route_entry,
+                                       [GraphNodeConstants.ROUTER, GraphNodeConstants.PLANNER,
+                                        GraphNodeConstants.EXECUTOR, GraphNodeConstants.COMPARATOR,
+                                        GraphNodeConstants.MERGER, GraphNodeConstants.SYNTHESIZER,
+                                        GraphNodeConstants.GENERATOR])
+
+        workflow.add_conditional_edges(GraphNodeConstants.ROUTER, self.nodes.route_by_complexity,
+                                       [GraphNodeConstants.QUICK_ANSWER, GraphNodeConstants.DECOMPOSE])
+        workflow.add_edge(GraphNodeConstants.QUICK_ANSWER, END)
+
+        workflow.add_edge(GraphNodeConstants.DECOMPOSE, GraphNodeConstants.PLANNER)
+        workflow.add_conditional_edges(GraphNodeConstants.PLANNER, self.nodes.route_after_planning,
+                                       [GraphNodeConstants.EXECUTOR, GraphNodeConstants.COMPARATOR,
+                                        GraphNodeConstants.MERGER])
+        workflow.add_conditional_edges(GraphNodeConstants.EXECUTOR, self.nodes.fan_out_comparisons,
+                                       [GraphNodeConstants.COMPARATOR, GraphNodeConstants.MERGER])
+        workflow.add_edge(GraphNodeConstants.COMPARATOR, GraphNodeConstants.MERGER)
+        workflow.add_edge(GraphNodeConstants.MERGER, GraphNodeConstants.SYNTHESIZER)
+        workflow.add_edge(GraphNodeConstants.SYNTHESIZER, GraphNodeConstants.GENERATOR)
 
         return workflow
 
-
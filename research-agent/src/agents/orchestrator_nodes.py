@@ -1,32 +1,359 @@
+import json
+import re
+from string import Template
+from typing import Any, Dict, List
+
+from langgraph.types import Send
+from loguru import logger
+
+from config.constants import DeadlineConstants, GraphNodeConstants, RoutingConstants
 from domain.interfaces.tools_interface import ToolsInterface
-from domain.states.orchestrator_state import ResearchState
+from domain.prompts.orchestrator_prompts import OrchestratorPrompts
+from domain.states.conversation_memory import format_conversation_context, research_topics
+from domain.states.orchestrator_state import ResearchState, TopicComparisonState
+from infrastructure.artifacts.artifact_store import ArtifactNotFoundError, ArtifactStore
+from services.deadline_service import DeadlineService
+from services.model_tier_service import ModelTierService
+from services.query_consolidation_service import QueryConsolidationService
+from services.query_routing_service import QueryRoutingService
+from services.speculative_retrieval_service import SpeculativeRetrievalService
+from services.token_budget_service import TokenBudgetService
+
+
+def _merge_approaches(topic_approaches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    merged: Dict[str, Dict[str, Any]] = {}
+
+    for approach in topic_approaches:
+        name = str(approach.get("approach", "")).strip()
+        key = re.sub(r"[^a-z0-9]+", " ", name.lower()).strip()
+        if not key:
+            continue
+
+        if key not in merged:
+            merged[key] = {**approach, "pros": list(approach.get("pros") or []),
+                           "cons": list(approach.get("cons") or [])}
+            continue
+
+        existing = merged[key]
+        for field in ("pros", "cons"):
+            existing[field].extend(item for item in approach.get(field) or [] if item not in existing[field])
+
+    return list(merged.values())
 
 
 class OrchestratorNodes:
 
-    def __init__(self, tools_service: ToolsInterface):
+    def __init__(self, tools_service: ToolsInterface, token_budget_service: TokenBudgetService,
+                 query_routing_service: QueryRoutingService, model_tier_service: ModelTierService,
+                 speculative_retrieval_service: SpeculativeRetrievalService,
+                 query_consolidation_service: QueryConsolidationService, deadline_service: DeadlineService):
         self.tools_service = tools_service
+        self.token_budget_service = token_budget_service
+        self.query_routing_service = query_routing_service
+        self.model_tier_service = model_tier_service
+        self.speculative_retrieval_service = speculative_retrieval_service
+        self.query_consolidation_service = query_consolidation_service
+        self.deadline_service = deadline_service
+
+    def route_entry(self, state: ResearchState):
+        """ Starts a full run at the router, or a partial re-execution at the first node affected by the edits """
+        resume_from = state.get("resume_from")
+        if resume_from == GraphNodeConstants.EXECUTOR:
+            return self.route_after_planning(state)
+        if resume_from == GraphNodeConstants.COMPARATOR:
+            return self.fan_out_comparisons(state)
+        return resume_from or GraphNodeConstants.ROUTER
+
+    async def query_router(self, state: ResearchState):
+        """ Classifies the query complexity without calling the LLM """
+        complexity = await self.query_routing_service.classify(state["query"][-1].content)
+        return {"complexity": complexity}
+
+    def route_by_complexity(self, state: ResearchState):
+        if state.get("complexity") == RoutingConstants.SIMPLE:
+            return GraphNodeConstants.QUICK_ANSWER
+        return GraphNodeConstants.DECOMPOSE
+
+    async def quick_answer(self, state: ResearchState):
+        """ Answers simple queries with a single LLM call """
+        user_query = state["query"][-1].content
+        conversation_context = format_conversation_context(state)
+        llm_config = await self._llm_config(state, GraphNodeConstants.QUICK_ANSWER,
+                                            OrchestratorPrompts.QUICK_ANSWER_PROMPT,
+                                            user_query, conversation_context)
+
+        answer, tokens_used = await self.tools_service.quick_answer(user_query, llm_config=llm_config,
+                                                                    conversation_context=conversation_context)
+        if isinstance(answer, dict):
+            answer = answer.get("answer", json.dumps(answer))
+
+        return {
+            "response": answer if isinstance(answer, str) else json.dumps(answer),
+            **self._track_tokens(state, GraphNodeConstants.QUICK_ANSWER, tokens_used),
+            "degraded": self._degradations(GraphNodeConstants.QUICK_ANSWER, llm_config),
+        }
 
     async def task_decomposer(self, state: ResearchState):
         """ Converts vague goals into a set of defined technical asks """
-        pass
+        user_query = state["query"][-1].content
+        conversation_context = format_conversation_context(state)
+        llm_config = await self._llm_config(state, GraphNodeConstants.DECOMPOSE,
+                                            OrchestratorPrompts.TASK_DECOMPOSER_USER_PROMPT,
+                                            user_query, conversation_context)
+
+        try:
+            subtasks, tokens_used = await self.tools_service.decompose_tasks(user_query, llm_config=llm_config,
+                                                                             conversation_context=conversation_context)
+        except TimeoutError:
+            # The query itself is the one subtask
+            return {"subtasks": [user_query], "degraded": self._timed_out(GraphNodeConstants.DECOMPOSE)}
+
+        return {
+            "subtasks": subtasks,
+            **self._track_tokens(state, GraphNodeConstants.DECOMPOSE, tokens_used),
+            "degraded": self._degradations(GraphNodeConstants.DECOMPOSE, llm_config),
+        }
 
     async def research_planner(self, state: ResearchState):
         """ Decides what needs research and what can be output directly """
-        pass
+        subtasks = state.get("subtasks") or []
+        session_context = state.get("session_context") or {}
+        previous_queries = session_context.get("research_queries") or []
+
+        if subtasks and subtasks == session_context.get("subtasks"):
+            # A follow-up that kept the previous subtasks reuses the previous plan
+            return {
+                "research_queries": previous_queries,
+                "no_research_subtasks": session_context.get("no_research_subtasks") or [],
+            }
+
+        llm_config = await self._llm_config(state, GraphNodeConstants.PLANNER,
+                                            OrchestratorPrompts.RESEARCH_PLANNER_USER_PROMPT,
+                                            subtasks, previous_queries)
+
+        # Subtasks are often usable search queries already, so retrieval for them overlaps the planner call
+        run_id = state.get("run_id")
+        self.speculative_retrieval_service.start(run_id, subtasks)
+        degraded = self._degradations(GraphNodeConstants.PLANNER, llm_config)
+        try:
+            plan, tokens_used = await self.tools_service.research_planner(subtasks, llm_config=llm_config,
+                                                                          previous_queries=previous_queries)
+        except TimeoutError:
+            # The subtasks are researched as they are, which is what the speculative retrieval already does
+            plan, tokens_used = [subtask for subtask in subtasks if isinstance(subtask, str)], {}
+            degraded = self._timed_out(GraphNodeConstants.PLANNER)
+        except BaseException:
+            self.speculative_retrieval_service.discard(run_id)
+            raise
+
+        if isinstance(plan, dict):
+            research_queries = plan.get("research_queries") or []
+            no_research_subtasks = plan.get("no_research_subtasks") or []
+        else:
+            research_queries, no_research_subtasks = plan or [], []
+
+        # Near-duplicate queries would retrieve the same documents and get compared twice
+        try:
+            research_queries, query_clusters = await self.query_consolidation_service.consolidate(
+                research_queries, preferred=previous_queries)
+        except BaseException:
+            self.speculative_retrieval_service.discard(run_id)
+            raise
+
+        new_queries = [query for query in research_queries if query not in previous_queries]
+        speculation = self.speculative_retrieval_service.reconcile(run_id, new_queries)
+
+        return {
+            "research_queries": research_queries,
+            "no_research_subtasks": no_research_subtasks,
+            "query_clusters": query_clusters,
+            "speculation": speculation,
+            "degraded": degraded,
+            **self._track_tokens(state, GraphNodeConstants.PLANNER, tokens_used),
+        }
+
+    def route_after_planning(self, state: ResearchState):
+        """ Skips the executor entirely when the planner found nothing worth researching """
+        if state.get("research_queries"):
+            return GraphNodeConstants.EXECUTOR
+        return self.fan_out_comparisons(state)
 
     async def research_executor(self, state: ResearchState):
-        """ Researches the top needed tech asks via RAG """
-        pass
+        """ Researches the top needed tech asks via RAG, reusing earlier turns of the session and speculative retrieval """
+        research_queries = state.get("research_queries") or []
+        session_context = state.get("session_context") or {}
+        cached_queries = set(research_queries) & set(session_context.get("research_queries") or [])
+        try:
+            session_docs = await ArtifactStore.load(session_context.get("relevant_docs")) or []
+        except ArtifactNotFoundError as e:
+            logger.warning(f"Documents of the previous turn are gone, researching its queries again: {e}")
+            session_docs, cached_queries = [], set()
+        cached_docs = [doc for doc in session_docs if doc.get("query") in cached_queries]
+
+        new_queries = [query for query in research_queries if query not in cached_queries]
+        timeout = self.deadline_service.call_timeout(state, GraphNodeConstants.EXECUTOR)
+        results = await self.speculative_retrieval_service.research(state.get("run_id"), new_queries, timeout=timeout)
+
+        degraded = []
+        if results.get("skipped_queries"):
+            degraded.append(f"{GraphNodeConstants.EXECUTOR}:{DeadlineConstants.PARTIAL_RESEARCH}")
+        if self.deadline_service.should_skip_comparison(state):
+            # Read by fan_out_comparisons, a conditional edge cannot record it itself
+            degraded.append(f"{GraphNodeConstants.COMPARATOR}:{DeadlineConstants.SKIPPED}")
+
+        return {
+            "relevant_docs": await ArtifactStore.store(cached_docs + results.get("retrieved_docs", [])),
+            "citations": list(dict.fromkeys([doc.get("source") for doc in cached_docs if doc.get("source")]
+                                            + results.get("citations", []))),
+            "degraded": degraded,
+        }
+
+    def fan_out_comparisons(self, state: ResearchState):
+        """ Sends every research topic with its own documents to a parallel approach comparison """
+        cached_topics = {a.get("topic") for a in self._cached_topic_approaches(state)}
+        research_queries = [topic for topic in research_topics(state) if topic not in cached_topics]
+        skipped = f"{GraphNodeConstants.COMPARATOR}:{DeadlineConstants.SKIPPED}" in (state.get("degraded") or [])
+        if not research_queries or skipped:
+            return GraphNodeConstants.MERGER
+
+        remaining = self.token_budget_service.remaining_for_run(state)
+        topic_budget = remaining // len(research_queries) if remaining is not None else None
+
+        return [
+            Send(GraphNodeConstants.COMPARATOR, TopicComparisonState(
+                topic=topic,
+                # All of the run's documents, by reference when stored, each comparison picks its topic's
+                relevant_docs=state.get("relevant_docs") or [],
+                token_budget=topic_budget,
+                deadline=state.get("deadline"),
+                tokens_used={},
+                user_name=state.get("user_name"),
+            ))
+            for topic in research_queries
+        ]
+
+    async def approach_comparator(self, state: TopicComparisonState):
+        """ Compares the various technical approaches that are valid for a single research topic """
+        research_topics = [state["topic"]]
+        relevant_docs = [doc for doc in await ArtifactStore.load(state.get("relevant_docs")) or []
+                         if doc.get("query") == state["topic"]]
+        degraded = []
+        if self.deadline_service.running_short(state) and len(relevant_docs) > self.deadline_service.degraded_max_docs:
+            relevant_docs = relevant_docs[:self.deadline_service.degraded_max_docs]
+            degraded.append(f"{GraphNodeConstants.COMPARATOR}:{DeadlineConstants.FEWER_DOCS}")
+
+        relevant_docs = await self.token_budget_service.fit_documents(state,
+                                                                      relevant_docs,
+                                                                      OrchestratorPrompts.APPROACH_COMPARATOR_SYSTEM_PROMPT,
+                                                                      research_topics)
+        llm_config = await self._llm_config(state, GraphNodeConstants.COMPARATOR,
+                                            OrchestratorPrompts.APPROACH_COMPARATOR_SYSTEM_PROMPT,
+                                            research_topics, relevant_docs)
+
+        try:
+            approaches, tokens_used = await self.tools_service.approach_comparator(research_topics, relevant_docs,
+                                                                                   llm_config=llm_config)
+        except TimeoutError:
+            # The other topics still make it into the plan
+            return {"degraded": self._timed_out(GraphNodeConstants.COMPARATOR)}
+
+        if isinstance(approaches, dict):
+            # A single approach is parsed as a bare object rather than a one-item list
+            approaches = [approaches]
+
+        degraded += self._degradations(GraphNodeConstants.COMPARATOR, llm_config)
+        return {
+            "topic_approaches": [{**a, "topic": state["topic"]} for a in (approaches or []) if isinstance(a, dict)],
+            "degraded": degraded,
+            **self._track_tokens(state, GraphNodeConstants.COMPARATOR, tokens_used),
+        }
 
-    async def approach_comparator(self, state: ResearchState):
-        """ Compares the various technical approaches that are valid for the query """
-        pass
+    async def approach_merger(self, state: ResearchState):
+        """ Merges the per topic comparisons, fresh and reused from the session, into one deduplicated list """
+        topic_approaches = (state.get("topic_approaches") or []) + self._cached_topic_approaches(state)
+        return {"approaches": await ArtifactStore.store(_merge_approaches(topic_approaches))}
 
     async def solution_synthesizer(self, state: ResearchState):
         """ Picks the final approach that is most suitable for the query """
-        pass
+        approaches = await ArtifactStore.load(state.get("approaches")) or []
+        llm_config = await self._llm_config(state, GraphNodeConstants.SYNTHESIZER,
+                                            OrchestratorPrompts.SOLUTION_SYNTHESIZER_PROMPT,
+                                            approaches)
+
+        try:
+            synthesis, tokens_used = await self.tools_service.solution_synthesizer(approaches, llm_config=llm_config)
+        except TimeoutError:
+            return {
+                "recommended_approach": approaches[0] if approaches else None,
+                "reasoning": "Selected without a comparison of the approaches, the run was about to miss its deadline",
+                "degraded": self._timed_out(GraphNodeConstants.SYNTHESIZER),
+            }
+        synthesis = synthesis if isinstance(synthesis, dict) else {}
+
+        return {
+            "recommended_approach": synthesis.get("recommended_approach"),
+            "reasoning": synthesis.get("reasoning"),
+            **self._track_tokens(state, GraphNodeConstants.SYNTHESIZER, tokens_used),
+            "degraded": self._degradations(GraphNodeConstants.SYNTHESIZER, llm_config),
+        }
 
     async def plan_generator(self, state: ResearchState):
         """ Generates the final plan for the query """
-        pass
+        selected_approach = state.get("recommended_approach") or {}
+        llm_config = await self._llm_config(state, GraphNodeConstants.GENERATOR,
+                                            OrchestratorPrompts.STRUCTURED_PLAN_GENERATOR_PROMPT,
+                                            selected_approach)
+
+        try:
+            final_plan, tokens_used = await self.tools_service.structured_plan_generator(selected_approach,
+                                                                                         llm_config=llm_config)
+        except TimeoutError:
+            # The run answers with the recommended approach instead of a plan
+            return {"degraded": self._timed_out(GraphNodeConstants.GENERATOR)}
+
+        return {
+            "final_plan": final_plan,
+            "response": json.dumps(final_plan),
+            **self._track_tokens(state, GraphNodeConstants.GENERATOR, tokens_used),
+            "degraded": self._degradations(GraphNodeConstants.GENERATOR, llm_config),
+        }
+
+    # -------------------
+    # Helper Functions
+    # -------------------
+
+    async def _llm_config(self, state: ResearchState, node: str, prompt: Template, *inputs: Any) -> Dict[str, Any]:
+        # Close to the deadline the node runs on the fast tier, and without the extra time fallbacks take
+        running_short = self.deadline_service.running_short(state)
+        config = {
+            **(self.model_tier_service.fast_config_for(node) if running_short
+               else self.model_tier_service.config_for(node)),
+            **await self.token_budget_service.completion_config(state, prompt, *inputs),
+        }
+
+        timeout = self.deadline_service.call_timeout(state, node)
+        if timeout is not None:
+            config["timeout"] = timeout
+        return config
+
+    def _degradations(self, node: str, llm_config: Dict[str, Any]) -> List[str]:
+        """ Records a node that ran on a faster model than its tier's to make the deadline """
+        if llm_config.get("model") != self.model_tier_service.model_for(node):
+            return [f"{node}:{DeadlineConstants.FAST_MODEL}"]
+        return []
+
+    @staticmethod
+    def _timed_out(node: str) -> List[str]:
+        logger.warning(f"{node} ran out of time, continuing without its output")
+        return [f"{node}:{DeadlineConstants.TIMED_OUT}"]
+
+    @staticmethod
+    def _cached_topic_approaches(state: ResearchState) -> List[Dict[str, Any]]:
+        """ Approaches the previous turn compared for topics this turn still covers """
+        topics = set(research_topics(state))
+        return [a for a in (state.get("session_context") or {}).get("topic_approaches") or []
+                if a.get("topic") in topics]
+
+    def _track_tokens(self, state: ResearchState, node: str, tokens_used):
+        self.token_budget_service.record_usage(state.get("user_name"), tokens_used)
+        return {"tokens_used": {node: tokens_used or {}}}
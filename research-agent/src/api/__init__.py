@@ -1,36 +1,160 @@
+import asyncio
+import time
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from loguru import logger
 from starlette.middleware.cors import CORSMiddleware
 
-from api.controllers import agent_controller, db_controller
-from config.settings import configuration
-from infrastructure.database.database_engine import DatabaseEngine
-from infrastructure.llm.bootstrap import LLMApplicationBootstrap
+from api.controllers import (admin_controller, agent_controller, batch_controller, db_controller, jobs_controller,
+                             metrics_controller, runs_controller)
+from config.settings import get_configuration
+from infrastructure.metrics.worker_metrics import WorkerMetrics
+from infrastructure.observability.loop_monitor import EventLoopMonitor
+
+
+def _warm_up_agent(app: FastAPI):
+    """ Imports the agent stack and builds its dependencies off the startup path """
+    from api.dependency_injection import Dependencies
+
+    try:
+        # Keyword arguments, so the lru_cache entries match the ones FastAPI resolves per request
+        llm_service = Dependencies.llm_service()
+        tools_service = Dependencies.get_tools_service(llm_service=llm_service)
+        nodes = Dependencies.orchestrator_nodes(tools_service=tools_service,
+                                                token_budget_service=Dependencies.token_budget_service(),
+                                                query_routing_service=Dependencies.query_routing_service(
+                                                    llm_service=llm_service),
+                                                model_tier_service=Dependencies.model_tier_service(),
+                                                speculative_retrieval_service=Dependencies.speculative_retrieval_service(
+                                                    tools_service=tools_service),
+                                                query_consolidation_service=Dependencies.query_consolidation_service(
+                                                    llm_service=llm_service),
+                                                deadline_service=Dependencies.deadline_service())
+        Dependencies.orchestrator_graph(orchestrator_nodes=nodes)
+
+        app.state.llm_service = llm_service
+        logger.info("LLM service and orchestrator graph initialized")
+    except Exception:
+        logger.exception("Failed to warm up the agent, dependencies will be built on the first request")
+
+
+async def _flush_worker_metrics(metrics_dir: str, interval: float):
+    while True:
+        try:
+            WorkerMetrics.flush(metrics_dir)
+        except OSError as e:
+            logger.warning(f"Could not flush worker metrics: {e}")
+        await asyncio.sleep(interval)
+
+
+async def _sweep_artifacts(interval: float):
+    from infrastructure.artifacts.artifact_store import ArtifactStore
+
+    while True:
+        try:
+            deleted = await ArtifactStore.sweep()
+            if deleted:
+                logger.info(f"Deleted {deleted} expired artifacts")
+        except Exception:
+            logger.exception("Could not sweep expired artifacts")
+        await asyncio.sleep(interval)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting Tech Research Agent API...")
 
+    from infrastructure.database.database_engine import DatabaseEngine
+
     try:
         engine = DatabaseEngine.get_engine()
         logger.info("Database connection established")
-
-        llm_service = LLMApplicationBootstrap.build_llm_interaction_service()
-        app.state.llm_service = llm_service
-        logger.info("LLM service initialized")
     except Exception as e:
         logger.exception("Failed to initialize database connection")
         raise e
 
+    from api.dependency_injection import Dependencies
+
+    run_history_service = Dependencies.run_history_service()
+    try:
+        await run_history_service.start()
+    except Exception:
+        logger.exception("Failed to start run history persistence, runs will not be recorded")
+
+    from infrastructure.database.repositories.research_session_repository import ResearchSessionRepository
+
+    try:
+        await ResearchSessionRepository(engine).create_tables()
+    except Exception:
+        logger.exception("Failed to prepare the session store, follow-ups will start without memory")
+
+    from infrastructure.database.repositories.research_job_repository import ResearchJobRepository
+
+    try:
+        await ResearchJobRepository(engine).create_tables()
+    except Exception:
+        logger.exception("Failed to prepare the research job queue, jobs cannot be submitted")
+
+    if get_configuration().artifacts.spill_backend == "database":
+        from infrastructure.database.repositories.research_artifact_repository import ResearchArtifactRepository
+
+        try:
+            await ResearchArtifactRepository(engine).create_tables()
+        except Exception:
+            logger.exception("Failed to prepare the artifact store, large artifacts will stay in memory")
+
+    if get_configuration().startup_warmup:
+        app.state.warmup = asyncio.create_task(asyncio.to_thread(_warm_up_agent, app))
+
+    loop_monitor = EventLoopMonitor(get_configuration().loop_monitor)
+    loop_monitor.start()
+
+    metrics_task = None
+    if get_configuration().metrics_dir:
+        metrics_task = asyncio.create_task(_flush_worker_metrics(get_configuration().metrics_dir,
+                                                                 get_configuration().metrics_flush_seconds))
+
+    artifact_sweep_task = None
+    if get_configuration().artifacts.retention_seconds is not None:
+        artifact_sweep_task = asyncio.create_task(
+            _sweep_artifacts(get_configuration().artifacts.sweep_interval_seconds))
+
     yield
 
     logger.info("Shutting down Tech Research Agent API...")
+    if metrics_task:
+        metrics_task.cancel()
+        WorkerMetrics.remove(get_configuration().metrics_dir)
+    if artifact_sweep_task:
+        artifact_sweep_task.cancel()
+    await loop_monitor.stop()
+    await run_history_service.stop()
+
+    from services.session_memory_service import SessionMemoryService
+
+    await SessionMemoryService.wait_for_pending_saves()
     await engine.dispose()
     logger.info("Database connections closed")
 
+    from infrastructure.llm.http_transport import LLMHttpTransport
+
+    await LLMHttpTransport.close()
+
+    from infrastructure.recording.cassette import Cassette
+
+    Cassette.close()
+
+    from infrastructure.concurrency.cpu_offload import CpuOffload
+
+    CpuOffload.close()
+
+    from infrastructure.artifacts.artifact_store import ArtifactStore
+
+    ArtifactStore.close()
+    # Lets the queued log sink write out everything logged during shutdown
+    await logger.complete()
+
 def create_app():
     application = FastAPI(
         title="Tech Research Agent API",
@@ -54,8 +178,26 @@ def create_app():
         allow_headers=["*"],
     )
 
+    @application.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        started = time.perf_counter()
+        WorkerMetrics.increment("http_requests_in_flight")
+        try:
+            response = await call_next(request)
+            WorkerMetrics.increment(f"http_responses_{response.status_code // 100}xx")
+            return response
+        finally:
+            WorkerMetrics.increment("http_requests_in_flight", -1)
+            WorkerMetrics.increment("http_requests_total")
+            WorkerMetrics.observe("http_request_seconds", time.perf_counter() - started)
+
     application.include_router(agent_controller.agent_api_router)
-    if configuration.local:
+    application.include_router(batch_controller.batch_router)
+    application.include_router(metrics_controller.metrics_router)
+    application.include_router(runs_controller.runs_router)
+    application.include_router(jobs_controller.jobs_router)
+    application.include_router(admin_controller.admin_router)
+    if get_configuration().local:
         application.include_router(db_controller.db_router)
     logger.info("API routers registered")
 
@@ -0,0 +1,45 @@
+import os
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+
+from config.settings import get_configuration
+from infrastructure.observability.profiling import CpuProfiler, MemoryTracker
+
+
+def require_admin_key(x_admin_key: Optional[str] = Header(default=None)):
+    if not get_configuration().auth_key:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled, AUTH_KEY is not set")
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, get_configuration().auth_key):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+
+# Profiles and snapshots cover the worker process that serves the request
+admin_router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin_key)])
+
+@admin_router.post("/profile/cpu", tags=["Admin"])
+async def profile_cpu(seconds: float = Query(default=10, gt=0, le=120),
+                      interval_ms: float = Query(default=5, ge=1, le=1000),
+                      top: int = Query(default=30, ge=1, le=200)):
+    try:
+        profile = await CpuProfiler.profile(seconds, interval_ms, top)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"pid": os.getpid(), **profile}
+
+@admin_router.post("/memory/snapshot", tags=["Admin"])
+async def take_memory_snapshot(frames: int = Query(default=1, ge=1, le=50)):
+    return {"pid": os.getpid(), **await MemoryTracker.take_baseline(frames)}
+
+@admin_router.get("/memory/diff", tags=["Admin"])
+async def get_memory_diff(top: int = Query(default=25, ge=1, le=200)):
+    try:
+        diff = await MemoryTracker.diff(top)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"pid": os.getpid(), **diff}
+
+@admin_router.delete("/memory/snapshot", tags=["Admin"])
+async def stop_memory_tracking():
+    return {"pid": os.getpid(), **MemoryTracker.stop()}
@@ -1,13 +1,49 @@
-from fastapi import APIRouter
+import uuid
+from typing import Optional
 
-from api.dependency_injection import OrchestratorProcessingServiceDependency
-from services.orchestrator_processing_service import graph_state_to_api_response
+from fastapi import APIRouter, File, Form, Header, Query, UploadFile
+
+from api.dependency_injection import OrchestratorProcessingServiceDependency, ImageProcessingServiceDependency
 
 agent_api_router = APIRouter()
 
 @agent_api_router.get("/call-agent", tags=["Agent"])
 async def answer_technical_questions(user_name: str, query: str,
-                                     orchestrator_processing_service: OrchestratorProcessingServiceDependency):
-    graph_state = await orchestrator_processing_service.process_user_query(user_name, query)
+                                     orchestrator_processing_service: OrchestratorProcessingServiceDependency,
+                                     session_id: Optional[uuid.UUID] = None,
+                                     deadline_seconds: Optional[float] = Query(default=None, gt=0),
+                                     idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key")):
+    from services.orchestrator_processing_service import graph_state_to_api_response
+
+    graph_state = await orchestrator_processing_service.process_user_query(user_name, query, idempotency_key,
+                                                                           str(session_id) if session_id else None,
+                                                                           deadline_seconds=deadline_seconds)
+    api_response = graph_state_to_api_response(graph_state)
+    return api_response
+
+
+@agent_api_router.post("/call-agent/image", tags=["Agent"])
+async def answer_technical_questions_with_image(orchestrator_processing_service: OrchestratorProcessingServiceDependency,
+                                                image_processing_service: ImageProcessingServiceDependency,
+                                                user_name: str = Form(...),
+                                                query: str = Form(...),
+                                                image: UploadFile = File(...),
+                                                session_id: Optional[uuid.UUID] = Form(default=None),
+                                                deadline_seconds: Optional[float] = Form(default=None, gt=0),
+                                                idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key")):
+    """ Answers a question about an uploaded diagram or screenshot, the image is described once per content hash """
+    from services.orchestrator_processing_service import graph_state_to_api_response
+
+    # The image description is an LLM call of its own, a run that would be rejected must not pay for it
+    orchestrator_processing_service.ensure_can_start(user_name)
+
+    # One byte past the limit is enough to reject an oversized upload without reading all of it
+    data = await image.read(image_processing_service.max_upload_bytes + 1)
+    described_image = await image_processing_service.describe(data, user_name)
+
+    graph_state = await orchestrator_processing_service.process_user_query(
+        user_name, image_processing_service.with_image_context(query, described_image), idempotency_key,
+        str(session_id) if session_id else None, deadline_seconds=deadline_seconds)
     api_response = graph_state_to_api_response(graph_state)
+    api_response["image"] = {key: value for key, value in described_image.items() if key != "description"}
     return api_response
@@ -0,0 +1,43 @@
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Request
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from api.dependency_injection import BatchResearchServiceDependency
+
+batch_router = APIRouter()
+
+
+class _BodyStreamingResponse(StreamingResponse):
+    """
+    Streams results while the request body is still being read. The default response listens for a
+    disconnect on receive() and would swallow body chunks, a disconnect surfaces from the body stream instead.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def _iter_lines(request: Request) -> AsyncIterator[str]:
+    """ Splits the streamed request body into lines without buffering more than one partial line """
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8")
+    if pending:
+        yield pending.decode("utf-8")
+
+@batch_router.post("/batch", tags=["Agent"])
+async def run_research_batch(request: Request, batch_research_service: BatchResearchServiceDependency,
+                             user_name: Optional[str] = None):
+    """
+    Accepts JSONL lines of {"id", "user_name", "query", "session_id"} and streams one JSONL result
+    per line back in completion order
+    """
+    return _BodyStreamingResponse(batch_research_service.run(_iter_lines(request), default_user_name=user_name),
+                                  media_type="application/x-ndjson")
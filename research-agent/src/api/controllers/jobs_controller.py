@@ -0,0 +1,18 @@
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter
+
+from api.dependency_injection import JobQueueServiceDependency
+
+jobs_router = APIRouter()
+
+@jobs_router.post("/jobs", tags=["Jobs"], status_code=202)
+async def submit_research_job(user_name: str, query: str, job_queue_service: JobQueueServiceDependency,
+                              session_id: Optional[uuid.UUID] = None):
+    """ Queues a research query for the worker nodes, poll GET /jobs/{job_id} for the result """
+    return await job_queue_service.submit(user_name, query, str(session_id) if session_id else None)
+
+@jobs_router.get("/jobs/{job_id}", tags=["Jobs"])
+async def get_research_job(job_id: uuid.UUID, user_name: str, job_queue_service: JobQueueServiceDependency):
+    return await job_queue_service.get(job_id, user_name)
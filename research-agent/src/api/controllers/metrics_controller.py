@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+
+from config.settings import get_configuration
+from infrastructure.metrics.worker_metrics import WorkerMetrics
+
+metrics_router = APIRouter()
+
+@metrics_router.get("/metrics", tags=["Metrics"])
+async def get_metrics():
+    return {
+        "worker": WorkerMetrics.snapshot(),
+        "aggregate": WorkerMetrics.aggregate(get_configuration().metrics_dir),
+    }
@@ -0,0 +1,41 @@
+import binascii
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from api.dependency_injection import RunHistoryServiceDependency, OrchestratorProcessingServiceDependency
+from config.constants import DbConstants
+from domain.models.rerun_models import RerunRequest
+
+runs_router = APIRouter()
+
+@runs_router.get("/runs", tags=["Runs"])
+async def list_research_runs(user_name: str, run_history_service: RunHistoryServiceDependency,
+                             limit: int = Query(default=DbConstants.RUN_HISTORY_DEFAULT_PAGE_SIZE, ge=1,
+                                                le=DbConstants.RUN_HISTORY_MAX_PAGE_SIZE),
+                             cursor: Optional[str] = None):
+    try:
+        return await run_history_service.list_runs(user_name, limit, cursor)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+@runs_router.get("/runs/{run_id}", tags=["Runs"])
+async def get_research_run(run_id: uuid.UUID, user_name: str, run_history_service: RunHistoryServiceDependency):
+    run = await run_history_service.get_run(run_id, resolve_artifacts=True)
+    # Runs of other users are reported as missing, the same as reruns
+    if run is None or run["user_name"] != user_name:
+        raise HTTPException(status_code=404, detail="Research run not found")
+    return run
+
+@runs_router.post("/runs/{run_id}/rerun", tags=["Runs"])
+async def rerun_research_run(run_id: uuid.UUID, rerun_request: RerunRequest,
+                             orchestrator_processing_service: OrchestratorProcessingServiceDependency):
+    from services.orchestrator_processing_service import graph_state_to_api_response
+
+    edits = rerun_request.edits()
+    if not edits:
+        raise HTTPException(status_code=422, detail="At least one intermediate field must be edited")
+
+    graph_state = await orchestrator_processing_service.rerun(str(run_id), rerun_request.user_name, edits)
+    return graph_state_to_api_response(graph_state)
@@ -1,43 +1,224 @@
+from __future__ import annotations
+
 from functools import lru_cache
-from typing import Annotated
+from typing import Annotated, TYPE_CHECKING
 
 from fastapi import Depends
 
-from agents.orchestrator_graph import OrchestratorGraph
-from agents.orchestrator_nodes import OrchestratorNodes
 from domain.interfaces.llm_interaction_interface import LlmInteractionInterface
 from domain.interfaces.orchestrator_processing_interface import OrchestratorProcessingInterface
 from domain.interfaces.tools_interface import ToolsInterface
-from infrastructure.llm.bootstrap import LLMApplicationBootstrap
-from services.orchestrator_processing_service import OrchestratorProcessingService
+from config.settings import get_configuration
+from services.admission_control_service import AdmissionControlService
+from services.batch_research_service import BatchResearchService
+from services.deadline_service import DeadlineService
+from services.image_processing_service import ImageProcessingService
+from services.job_queue_service import JobQueueService
+from services.model_tier_service import ModelTierService
+from services.query_routing_service import QueryRoutingService
+from services.request_coalescing_service import RequestCoalescingService
+from services.research_worker_service import ResearchWorkerService
+from services.run_history_service import RunHistoryService
+from services.session_memory_service import SessionMemoryService
+from services.speculative_retrieval_service import SpeculativeRetrievalService
+from services.token_budget_service import TokenBudgetService
 from services.tools_service import ToolsService
 
+if TYPE_CHECKING:
+    # langgraph, langchain and the OpenAI SDK are imported on first resolution, not at startup
+    from agents.orchestrator_graph import OrchestratorGraph
+    from agents.orchestrator_nodes import OrchestratorNodes
+    # numpy, only needed once a planner's queries are consolidated
+    from services.query_consolidation_service import QueryConsolidationService
+
 
 class Dependencies:
 
     @staticmethod
     @lru_cache()
     def llm_service() -> LlmInteractionInterface:
+        from infrastructure.llm.bootstrap import LLMApplicationBootstrap
+
         return LLMApplicationBootstrap.build_llm_interaction_service()
 
     @staticmethod
     @lru_cache()
     def get_tools_service(llm_service: LlmInteractionInterface = Depends(llm_service)) -> ToolsService:
-        return ToolsService(llm_service)
+        from infrastructure.recording.cassette import Cassette
+
+        return ToolsService(llm_service, cassette=Cassette.get_active())
+
+    @staticmethod
+    @lru_cache()
+    def token_budget_service() -> TokenBudgetService:
+        return TokenBudgetService(get_configuration().token_budget)
+
+    @staticmethod
+    @lru_cache()
+    def deadline_service() -> DeadlineService:
+        return DeadlineService(get_configuration().deadline)
+
+    @staticmethod
+    @lru_cache()
+    def request_coalescing_service() -> RequestCoalescingService:
+        return RequestCoalescingService(idempotency_ttl_seconds=get_configuration().idempotency_ttl_seconds)
+
+    @staticmethod
+    @lru_cache()
+    def admission_control_service() -> AdmissionControlService:
+        return AdmissionControlService(get_configuration().admission)
+
+    @staticmethod
+    @lru_cache()
+    def run_history_service() -> RunHistoryService:
+        from infrastructure.database.database_engine import DatabaseEngine
+        from infrastructure.database.repositories.research_run_repository import ResearchRunRepository
+
+        return RunHistoryService(ResearchRunRepository(DatabaseEngine.get_engine()), get_configuration().persistence)
+
+    @staticmethod
+    @lru_cache()
+    def job_queue_service() -> JobQueueService:
+        from infrastructure.database.database_engine import DatabaseEngine
+        from infrastructure.database.repositories.research_job_repository import ResearchJobRepository
+
+        return JobQueueService(ResearchJobRepository(DatabaseEngine.get_engine()))
+
+    @staticmethod
+    @lru_cache()
+    def query_routing_service(llm_service: LlmInteractionInterface = Depends(llm_service)) -> QueryRoutingService:
+        return QueryRoutingService(llm_service,
+                                   enabled=get_configuration().routing_enabled,
+                                   embedding_margin=get_configuration().routing_embedding_margin)
 
     @staticmethod
     @lru_cache()
-    def orchestrator_nodes(tools_service: ToolsInterface = Depends(get_tools_service)) -> OrchestratorNodes:
-        return OrchestratorNodes(tools_service=tools_service)
+    def model_tier_service() -> ModelTierService:
+        return ModelTierService(get_configuration().llm)
+
+    @staticmethod
+    @lru_cache()
+    def session_memory_service(tools_service: ToolsInterface = Depends(get_tools_service),
+                               model_tier_service: ModelTierService = Depends(model_tier_service),
+                               token_budget_service: TokenBudgetService = Depends(token_budget_service)) -> SessionMemoryService:
+        from infrastructure.database.database_engine import DatabaseEngine
+        from infrastructure.database.repositories.research_session_repository import ResearchSessionRepository
+
+        return SessionMemoryService(ResearchSessionRepository(DatabaseEngine.get_engine()),
+                                    tools_service=tools_service,
+                                    model_tier_service=model_tier_service,
+                                    token_budget_service=token_budget_service)
+
+    @staticmethod
+    @lru_cache()
+    def image_processing_service(tools_service: ToolsInterface = Depends(get_tools_service),
+                                 model_tier_service: ModelTierService = Depends(model_tier_service),
+                                 token_budget_service: TokenBudgetService = Depends(token_budget_service)) -> ImageProcessingService:
+        return ImageProcessingService(tools_service=tools_service,
+                                      model_tier_service=model_tier_service,
+                                      token_budget_service=token_budget_service,
+                                      image_config=get_configuration().image)
+
+    @staticmethod
+    @lru_cache()
+    def speculative_retrieval_service(tools_service: ToolsInterface = Depends(get_tools_service)) -> SpeculativeRetrievalService:
+        return SpeculativeRetrievalService(tools_service, get_configuration().speculation)
+
+    @staticmethod
+    @lru_cache()
+    def query_consolidation_service(llm_service: LlmInteractionInterface = Depends(llm_service)) -> QueryConsolidationService:
+        from services.query_consolidation_service import QueryConsolidationService
+
+        return QueryConsolidationService(llm_service, get_configuration().query_consolidation)
+
+    @staticmethod
+    @lru_cache()
+    def orchestrator_nodes(tools_service: ToolsInterface = Depends(get_tools_service),
+                           token_budget_service: TokenBudgetService = Depends(token_budget_service),
+                           query_routing_service: QueryRoutingService = Depends(query_routing_service),
+                           model_tier_service: ModelTierService = Depends(model_tier_service),
+                           speculative_retrieval_service: SpeculativeRetrievalService = Depends(speculative_retrieval_service),
+                           query_consolidation_service: QueryConsolidationService = Depends(query_consolidation_service),
+                           deadline_service: DeadlineService = Depends(deadline_service)) -> OrchestratorNodes:
+        from agents.orchestrator_nodes import OrchestratorNodes
+
+        return OrchestratorNodes(tools_service=tools_service,
+                                 token_budget_service=token_budget_service,
+                                 query_routing_service=query_routing_service,
+                                 model_tier_service=model_tier_service,
+                                 speculative_retrieval_service=speculative_retrieval_service,
+                                 query_consolidation_service=query_consolidation_service,
+                                 deadline_service=deadline_service)
 
     @staticmethod
     @lru_cache()
     def orchestrator_graph(
             orchestrator_nodes: OrchestratorNodes = Depends(orchestrator_nodes)) -> OrchestratorGraph:
+        from agents.orchestrator_graph import OrchestratorGraph
+
         return OrchestratorGraph(orchestrator_nodes=orchestrator_nodes)
 
     @staticmethod
-    def orchestrator_processing_service(orchestrator_graph: OrchestratorGraph = Depends(orchestrator_graph)) -> OrchestratorProcessingInterface:
-        return OrchestratorProcessingService(orchestrator=orchestrator_graph)
+    def orchestrator_processing_service(orchestrator_graph: OrchestratorGraph = Depends(orchestrator_graph),
+                                        token_budget_service: TokenBudgetService = Depends(token_budget_service),
+                                        request_coalescing_service: RequestCoalescingService = Depends(request_coalescing_service),
+                                        run_history_service: RunHistoryService = Depends(run_history_service),
+                                        session_memory_service: SessionMemoryService = Depends(session_memory_service),
+                                        admission_control_service: AdmissionControlService = Depends(admission_control_service),
+                                        deadline_service: DeadlineService = Depends(deadline_service),
+                                        speculative_retrieval_service: SpeculativeRetrievalService = Depends(speculative_retrieval_service)) -> OrchestratorProcessingInterface:
+        from services.orchestrator_processing_service import OrchestratorProcessingService
+
+        return OrchestratorProcessingService(orchestrator=orchestrator_graph,
+                                             token_budget_service=token_budget_service,
+                                             request_coalescing_service=request_coalescing_service,
+                                             run_history_service=run_history_service,
+                                             session_memory_service=session_memory_service,
+                                             admission_control_service=admission_control_service,
+                                             deadline_service=deadline_service,
+                                             speculative_retrieval_service=speculative_retrieval_service)
+
+    @staticmethod
+    def batch_research_service(orchestrator_processing_service: OrchestratorProcessingInterface = Depends(orchestrator_processing_service)) -> BatchResearchService:
+        return BatchResearchService(orchestrator_processing_service, get_configuration().batch)
+
+    @staticmethod
+    def research_worker_service() -> ResearchWorkerService:
+        """ Built outside of FastAPI, so the graph dependencies are resolved here the way the API warm-up does """
+        from infrastructure.database.database_engine import DatabaseEngine
+        from infrastructure.database.repositories.research_job_repository import ResearchJobRepository
+
+        llm_service = Dependencies.llm_service()
+        tools_service = Dependencies.get_tools_service(llm_service=llm_service)
+        token_budget_service = Dependencies.token_budget_service()
+        model_tier_service = Dependencies.model_tier_service()
+        speculative_retrieval_service = Dependencies.speculative_retrieval_service(tools_service=tools_service)
+        nodes = Dependencies.orchestrator_nodes(tools_service=tools_service,
+                                                token_budget_service=token_budget_service,
+                                                query_routing_service=Dependencies.query_routing_service(
+                                                    llm_service=llm_service),
+                                                model_tier_service=model_tier_service,
+                                                speculative_retrieval_service=speculative_retrieval_service,
+                                                query_consolidation_service=Dependencies.query_consolidation_service(
+                                                    llm_service=llm_service),
+                                                deadline_service=Dependencies.deadline_service())
+        processing_service = Dependencies.orchestrator_processing_service(
+            orchestrator_graph=Dependencies.orchestrator_graph(orchestrator_nodes=nodes),
+            token_budget_service=token_budget_service,
+            request_coalescing_service=Dependencies.request_coalescing_service(),
+            run_history_service=Dependencies.run_history_service(),
+            session_memory_service=Dependencies.session_memory_service(tools_service=tools_service,
+                                                                       model_tier_service=model_tier_service,
+                                                                       token_budget_service=token_budget_service),
+            admission_control_service=Dependencies.admission_control_service(),
+            deadline_service=Dependencies.deadline_service(),
+            speculative_retrieval_service=speculative_retrieval_service)
+
+        return ResearchWorkerService(ResearchJobRepository(DatabaseEngine.get_engine()), processing_service,
+                                     get_configuration().job_queue)
 
+RunHistoryServiceDependency = Annotated[RunHistoryService, Depends(Dependencies.run_history_service)]
 OrchestratorProcessingServiceDependency = Annotated[OrchestratorProcessingInterface, Depends(Dependencies.orchestrator_processing_service)]
+ImageProcessingServiceDependency = Annotated[ImageProcessingService, Depends(Dependencies.image_processing_service)]
+BatchResearchServiceDependency = Annotated[BatchResearchService, Depends(Dependencies.batch_research_service)]
+JobQueueServiceDependency = Annotated[JobQueueService, Depends(Dependencies.job_queue_service)]
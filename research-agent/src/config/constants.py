@@ -16,6 +16,191 @@ class DbConstants:
     SUPABASE_CONNECTION_STRING = "SUPABASE_CONNECTION_STRING"
     SCHEMA = "public"
 
+    RUN_HISTORY_DEFAULT_PAGE_SIZE = 20
+    RUN_HISTORY_MAX_PAGE_SIZE = 100
+
+    JOB_NOTIFY_CHANNEL = "research_jobs"
+    JOB_QUEUED = "queued"
+    JOB_RUNNING = "running"
+    JOB_COMPLETED = "completed"
+    JOB_FAILED = "failed"
+    # Error states of a run that fail the same way on every attempt, a job ending in one is not retried
+    JOB_PERMANENT_ERROR_CODES = ("TOKEN_BUDGET_EXCEEDED",)
+
+
+class LogConstants:
+    # Categories sampled through LOG_SAMPLE_RATES, stdlib records use their logger name (e.g. "uvicorn.access")
+    DEFAULT_CATEGORY = "app"
+    LLM_PAYLOAD = "llm_payload"
+
+    REDACTED_KEYS = ("api_key", "apikey", "authorization", "auth_key", "password", "secret", "token")
+    # Strings shorter than this are never scanned for base64 payloads
+    REDACTION_SCAN_MIN_CHARS = 256
+    BASE64_MIN_CHARS = 256
+
 
 class MessageConstants:
-    WORKING_MEMORY_MESSAGE_LIMIT = 30
\ No newline at end of file
+    WORKING_MEMORY_MESSAGE_LIMIT = 30
+    # Messages kept verbatim after older turns are folded into the rolling summary
+    WORKING_MEMORY_RETAINED_MESSAGES = 10
+    CONTEXT_MESSAGE_MAX_CHARS = 1000
+    SUMMARY_MAX_TOKENS = 512
+    # Tries at appending a turn to a session other processes keep saving turns of
+    SESSION_SAVE_ATTEMPTS = 3
+
+    HUMAN_ROLE = "human"
+    AI_ROLE = "ai"
+
+    # Outputs carried from one turn of a session to the next
+    SESSION_CONTEXT_FIELDS = ("subtasks", "research_queries", "no_research_subtasks", "relevant_docs", "citations",
+                              "approaches", "recommended_approach", "final_plan")
+
+
+class GraphNodeConstants:
+    ROUTER = "router"
+    QUICK_ANSWER = "quick_answer"
+    DECOMPOSE = "decompose"
+    PLANNER = "planner"
+    EXECUTOR = "executor"
+    COMPARATOR = "comparator"
+    MERGER = "merger"
+    SYNTHESIZER = "synthesizer"
+    GENERATOR = "generator"
+    SUMMARIZER = "summarizer"
+    IMAGE_DESCRIBER = "image_describer"
+
+    # State fields each node produces, persisted per run as the node output
+    OUTPUT_FIELDS = {
+        QUICK_ANSWER: ("response",),
+        DECOMPOSE: ("subtasks",),
+        PLANNER: ("research_queries", "no_research_subtasks", "query_clusters", "speculation"),
+        EXECUTOR: ("relevant_docs", "citations"),
+        MERGER: ("approaches",),
+        SYNTHESIZER: ("recommended_approach", "reasoning"),
+        GENERATOR: ("final_plan",),
+    }
+
+    # Order of the research pipeline, used to find what a partial re-execution has to recompute
+    PIPELINE_ORDER = (DECOMPOSE, PLANNER, EXECUTOR, COMPARATOR, MERGER, SYNTHESIZER, GENERATOR)
+
+    # Editable intermediate fields and the first node that consumes them
+    EDIT_RESUME_NODES = {
+        "subtasks": PLANNER,
+        "research_queries": EXECUTOR,
+        "no_research_subtasks": EXECUTOR,
+        "relevant_docs": COMPARATOR,
+        "approaches": SYNTHESIZER,
+        "recommended_approach": GENERATOR,
+        "reasoning": GENERATOR,
+    }
+
+
+class TokenConstants:
+    CHARS_PER_TOKEN = 4
+    DEFAULT_COMPLETION_ALLOWANCE = 2048
+    MIN_COMPLETION_ALLOWANCE = 256
+
+
+class DeadlineConstants:
+    # Share of the time left one call of a node may take, the rest is held back for the nodes after it
+    NODE_TIME_SHARE = {
+        GraphNodeConstants.QUICK_ANSWER: 1.0,
+        GraphNodeConstants.DECOMPOSE: 0.25,
+        GraphNodeConstants.PLANNER: 0.3,
+        GraphNodeConstants.EXECUTOR: 0.35,
+        GraphNodeConstants.COMPARATOR: 0.5,
+        GraphNodeConstants.SYNTHESIZER: 0.5,
+        GraphNodeConstants.GENERATOR: 1.0,
+    }
+
+    # Degradations are recorded as "<node>:<kind>" in the run's degraded list
+    FAST_MODEL = "fast_model"
+    FEWER_DOCS = "fewer_docs"
+    PARTIAL_RESEARCH = "partial_research"
+    SKIPPED = "skipped"
+    TIMED_OUT = "timed_out"
+    DEADLINE_EXCEEDED = "deadline_exceeded"
+
+
+class AdmissionConstants:
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+
+    # Lanes in priority order, a queued interactive run is always admitted before a batch one
+    LANES = (INTERACTIVE, BATCH)
+
+    # Smoothing of the run duration estimate behind the estimated wait
+    RUN_SECONDS_EWMA_ALPHA = 0.2
+
+
+class RoutingConstants:
+    SIMPLE = "simple"
+    COMPLEX = "complex"
+
+    SIMPLE_MAX_WORDS = 15
+    COMPLEX_MIN_WORDS = 40
+
+    SIMPLE_PATTERNS = (
+        r"^(what|who|when|which) (is|are|was|were)\b",
+        r"\bdifference between\b",
+        r"\b(define|definition of|meaning of)\b",
+        r"\bvs\.?\b",
+        r"^(how do i|how to|can i|is it possible to)\b",
+    )
+
+    COMPLEX_MARKERS = (
+        "architecture", "design", "scalable", "scale", "system", "pipeline", "production", "migrate",
+        "migration", "deploy", "infrastructure", "platform", "build", "implement", "roadmap", "strategy",
+    )
+
+    SIMPLE_EXEMPLARS = (
+        "What's the difference between a list and a tuple in Python?",
+        "What is a mutex?",
+        "How do I reverse a string in JavaScript?",
+        "What does HTTP status 429 mean?",
+    )
+
+    COMPLEX_EXEMPLARS = (
+        "Design a scalable recommendation system for an e-commerce platform",
+        "Plan the migration of a monolith to event-driven microservices",
+        "Build a real-time fraud detection pipeline with streaming data",
+        "Architect a multi-tenant SaaS analytics platform",
+    )
+
+
+class ModelTierConstants:
+    SMALL = "small"
+    LARGE = "large"
+
+    # Ordered from cheapest to most capable, fallback escalates along this order
+    TIER_ORDER = ("small", "medium", "large")
+
+    DEFAULT_NODE_TIERS = {
+        GraphNodeConstants.QUICK_ANSWER: SMALL,
+        GraphNodeConstants.DECOMPOSE: SMALL,
+        GraphNodeConstants.PLANNER: SMALL,
+        GraphNodeConstants.COMPARATOR: LARGE,
+        GraphNodeConstants.SYNTHESIZER: LARGE,
+        GraphNodeConstants.GENERATOR: LARGE,
+        GraphNodeConstants.SUMMARIZER: SMALL,
+        # Needs a vision capable model
+        GraphNodeConstants.IMAGE_DESCRIBER: LARGE,
+    }
+
+
+class OutputLengthConstants:
+    # Completion limits of every node until enough of its outputs were observed, LLM_NODE_MAX_TOKENS overrides them
+    DEFAULT_NODE_MAX_TOKENS = {
+        GraphNodeConstants.QUICK_ANSWER: 1024,
+        GraphNodeConstants.DECOMPOSE: 512,
+        GraphNodeConstants.PLANNER: 1024,
+        GraphNodeConstants.COMPARATOR: 2048,
+        GraphNodeConstants.SYNTHESIZER: 1024,
+        GraphNodeConstants.GENERATOR: 4096,
+        GraphNodeConstants.SUMMARIZER: MessageConstants.SUMMARY_MAX_TOKENS,
+        GraphNodeConstants.IMAGE_DESCRIBER: 1024,
+    }
+
+    # A truncated output is retried with this many times the limit it hit
+    TRUNCATION_GROWTH = 2
+    TRUNCATED = "length"
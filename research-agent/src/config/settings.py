@@ -1,9 +1,14 @@
 from __future__ import annotations
+import os
+import tempfile
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Literal
+from typing import Dict, Optional, Literal
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from config.constants import AdmissionConstants
+
 
 def _find_env_file(start: Path, max_up: int = 6) -> Optional[Path]:
     cur = start.resolve()
@@ -15,12 +20,16 @@ def _find_env_file(start: Path, max_up: int = 6) -> Optional[Path]:
     return None
 
 
-_ENV_FILE = _find_env_file(Path(__file__).resolve())
-
-
 class SupabaseDBConfig(BaseModel):
     connection_string: str
     db_schema: str
+    connection_mode: Literal["pooler", "direct"] = "pooler"
+    pool_size: int = 5
+    max_overflow: int = 15
+    pool_timeout: int = 30
+    pool_recycle: int = 1800
+    statement_cache_size: int = 100
+    slow_checkout_seconds: float = 0.5
 
 
 class ApiServerConfig(BaseModel):
@@ -35,32 +44,298 @@ class LLMConfig(BaseModel):
     llm_provider: str
     llm_model: str
     llm_embedding_model: str
+    model_tiers: Dict[str, str]
+    node_tiers: Dict[str, str]
+    tier_fallback: bool
+    max_concurrent_calls: int
+
+
+class OutputLengthConfig(BaseModel):
+    adaptive: bool
+    node_max_tokens: Dict[str, int]
+    max_tokens: int
+    percentile: float
+    headroom: float
+    min_samples: int
+    window: int
+    truncation_retries: int
+
+
+class LLMHttpConfig(BaseModel):
+    max_connections: int
+    max_keepalive_connections: int
+    keepalive_expiry: float
+    http2: bool
+    connect_timeout: float
+    read_timeout: float
+    write_timeout: float
+    pool_timeout: float
+
+
+class TokenBudgetConfig(BaseModel):
+    run_token_budget: Optional[int]
+    user_token_budget: Optional[int]
+    user_budget_window_seconds: int
+
+
+class SpeculationConfig(BaseModel):
+    enabled: bool
+    match_threshold: float
+
+
+class QueryConsolidationConfig(BaseModel):
+    enabled: bool
+    similarity_threshold: float
+
+
+class ArtifactConfig(BaseModel):
+    enabled: bool
+    min_chars: int
+    memory_max_bytes: int
+    spill_backend: Literal["disk", "database"]
+    spill_directory: str
+    retention_seconds: Optional[float]
+    sweep_interval_seconds: float
+
+
+class DeadlineConfig(BaseModel):
+    default_seconds: Optional[float]
+    degrade_below_seconds: float
+    skip_comparison_below_seconds: float
+    degraded_max_docs: int
+
+
+class AdmissionConfig(BaseModel):
+    enabled: bool
+    max_concurrent_runs: int
+    batch_max_running: int
+    queue_depth: Dict[str, int]
+    max_wait_seconds: Dict[str, float]
+    user_weights: Dict[str, float]
+    initial_run_seconds: float
+
+
+class CassetteConfig(BaseModel):
+    mode: Literal["off", "record", "replay"]
+    directory: Optional[str]
+    reproduce_timing: bool
+
+
+class LoopMonitorConfig(BaseModel):
+    enabled: bool
+    interval_seconds: float
+    stall_seconds: float
+
+
+class OffloadConfig(BaseModel):
+    enabled: bool
+    thread_workers: int
+    process_workers: int
+    max_pending: int
+    inline_max_chars: int
+    process_min_chars: int
+    process_start_method: Literal["spawn", "forkserver", "fork"]
+
+
+class LoggingConfig(BaseModel):
+    level: str
+    format: Literal["text", "json"]
+    enqueue: bool
+    max_field_chars: int
+    sample_rates: Dict[str, float]
+
+
+class ImageConfig(BaseModel):
+    max_dimension: int
+    jpeg_quality: int
+    max_upload_bytes: int
+    cache_size: int
+
+
+class BatchConfig(BaseModel):
+    max_concurrency: int
+    dedupe_cache_size: int
+
+
+class JobQueueConfig(BaseModel):
+    worker_concurrency: int
+    lease_seconds: float
+    heartbeat_seconds: float
+    poll_seconds: float
+    max_attempts: int
+    retry_backoff_seconds: float
+    listen: bool
+
+
+class PersistenceConfig(BaseModel):
+    enabled: bool
+    queue_size: int
+    batch_size: int
+    flush_interval_seconds: float
+
 
 class Configuration(BaseSettings):
     model_config = SettingsConfigDict(
-        env_file=str(_ENV_FILE) if _ENV_FILE else None,
         env_prefix="",
         extra="ignore",
         case_sensitive=False,
     )
 
     local: bool = Field(default=False, alias="LOCAL")
-    app_mode: Literal["api"] = Field(default="api", alias="APP_MODE")
+    app_mode: Literal["api", "api_workers", "worker"] = Field(default="api", alias="APP_MODE")
 
     # API
     app_host: str = Field(default="0.0.0.0", alias="APP_HOST")
     app_port: int = Field(default=5000, alias="APP_PORT")
     log_level: str = Field(default="INFO", alias="LOGURU_LEVEL")
+    startup_warmup: bool = Field(default=True, alias="STARTUP_WARMUP")
+
+    # Logging
+    log_format: Literal["text", "json"] = Field(default="text", alias="LOG_FORMAT")
+    log_enqueue: bool = Field(default=True, alias="LOG_ENQUEUE")
+    log_max_field_chars: int = Field(default=2000, alias="LOG_MAX_FIELD_CHARS")
+    log_sample_rates: Dict[str, float] = Field(default_factory=dict, alias="LOG_SAMPLE_RATES")
+
+    # Event loop monitoring
+    loop_monitor_enabled: bool = Field(default=True, alias="LOOP_MONITOR_ENABLED")
+    loop_monitor_interval_seconds: float = Field(default=0.1, alias="LOOP_MONITOR_INTERVAL_SECONDS")
+    loop_monitor_stall_seconds: float = Field(default=0.25, alias="LOOP_MONITOR_STALL_SECONDS")
+
+    # CPU offload
+    offload_enabled: bool = Field(default=True, alias="OFFLOAD_ENABLED")
+    offload_thread_workers: int = Field(default=4, alias="OFFLOAD_THREAD_WORKERS")
+    offload_process_workers: int = Field(default=2, alias="OFFLOAD_PROCESS_WORKERS")
+    offload_max_pending: int = Field(default=64, alias="OFFLOAD_MAX_PENDING")
+    offload_inline_max_chars: int = Field(default=20_000, alias="OFFLOAD_INLINE_MAX_CHARS")
+    offload_process_min_chars: int = Field(default=200_000, alias="OFFLOAD_PROCESS_MIN_CHARS")
+    offload_process_start_method: Literal["spawn", "forkserver", "fork"] = Field(
+        default="spawn", alias="OFFLOAD_PROCESS_START_METHOD")
+
+    # Multi-worker serving
+    app_workers: Optional[int] = Field(default=None, alias="APP_WORKERS")
+    graceful_shutdown_seconds: int = Field(default=30, alias="GRACEFUL_SHUTDOWN_SECONDS")
+    metrics_dir: Optional[str] = Field(default=None, alias="APP_METRICS_DIR")
+    metrics_flush_seconds: float = Field(default=5.0, alias="APP_METRICS_FLUSH_SECONDS")
+
+    # Research job queue
+    job_worker_concurrency: int = Field(default=4, alias="JOB_WORKER_CONCURRENCY")
+    job_lease_seconds: float = Field(default=60.0, alias="JOB_LEASE_SECONDS")
+    job_heartbeat_seconds: float = Field(default=15.0, alias="JOB_HEARTBEAT_SECONDS")
+    job_poll_seconds: float = Field(default=5.0, alias="JOB_POLL_SECONDS")
+    job_max_attempts: int = Field(default=3, alias="JOB_MAX_ATTEMPTS")
+    job_retry_backoff_seconds: float = Field(default=10.0, alias="JOB_RETRY_BACKOFF_SECONDS")
 
     # LLM
     llm_api_key: str = Field(default=None, alias="LLM_API_KEY")
     llm_provider: str = Field(default=None, alias="LLM_PROVIDER")
     llm_model: str = Field(default=None, alias="LLM_MODEL")
     llm_embedding_model: str = Field(default=None, alias="LLM_EMBEDDING_MODEL")
+    llm_model_tiers: Dict[str, str] = Field(default_factory=dict, alias="LLM_MODEL_TIERS")
+    llm_node_tiers: Dict[str, str] = Field(default_factory=dict, alias="LLM_NODE_TIERS")
+    llm_tier_fallback: bool = Field(default=True, alias="LLM_TIER_FALLBACK")
+    llm_max_concurrent_calls: int = Field(default=10, alias="LLM_MAX_CONCURRENT_CALLS")
+
+    # LLM output length
+    llm_adaptive_max_tokens: bool = Field(default=True, alias="LLM_ADAPTIVE_MAX_TOKENS")
+    llm_node_max_tokens: Dict[str, int] = Field(default_factory=dict, alias="LLM_NODE_MAX_TOKENS")
+    llm_max_tokens: int = Field(default=8000, alias="LLM_MAX_TOKENS")
+    llm_max_tokens_percentile: float = Field(default=95.0, alias="LLM_MAX_TOKENS_PERCENTILE")
+    llm_max_tokens_headroom: float = Field(default=1.25, alias="LLM_MAX_TOKENS_HEADROOM")
+    llm_max_tokens_min_samples: int = Field(default=20, alias="LLM_MAX_TOKENS_MIN_SAMPLES")
+    llm_max_tokens_window: int = Field(default=200, alias="LLM_MAX_TOKENS_WINDOW")
+    llm_truncation_retries: int = Field(default=2, alias="LLM_TRUNCATION_RETRIES")
+
+    # LLM and search record/replay
+    cassette_mode: Literal["off", "record", "replay"] = Field(default="off", alias="CASSETTE_MODE")
+    cassette_dir: Optional[str] = Field(default=None, alias="CASSETTE_DIR")
+    cassette_reproduce_timing: bool = Field(default=False, alias="CASSETTE_REPRODUCE_TIMING")
+
+    # LLM HTTP transport
+    llm_http_max_connections: int = Field(default=100, alias="LLM_HTTP_MAX_CONNECTIONS")
+    llm_http_max_keepalive_connections: int = Field(default=20, alias="LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS")
+    llm_http_keepalive_expiry: float = Field(default=30.0, alias="LLM_HTTP_KEEPALIVE_EXPIRY")
+    llm_http2: bool = Field(default=False, alias="LLM_HTTP2")
+    llm_http_connect_timeout: float = Field(default=5.0, alias="LLM_HTTP_CONNECT_TIMEOUT")
+    llm_http_read_timeout: float = Field(default=120.0, alias="LLM_HTTP_READ_TIMEOUT")
+    llm_http_write_timeout: float = Field(default=30.0, alias="LLM_HTTP_WRITE_TIMEOUT")
+    llm_http_pool_timeout: float = Field(default=10.0, alias="LLM_HTTP_POOL_TIMEOUT")
+
+    # Query Routing
+    routing_enabled: bool = Field(default=True, alias="ROUTING_ENABLED")
+    routing_embedding_margin: float = Field(default=0.02, alias="ROUTING_EMBEDDING_MARGIN")
+
+    # Speculative Retrieval
+    speculative_retrieval_enabled: bool = Field(default=False, alias="SPECULATIVE_RETRIEVAL_ENABLED")
+    speculative_retrieval_match_threshold: float = Field(default=0.6, alias="SPECULATIVE_RETRIEVAL_MATCH_THRESHOLD")
+
+    # Query Consolidation
+    query_consolidation_enabled: bool = Field(default=True, alias="QUERY_CONSOLIDATION_ENABLED")
+    query_consolidation_threshold: float = Field(default=0.85, alias="QUERY_CONSOLIDATION_THRESHOLD")
+
+    # Artifact Store
+    artifact_store_enabled: bool = Field(default=True, alias="ARTIFACT_STORE_ENABLED")
+    artifact_min_chars: int = Field(default=20000, alias="ARTIFACT_MIN_CHARS")
+    artifact_memory_max_bytes: int = Field(default=256 * 1024 * 1024, alias="ARTIFACT_MEMORY_MAX_BYTES")
+    # Stored runs and sessions reference spilled artifacts. "disk" is local to one node, deployments running
+    # APP_MODE=worker nodes need "database", which is what a worker node defaults to
+    artifact_spill_backend: Optional[Literal["disk", "database"]] = Field(default=None, alias="ARTIFACT_SPILL_BACKEND")
+    artifact_spill_dir: Optional[str] = Field(default=None, alias="ARTIFACT_SPILL_DIR")
+    # Spilled artifacts no stored run or session referenced for this long are deleted, unset keeps them forever
+    artifact_retention_seconds: Optional[float] = Field(default=7 * 24 * 3600, alias="ARTIFACT_RETENTION_SECONDS")
+    artifact_sweep_interval_seconds: float = Field(default=3600, alias="ARTIFACT_SWEEP_INTERVAL_SECONDS")
+
+    # Run Deadlines
+    run_deadline_seconds: Optional[float] = Field(default=None, alias="RUN_DEADLINE_SECONDS")
+    deadline_degrade_below_seconds: float = Field(default=30.0, alias="DEADLINE_DEGRADE_BELOW_SECONDS")
+    deadline_skip_comparison_below_seconds: float = Field(default=15.0, alias="DEADLINE_SKIP_COMPARISON_BELOW_SECONDS")
+    deadline_degraded_max_docs: int = Field(default=3, alias="DEADLINE_DEGRADED_MAX_DOCS")
+
+    # Request Coalescing
+    idempotency_ttl_seconds: int = Field(default=600, alias="IDEMPOTENCY_TTL_SECONDS")
+
+    # Token Budgets
+    run_token_budget: Optional[int] = Field(default=None, alias="RUN_TOKEN_BUDGET")
+    # Enforced per worker process, not across API workers and worker nodes
+    user_token_budget: Optional[int] = Field(default=None, alias="USER_TOKEN_BUDGET")
+    user_budget_window_seconds: int = Field(default=86400, alias="USER_BUDGET_WINDOW_SECONDS")
+
+    # Admission Control
+    admission_enabled: bool = Field(default=True, alias="ADMISSION_ENABLED")
+    admission_max_concurrent_runs: int = Field(default=16, alias="ADMISSION_MAX_CONCURRENT_RUNS")
+    admission_batch_max_running: int = Field(default=8, alias="ADMISSION_BATCH_MAX_RUNNING")
+    admission_interactive_queue_depth: int = Field(default=64, alias="ADMISSION_INTERACTIVE_QUEUE_DEPTH")
+    admission_batch_queue_depth: int = Field(default=256, alias="ADMISSION_BATCH_QUEUE_DEPTH")
+    admission_interactive_max_wait_seconds: float = Field(default=30.0, alias="ADMISSION_INTERACTIVE_MAX_WAIT_SECONDS")
+    admission_batch_max_wait_seconds: float = Field(default=600.0, alias="ADMISSION_BATCH_MAX_WAIT_SECONDS")
+    admission_user_weights: Dict[str, float] = Field(default_factory=dict, alias="ADMISSION_USER_WEIGHTS")
+    admission_initial_run_seconds: float = Field(default=20.0, alias="ADMISSION_INITIAL_RUN_SECONDS")
 
     # Supabase
     supabase_connection_string: str = Field(default="", alias="SUPABASE_CONNECTION_STRING")
     supabase_schema: str = Field(default="public", alias="SUPABASE_SCHEMA")
+    db_connection_mode: Literal["pooler", "direct"] = Field(default="pooler", alias="DB_CONNECTION_MODE")
+    db_pool_size: int = Field(default=5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=15, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: int = Field(default=30, alias="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(default=1800, alias="DB_POOL_RECYCLE")
+    db_statement_cache_size: int = Field(default=100, alias="DB_STATEMENT_CACHE_SIZE")
+    db_slow_checkout_seconds: float = Field(default=0.5, alias="DB_SLOW_CHECKOUT_SECONDS")
+
+    # Run History Persistence
+    persistence_enabled: bool = Field(default=True, alias="PERSISTENCE_ENABLED")
+    persistence_queue_size: int = Field(default=1000, alias="PERSISTENCE_QUEUE_SIZE")
+    persistence_batch_size: int = Field(default=50, alias="PERSISTENCE_BATCH_SIZE")
+    persistence_flush_interval_seconds: float = Field(default=1.0, alias="PERSISTENCE_FLUSH_INTERVAL_SECONDS")
+
+    # Image Uploads
+    image_max_dimension: int = Field(default=1568, alias="IMAGE_MAX_DIMENSION")
+    image_jpeg_quality: int = Field(default=85, alias="IMAGE_JPEG_QUALITY")
+    image_max_upload_bytes: int = Field(default=20 * 1024 * 1024, alias="IMAGE_MAX_UPLOAD_BYTES")
+    image_cache_size: int = Field(default=128, alias="IMAGE_CACHE_SIZE")
+
+    # Batch Research
+    batch_max_concurrency: int = Field(default=8, alias="BATCH_MAX_CONCURRENCY")
+    batch_dedupe_cache_size: int = Field(default=1000, alias="BATCH_DEDUPE_CACHE_SIZE")
 
     # API Authentication
     auth_key: Optional[str] = Field(default=None, alias="AUTH_KEY")
@@ -74,6 +349,44 @@ class Configuration(BaseSettings):
             auth_key=self.auth_key,
         )
 
+    @property
+    def logging(self) -> LoggingConfig:
+        return LoggingConfig(
+            level=self.log_level,
+            format=self.log_format,
+            enqueue=self.log_enqueue,
+            max_field_chars=self.log_max_field_chars,
+            sample_rates=self.log_sample_rates,
+        )
+
+    @property
+    def loop_monitor(self) -> LoopMonitorConfig:
+        return LoopMonitorConfig(
+            enabled=self.loop_monitor_enabled,
+            interval_seconds=self.loop_monitor_interval_seconds,
+            stall_seconds=self.loop_monitor_stall_seconds,
+        )
+
+    @property
+    def offload(self) -> OffloadConfig:
+        return OffloadConfig(
+            enabled=self.offload_enabled,
+            thread_workers=self.offload_thread_workers,
+            process_workers=self.offload_process_workers,
+            max_pending=self.offload_max_pending,
+            inline_max_chars=self.offload_inline_max_chars,
+            process_min_chars=self.offload_process_min_chars,
+            process_start_method=self.offload_process_start_method,
+        )
+
+    @property
+    def cassette(self) -> CassetteConfig:
+        return CassetteConfig(
+            mode=self.cassette_mode,
+            directory=self.cassette_dir,
+            reproduce_timing=self.cassette_reproduce_timing,
+        )
+
     @property
     def llm(self) -> LLMConfig:
         return LLMConfig(
@@ -81,6 +394,97 @@ class Configuration(BaseSettings):
             llm_provider=self.llm_provider,
             llm_model=self.llm_model,
             llm_embedding_model=self.llm_embedding_model,
+            model_tiers=self.llm_model_tiers,
+            node_tiers=self.llm_node_tiers,
+            tier_fallback=self.llm_tier_fallback,
+            max_concurrent_calls=self.llm_max_concurrent_calls,
+        )
+
+    @property
+    def output_length(self) -> OutputLengthConfig:
+        return OutputLengthConfig(
+            adaptive=self.llm_adaptive_max_tokens,
+            node_max_tokens=self.llm_node_max_tokens,
+            max_tokens=self.llm_max_tokens,
+            percentile=self.llm_max_tokens_percentile,
+            headroom=self.llm_max_tokens_headroom,
+            min_samples=self.llm_max_tokens_min_samples,
+            window=self.llm_max_tokens_window,
+            truncation_retries=self.llm_truncation_retries,
+        )
+
+    @property
+    def llm_http(self) -> LLMHttpConfig:
+        return LLMHttpConfig(
+            max_connections=self.llm_http_max_connections,
+            max_keepalive_connections=self.llm_http_max_keepalive_connections,
+            keepalive_expiry=self.llm_http_keepalive_expiry,
+            http2=self.llm_http2,
+            connect_timeout=self.llm_http_connect_timeout,
+            read_timeout=self.llm_http_read_timeout,
+            write_timeout=self.llm_http_write_timeout,
+            pool_timeout=self.llm_http_pool_timeout,
+        )
+
+    @property
+    def token_budget(self) -> TokenBudgetConfig:
+        return TokenBudgetConfig(
+            run_token_budget=self.run_token_budget,
+            user_token_budget=self.user_token_budget,
+            user_budget_window_seconds=self.user_budget_window_seconds,
+        )
+
+    @property
+    def speculation(self) -> SpeculationConfig:
+        return SpeculationConfig(
+            enabled=self.speculative_retrieval_enabled,
+            match_threshold=self.speculative_retrieval_match_threshold,
+        )
+
+    @property
+    def query_consolidation(self) -> QueryConsolidationConfig:
+        return QueryConsolidationConfig(
+            enabled=self.query_consolidation_enabled,
+            similarity_threshold=self.query_consolidation_threshold,
+        )
+
+    @property
+    def artifacts(self) -> ArtifactConfig:
+        return ArtifactConfig(
+            enabled=self.artifact_store_enabled,
+            min_chars=self.artifact_min_chars,
+            memory_max_bytes=self.artifact_memory_max_bytes,
+            spill_backend=self.artifact_spill_backend or ("database" if self.app_mode == "worker" else "disk"),
+            spill_directory=self.artifact_spill_dir or os.path.join(tempfile.gettempdir(), "research-agent-artifacts"),
+            retention_seconds=self.artifact_retention_seconds,
+            sweep_interval_seconds=self.artifact_sweep_interval_seconds,
+        )
+
+    @property
+    def deadline(self) -> DeadlineConfig:
+        return DeadlineConfig(
+            default_seconds=self.run_deadline_seconds,
+            degrade_below_seconds=self.deadline_degrade_below_seconds,
+            skip_comparison_below_seconds=self.deadline_skip_comparison_below_seconds,
+            degraded_max_docs=self.deadline_degraded_max_docs,
+        )
+
+    @property
+    def admission(self) -> AdmissionConfig:
+        return AdmissionConfig(
+            enabled=self.admission_enabled,
+            max_concurrent_runs=self.admission_max_concurrent_runs,
+            batch_max_running=self.admission_batch_max_running,
+            queue_depth={
+                AdmissionConstants.INTERACTIVE: self.admission_interactive_queue_depth,
+                AdmissionConstants.BATCH: self.admission_batch_queue_depth,
+            },
+            max_wait_seconds={
+                AdmissionConstants.INTERACTIVE: self.admission_interactive_max_wait_seconds,
+                AdmissionConstants.BATCH: self.admission_batch_max_wait_seconds,
+            },
+            user_weights=self.admission_user_weights,
+            initial_run_seconds=self.admission_initial_run_seconds,
         )
 
     @property
@@ -88,7 +492,56 @@ class Configuration(BaseSettings):
         return SupabaseDBConfig(
             connection_string=self.supabase_connection_string,
             db_schema=self.supabase_schema,
+            connection_mode=self.db_connection_mode,
+            pool_size=self.db_pool_size,
+            max_overflow=self.db_max_overflow,
+            pool_timeout=self.db_pool_timeout,
+            pool_recycle=self.db_pool_recycle,
+            statement_cache_size=self.db_statement_cache_size,
+            slow_checkout_seconds=self.db_slow_checkout_seconds,
+        )
+
+    @property
+    def image(self) -> ImageConfig:
+        return ImageConfig(
+            max_dimension=self.image_max_dimension,
+            jpeg_quality=self.image_jpeg_quality,
+            max_upload_bytes=self.image_max_upload_bytes,
+            cache_size=self.image_cache_size,
+        )
+
+    @property
+    def batch(self) -> BatchConfig:
+        return BatchConfig(
+            max_concurrency=self.batch_max_concurrency,
+            dedupe_cache_size=self.batch_dedupe_cache_size,
+        )
+
+    @property
+    def job_queue(self) -> JobQueueConfig:
+        return JobQueueConfig(
+            worker_concurrency=self.job_worker_concurrency,
+            lease_seconds=self.job_lease_seconds,
+            heartbeat_seconds=self.job_heartbeat_seconds,
+            poll_seconds=self.job_poll_seconds,
+            max_attempts=self.job_max_attempts,
+            retry_backoff_seconds=self.job_retry_backoff_seconds,
+            # Transaction pooling hands every statement a different server connection, so LISTEN never fires
+            listen=self.db_connection_mode == "direct",
+        )
+
+    @property
+    def persistence(self) -> PersistenceConfig:
+        return PersistenceConfig(
+            enabled=self.persistence_enabled,
+            queue_size=self.persistence_queue_size,
+            batch_size=self.persistence_batch_size,
+            flush_interval_seconds=self.persistence_flush_interval_seconds,
         )
 
 
-configuration = Configuration()
+@lru_cache()
+def get_configuration() -> Configuration:
+    """ Builds the configuration on first use, so importing this module never touches the filesystem """
+    env_file = _find_env_file(Path(__file__).resolve())
+    return Configuration(_env_file=str(env_file) if env_file else None)
@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, LargeBinary
+from sqlmodel import Field, SQLModel
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ResearchArtifact(SQLModel, table=True):
+    __tablename__ = "research_artifacts"
+
+    # SHA-256 of the artifact's canonical JSON, identical artifacts of different runs share a row
+    digest: str = Field(primary_key=True, max_length=64)
+    # zlib compressed canonical JSON
+    data: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    size: int
+    created_at: datetime = Field(default_factory=_utc_now, sa_column=Column(DateTime(timezone=True), nullable=False))
+    # Refreshed whenever a stored run or session references the artifact, retention counts from it
+    referenced_at: datetime = Field(default_factory=_utc_now,
+                                    sa_column=Column(DateTime(timezone=True), nullable=False, index=True))
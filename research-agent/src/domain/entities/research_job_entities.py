@@ -0,0 +1,34 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Column, DateTime, Index
+from sqlmodel import Field, SQLModel
+
+from domain.entities.research_run_entities import JsonColumnType
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ResearchJob(SQLModel, table=True):
+    __tablename__ = "research_jobs"
+    __table_args__ = (
+        # Serves the claim query: queued jobs that are due, and running jobs whose lease expired
+        Index("ix_research_jobs_claim", "status", "available_at", "created_at"),
+    )
+
+    id: uuid.UUID = Field(primary_key=True)
+    user_name: Optional[str] = None
+    query: str
+    session_id: Optional[str] = None
+    status: str
+    attempts: int = 0
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True)))
+    available_at: datetime = Field(default_factory=_utc_now, sa_column=Column(DateTime(timezone=True), nullable=False))
+    result: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JsonColumnType))
+    error: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JsonColumnType))
+    created_at: datetime = Field(default_factory=_utc_now, sa_column=Column(DateTime(timezone=True), nullable=False))
+    updated_at: datetime = Field(default_factory=_utc_now, sa_column=Column(DateTime(timezone=True), nullable=False))
@@ -0,0 +1,66 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import JSON, Column, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+JsonColumnType = JSON().with_variant(JSONB(), "postgresql")
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ResearchRun(SQLModel, table=True):
+    __tablename__ = "research_runs"
+    __table_args__ = (
+        Index("ix_research_runs_user_created", "user_name", "created_at", "id"),
+        Index("ix_research_runs_created", "created_at", "id"),
+    )
+
+    id: uuid.UUID = Field(primary_key=True)
+    user_name: Optional[str] = None
+    query: str
+    status: str
+    complexity: Optional[str] = None
+    response: Optional[str] = None
+    recommended_approach: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JsonColumnType))
+    reasoning: Optional[str] = None
+    final_plan: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JsonColumnType))
+    error_code: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    # The run a re-execution started from
+    rerun_of: Optional[uuid.UUID] = Field(default=None, index=True)
+    created_at: datetime = Field(default_factory=_utc_now, sa_column=Column(DateTime(timezone=True), nullable=False))
+
+
+class ResearchNodeOutput(SQLModel, table=True):
+    __tablename__ = "research_node_outputs"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    run_id: uuid.UUID = Field(foreign_key="research_runs.id", index=True)
+    node: str
+    output: Dict[str, Any] = Field(sa_column=Column(JsonColumnType, nullable=False))
+
+
+class ResearchCitation(SQLModel, table=True):
+    __tablename__ = "research_citations"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    run_id: uuid.UUID = Field(foreign_key="research_runs.id", index=True)
+    url: str
+
+
+class ResearchTokenUsage(SQLModel, table=True):
+    __tablename__ = "research_token_usage"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    run_id: uuid.UUID = Field(foreign_key="research_runs.id", index=True)
+    node: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
@@ -0,0 +1,24 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Column, DateTime
+from sqlmodel import Field, SQLModel
+
+from domain.entities.research_run_entities import JsonColumnType
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ResearchSession(SQLModel, table=True):
+    __tablename__ = "research_sessions"
+
+    id: uuid.UUID = Field(primary_key=True)
+    user_name: Optional[str] = Field(default=None, index=True)
+    summary: Optional[str] = None
+    messages: List[Dict[str, Any]] = Field(default_factory=list, sa_column=Column(JsonColumnType, nullable=False))
+    context: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JsonColumnType, nullable=False))
+    turns: int = 0
+    updated_at: datetime = Field(default_factory=_utc_now, sa_column=Column(DateTime(timezone=True), nullable=False))
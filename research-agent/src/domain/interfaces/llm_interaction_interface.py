@@ -1,5 +1,5 @@
 from abc import abstractmethod, ABC
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, List
 
 
 class LlmInteractionInterface(ABC):
@@ -10,9 +10,14 @@ class LlmInteractionInterface(ABC):
                             user_prompt: str,
                             model: Optional[str] = None,
                             message_type: str = "text",
-                            media_base64: Optional[str] = None, ) -> Dict:
+                            media_base64: Optional[str] = None,
+                            config: Optional[Dict[str, Any]] = None, ) -> Dict:
         pass
 
     @abstractmethod
     async def get_embedding(self, text: str):
         pass
+
+    @abstractmethod
+    async def get_embeddings(self, texts: List[str]):
+        pass
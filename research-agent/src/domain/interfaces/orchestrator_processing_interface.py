@@ -1,10 +1,28 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, TYPE_CHECKING
+
+from config.constants import AdmissionConstants
 
-from domain.states.orchestrator_state import ResearchState
+if TYPE_CHECKING:
+    from domain.states.orchestrator_state import ResearchState
 
 
 class OrchestratorProcessingInterface(ABC):
 
     @abstractmethod
-    async def process_user_query(self, user_name: str, query: str) -> ResearchState:
-        pass
\ No newline at end of file
+    def ensure_can_start(self, user_name: str, lane: str = AdmissionConstants.INTERACTIVE):
+        pass
+
+    @abstractmethod
+    async def process_user_query(self, user_name: str, query: str,
+                                 idempotency_key: Optional[str] = None,
+                                 session_id: Optional[str] = None,
+                                 lane: str = AdmissionConstants.INTERACTIVE,
+                                 deadline_seconds: Optional[float] = None) -> ResearchState:
+        pass
+
+    @abstractmethod
+    async def rerun(self, run_id: str, user_name: str, edits: Dict[str, Any]) -> ResearchState:
+        pass
@@ -1,29 +1,47 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 
 class ToolsInterface(ABC):
 
     @abstractmethod
-    async def decompose_tasks(self, user_query: str):
+    async def quick_answer(self, user_query: str, llm_config: Optional[Dict[str, Any]] = None,
+                           conversation_context: str = ""):
         pass
 
     @abstractmethod
-    async def research_planner(self, sub_task_list: List[str]):
+    async def decompose_tasks(self, user_query: str, llm_config: Optional[Dict[str, Any]] = None,
+                              conversation_context: str = ""):
         pass
 
     @abstractmethod
-    async def research_executor(self, research_topics: List[str]):
+    async def research_planner(self, sub_task_list: List[str], llm_config: Optional[Dict[str, Any]] = None,
+                               previous_queries: Optional[List[str]] = None):
         pass
 
     @abstractmethod
-    async def approach_comparator(self, research_topics: List[str], relevant_docs: List[Dict[str, Any]]):
+    async def research_executor(self, research_topics: List[str], timeout: Optional[float] = None):
         pass
 
     @abstractmethod
-    async def solution_synthesizer(self, approaches: List[Dict[str, Any]]):
+    async def approach_comparator(self, research_topics: List[str], relevant_docs: List[Dict[str, Any]],
+                                  llm_config: Optional[Dict[str, Any]] = None):
         pass
 
     @abstractmethod
-    async def structured_plan_generator(self, selected_approach: Dict[str, Any]):
+    async def solution_synthesizer(self, approaches: List[Dict[str, Any]], llm_config: Optional[Dict[str, Any]] = None):
+        pass
+
+    @abstractmethod
+    async def structured_plan_generator(self, selected_approach: Dict[str, Any],
+                                        llm_config: Optional[Dict[str, Any]] = None):
+        pass
+
+    @abstractmethod
+    async def summarize_conversation(self, summary: str, messages: List[Dict[str, Any]],
+                                     llm_config: Optional[Dict[str, Any]] = None):
+        pass
+
+    @abstractmethod
+    async def describe_image(self, image_base64: str, llm_config: Optional[Dict[str, Any]] = None):
         pass
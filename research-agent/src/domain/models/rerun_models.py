@@ -0,0 +1,19 @@
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class RerunRequest(BaseModel):
+    """ Edits to the intermediate state of a stored run, only the fields that are set count as edits """
+    user_name: str
+
+    subtasks: Optional[List[str]] = None
+    research_queries: Optional[List[str]] = None
+    no_research_subtasks: Optional[List[str]] = None
+    relevant_docs: Optional[List[Dict[str, Any]]] = None
+    approaches: Optional[List[Dict[str, Any]]] = None
+    recommended_approach: Optional[Dict[str, Any]] = None
+    reasoning: Optional[str] = None
+
+    def edits(self) -> Dict[str, Any]:
+        return self.model_dump(exclude_unset=True, exclude={"user_name"})
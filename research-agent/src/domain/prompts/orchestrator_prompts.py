@@ -6,6 +6,13 @@ class OrchestratorPrompts:
         """
         You are a senior software architect.
         Break the following provided engineering task down into clear technical subtasks 
+        When the task follows up on an earlier conversation, keep the earlier subtasks that still apply
+        word for word and only add or change what the follow-up needs
+        
+        CONVERSATION CONTEXT
+        ---
+        
+        $conversation_context
         
         TASK
         ---
@@ -35,23 +42,63 @@ class OrchestratorPrompts:
     RESEARCH_PLANNER_USER_PROMPT = Template(
         """
         Given a list of subtasks, generate research queries that will help design the system.
+        Subtasks that are well established and can be answered without looking anything up
+        must not get a research query, list them under "no_research_subtasks" instead.
+        Reuse the previously researched queries word for word wherever they still cover a subtask.
         
         SUBTASKS
         ---
         
         "$sub_task_list"
         
+        PREVIOUSLY RESEARCHED QUERIES
+        ---
+        
+        $previous_queries
+        
         OUTPUT FORMAT:
         ---
         
-        [
-            "Collaborative filtering vs content-based filtering",
-            "Deep learning recommenders e-commerce",
-            "Cold start problem solutions",
-            "Scalable recommendation architectures"
-        ]
+        {
+            "research_queries": [
+                "Collaborative filtering vs content-based filtering",
+                "Deep learning recommenders e-commerce",
+                "Cold start problem solutions",
+                "Scalable recommendation architectures"
+            ],
+            "no_research_subtasks": [
+                "Select evaluation metrics"
+            ]
+        }
+        
+        Return ONLY a JSON object as per the given example format
+        
+        """
+    )
+
+    QUICK_ANSWER_PROMPT = Template(
+        """
+        You are a senior software engineer.
+        Answer the following technical question accurately and concisely.
+        
+        CONVERSATION CONTEXT
+        ---
+        
+        $conversation_context
         
-        Return ONLY a JSON array of strings containing research queries
+        QUESTION
+        ---
+        
+        "$user_query"
+        
+        OUTPUT FORMAT
+        ---
+        
+        {
+            "answer": "..."
+        }
+        
+        Return ONLY a JSON object
         
         """
     )
@@ -131,4 +178,50 @@ class OrchestratorPrompts:
         - timeline
         
         """
-    )
\ No newline at end of file
+    )
+
+    CONVERSATION_SUMMARY_PROMPT = Template(
+        """
+        Update the running summary of a technical research conversation with the messages below.
+        Keep the decisions, constraints, chosen approaches and open questions, drop pleasantries.
+        
+        CURRENT SUMMARY
+        ---
+        
+        $summary
+        
+        NEW MESSAGES
+        ---
+        
+        $messages
+        
+        OUTPUT FORMAT
+        ---
+        
+        {
+            "summary": "..."
+        }
+        
+        Return ONLY a JSON object
+        
+        """
+    )
+
+    IMAGE_DESCRIPTION_PROMPT = Template(
+        """
+        Describe the attached technical image so it can be researched without seeing it.
+        It may be an architecture diagram, a screenshot, a chart or a photo of a whiteboard.
+        List the components, their connections and data flows, every readable label and piece of text,
+        and any error messages, metrics or versions shown.
+        
+        OUTPUT FORMAT
+        ---
+        
+        {
+            "description": "..."
+        }
+        
+        Return ONLY a JSON object
+        
+        """
+    )
@@ -0,0 +1,52 @@
+import json
+from typing import Any, Dict, List
+
+from config.constants import MessageConstants
+
+
+def research_topics(state: Dict[str, Any]) -> List[str]:
+    """ Topics compared in a run: the research queries, or the subtasks when nothing needed research """
+    return list(state.get("research_queries") or state.get("subtasks") or [])
+
+
+def truncate_message(content: Any) -> str:
+    text = content if isinstance(content, str) else json.dumps(content, default=str)
+    if len(text) <= MessageConstants.CONTEXT_MESSAGE_MAX_CHARS:
+        return text
+    return text[:MessageConstants.CONTEXT_MESSAGE_MAX_CHARS] + "..."
+
+
+def message_to_record(message: Any) -> Dict[str, str]:
+    role = MessageConstants.HUMAN_ROLE if message.type == "human" else MessageConstants.AI_ROLE
+    return {"role": role, "content": str(message.content)}
+
+
+def records_to_messages(records: List[Dict[str, str]]) -> List[Any]:
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    return [HumanMessage(content=r["content"]) if r["role"] == MessageConstants.HUMAN_ROLE
+            else AIMessage(content=r["content"])
+            for r in records]
+
+
+def format_conversation_context(state: Dict[str, Any]) -> str:
+    """
+    Renders the rolling summary, the working memory window and the previous subtasks for a prompt.
+    Every part is bounded, so the prompt stays the same size however long the session gets.
+    """
+    lines = []
+
+    summary = state.get("conversation_summary")
+    if summary:
+        lines.append(f"Summary of earlier turns: {summary}")
+
+    history = (state.get("query") or [])[:-1][-MessageConstants.WORKING_MEMORY_MESSAGE_LIMIT:]
+    for message in history:
+        role = "User" if message.type == "human" else "Assistant"
+        lines.append(f"{role}: {truncate_message(message.content)}")
+
+    previous_subtasks = (state.get("session_context") or {}).get("subtasks")
+    if previous_subtasks:
+        lines.append(f"Subtasks of the previous turn: {json.dumps(previous_subtasks)}")
+
+    return "\n".join(lines)
@@ -1,20 +1,43 @@
-from typing import TypedDict, List, Annotated, Optional, Any, Dict
+import operator
+from typing import TypedDict, List, Annotated, Optional, Any, Dict, Union
 
 from langchain_core.messages import AnyMessage
 from langgraph.graph import add_messages
 
+from domain.states.token_usage import TokenUsage, merge_token_usage
+
 
 class ResearchState(TypedDict):
+    run_id: Optional[str]
+    session_id: Optional[str]
+    conversation_summary: Optional[str]
+    # Outputs of the previous turn of the session, reused by follow-ups instead of recomputed
+    session_context: Optional[Dict[str, Any]]
+    # Node a partial re-execution starts from, None for a full run
+    resume_from: Optional[str]
     query: Annotated[List[AnyMessage], add_messages]
     response: Optional[str]
-    tokens_used: Optional[List[str]]
+    tokens_used: Annotated[Dict[str, TokenUsage], merge_token_usage]
+    token_budget: Optional[int]
+    # Wall clock time, in epoch seconds, the run has to answer by, None when it has no deadline
+    deadline: Optional[float]
+    # "<node>:<kind>" for every shortcut a node took to make the deadline
+    degraded: Annotated[List[str], operator.add]
     user_name: Optional[str]
+    complexity: Optional[str]
 
     subtasks: Optional[List[str]]
     research_queries: Optional[List[str]]
-    relevant_docs: Optional[List[Dict[str, Any]]]
+    no_research_subtasks: Optional[List[str]]
+    # Representative research query -> the near-duplicate planner queries merged into it
+    query_clusters: Optional[Dict[str, List[str]]]
+    # How much retrieval started ahead of the planner was reused or wasted
+    speculation: Optional[Dict[str, Any]]
+    # Large values of these two are artifact store references, read them through ArtifactStore.load
+    relevant_docs: Optional[Union[List[Dict[str, Any]], Dict[str, Any]]]
     citations: Optional[List[str]]
-    approaches: Optional[List[Dict[str, Any]]]
+    topic_approaches: Annotated[List[Dict[str, Any]], operator.add]
+    approaches: Optional[Union[List[Dict[str, Any]], Dict[str, Any]]]
     recommended_approach: Optional[Dict[str, Any]]
     reasoning: Optional[str]
     final_plan: Optional[Dict[str, Any]]
@@ -27,3 +50,14 @@ class ResearchState(TypedDict):
     error_context: Optional[str]
     user_friendly_error: Optional[str]
 
+
+class TopicComparisonState(TypedDict):
+    """ Payload sent to one parallel approach comparison, see OrchestratorNodes.fan_out_comparisons """
+    topic: str
+    # The run's documents, or the artifact store reference to them
+    relevant_docs: Union[List[Dict[str, Any]], Dict[str, Any]]
+    token_budget: Optional[int]
+    deadline: Optional[float]
+    tokens_used: Dict[str, TokenUsage]
+    user_name: Optional[str]
+
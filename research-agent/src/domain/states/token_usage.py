@@ -0,0 +1,27 @@
+from typing import Dict, Optional
+
+
+TokenUsage = Dict[str, int]
+
+
+def merge_token_usage(left: Optional[Dict[str, TokenUsage]],
+                      right: Optional[Dict[str, TokenUsage]]) -> Dict[str, TokenUsage]:
+    """ Accumulates prompt/completion/total tokens per node across graph steps """
+    merged = {node: dict(usage) for node, usage in (left or {}).items()}
+
+    for node, usage in (right or {}).items():
+        node_usage = merged.setdefault(node, {})
+        for key, value in usage.items():
+            node_usage[key] = node_usage.get(key, 0) + (value or 0)
+
+    return merged
+
+
+def summarize_token_usage(tokens_used: Optional[Dict[str, TokenUsage]]) -> TokenUsage:
+    summary = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+
+    for usage in (tokens_used or {}).values():
+        for key in summary:
+            summary[key] += usage.get(key, 0)
+
+    return summary
@@ -8,6 +8,13 @@ class AppErrorCodes:
 
     VALIDATION_ERROR = (422, "A validation error has occurred due to Pydantic failure")
     INTERNAL_SERVER_ERROR = (500, "An unknown error has occurred within the process")
+    TOKEN_BUDGET_EXCEEDED = (429, "The token budget for this request has been exhausted")
+    SESSION_NOT_FOUND = (404, "The research session does not exist")
+    RUN_NOT_FOUND = (404, "The research run does not exist")
+    JOB_NOT_FOUND = (404, "The research job does not exist")
+    SERVER_BUSY = (429, "The server is at capacity, retry after the indicated delay")
+    INVALID_IMAGE = (422, "The uploaded file is not a supported image")
+    IMAGE_TOO_LARGE = (413, "The uploaded image exceeds the size limit")
 
 
 class AppException(Exception):
@@ -39,4 +46,98 @@ class InternalServerError(AppException):
                 "status_code": AppErrorCodes.INTERNAL_SERVER_ERROR[0],
                 "error": str(err)
             },
-        )
\ No newline at end of file
+        )
+
+
+class TokenBudgetExceededException(AppException):
+
+    @classmethod
+    def from_budget(cls, scope: str, budget: int, required: int, tokens_used: dict = None):
+        return cls(
+            message=AppErrorCodes.TOKEN_BUDGET_EXCEEDED[1],
+            details={
+                "status_code": AppErrorCodes.TOKEN_BUDGET_EXCEEDED[0],
+                "scope": scope,
+                "budget": budget,
+                "required": required,
+                "tokens_used": tokens_used or {},
+            },
+        )
+
+
+class SessionNotFoundException(AppException):
+
+    @classmethod
+    def from_session_id(cls, session_id: str):
+        return cls(
+            message=AppErrorCodes.SESSION_NOT_FOUND[1],
+            details={
+                "status_code": AppErrorCodes.SESSION_NOT_FOUND[0],
+                "session_id": session_id,
+            },
+        )
+
+
+class RunNotFoundException(AppException):
+
+    @classmethod
+    def from_run_id(cls, run_id: str):
+        return cls(
+            message=AppErrorCodes.RUN_NOT_FOUND[1],
+            details={
+                "status_code": AppErrorCodes.RUN_NOT_FOUND[0],
+                "run_id": run_id,
+            },
+        )
+
+
+class JobNotFoundException(AppException):
+
+    @classmethod
+    def from_job_id(cls, job_id: str):
+        return cls(
+            message=AppErrorCodes.JOB_NOT_FOUND[1],
+            details={
+                "status_code": AppErrorCodes.JOB_NOT_FOUND[0],
+                "job_id": job_id,
+            },
+        )
+
+
+class AdmissionRejectedException(AppException):
+
+    @classmethod
+    def from_queue(cls, lane: str, queue_depth: int, estimated_wait_seconds: float, retry_after_seconds: int):
+        return cls(
+            message=AppErrorCodes.SERVER_BUSY[1],
+            details={
+                "status_code": AppErrorCodes.SERVER_BUSY[0],
+                "lane": lane,
+                "queue_depth": queue_depth,
+                "estimated_wait_seconds": round(estimated_wait_seconds, 1),
+                "retry_after_seconds": retry_after_seconds,
+            },
+        )
+
+
+class InvalidImageException(AppException):
+
+    @classmethod
+    def from_error(cls, err: Exception):
+        return cls(
+            message=AppErrorCodes.INVALID_IMAGE[1],
+            details={
+                "status_code": AppErrorCodes.INVALID_IMAGE[0],
+                "error": str(err),
+            },
+        )
+
+    @classmethod
+    def too_large(cls, limit_bytes: int):
+        return cls(
+            message=AppErrorCodes.IMAGE_TOO_LARGE[1],
+            details={
+                "status_code": AppErrorCodes.IMAGE_TOO_LARGE[0],
+                "limit_bytes": limit_bytes,
+            },
+        )
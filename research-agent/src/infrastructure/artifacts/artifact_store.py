@@ -0,0 +1,231 @@
+import hashlib
+import json
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Set, Tuple
+
+from loguru import logger
+
+from config.settings import ArtifactConfig, get_configuration
+from infrastructure.artifacts.backends import ArtifactBackend, DatabaseArtifactBackend, DiskArtifactBackend
+from infrastructure.concurrency.cpu_offload import CpuOffload, payload_size
+from infrastructure.metrics.worker_metrics import WorkerMetrics
+
+# Key marking a state value as a reference, {"$artifact": <digest>, "bytes": <size>}
+ARTIFACT_KEY = "$artifact"
+
+
+class ArtifactNotFoundError(LookupError):
+    pass
+
+
+def is_artifact_ref(value: Any) -> bool:
+    return isinstance(value, dict) and ARTIFACT_KEY in value
+
+
+def _digest(value: Any) -> Tuple[str, int]:
+    data = _canonical(value)
+    return hashlib.sha256(data).hexdigest(), len(data)
+
+
+def _compress(value: Any) -> bytes:
+    return zlib.compress(_canonical(value))
+
+
+def _decompress(data: bytes) -> Any:
+    return json.loads(zlib.decompress(data))
+
+
+def _canonical(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for the large intermediate outputs of research runs.
+
+    Values of at least ARTIFACT_MIN_CHARS are stored once, by the SHA-256 of their canonical JSON, and the graph
+    state carries a compact reference instead. Nodes resolve a reference only when they read the value.
+    Stored values are shared between readers and must not be mutated.
+
+    Artifacts live in memory, least recently used first out. Past ARTIFACT_MEMORY_MAX_BYTES they spill to disk or
+    the database, and they are also written there once a stored run or session references them. Written
+    artifacts no stored run or session referenced within ARTIFACT_RETENTION_SECONDS are swept away.
+    Created on first use and reset by the API lifespan.
+    """
+
+    _config: Optional[ArtifactConfig] = None
+    _backend: Optional[ArtifactBackend] = None
+    # digest -> (value, size of its canonical JSON)
+    _memory: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+    _memory_bytes = 0
+    # Evicted artifacts still being written out, readable until the write finishes
+    _spilling: Dict[str, Any] = {}
+    _durable: Set[str] = set()
+
+    @classmethod
+    async def store(cls, value: Any) -> Any:
+        """ A reference to the stored value, or the value itself when it is small """
+        config = cls._get_config()
+        size = payload_size(value)
+        if not config.enabled or value is None or is_artifact_ref(value) or size < config.min_chars:
+            return value
+
+        digest, encoded_size = await CpuOffload.run("artifact_digest", _digest, value, size=size)
+        if digest in cls._memory:
+            cls._memory.move_to_end(digest)
+        elif digest not in cls._spilling:
+            cls._remember(digest, value, encoded_size)
+            WorkerMetrics.increment("artifacts_stored")
+            await cls._evict()
+
+        return {ARTIFACT_KEY: digest, "bytes": encoded_size}
+
+    @classmethod
+    async def load(cls, value: Any) -> Any:
+        """ The value a reference points to, any other value as it is """
+        if not is_artifact_ref(value):
+            return value
+
+        digest = value[ARTIFACT_KEY]
+        entry = cls._memory.get(digest)
+        if entry is not None:
+            cls._memory.move_to_end(digest)
+            return entry[0]
+        if digest in cls._spilling:
+            return cls._spilling[digest]
+
+        data = await cls._get_backend().get(digest)
+        if data is None:
+            raise ArtifactNotFoundError(f"Artifact {digest} is not stored")
+
+        loaded = await CpuOffload.run("artifact_decompress", _decompress, data, size=len(data))
+        WorkerMetrics.increment("artifacts_loaded")
+        cls._durable.add(digest)
+        if digest not in cls._memory:
+            cls._remember(digest, loaded, value.get("bytes") or len(data))
+            await cls._evict()
+        return loaded
+
+    @classmethod
+    async def resolve_all(cls, value: Any) -> Any:
+        """ A copy of value with every reference inside replaced by its value, missing ones left as references """
+        if is_artifact_ref(value):
+            try:
+                return await cls.load(value)
+            except ArtifactNotFoundError as e:
+                logger.warning(str(e))
+                return value
+        if isinstance(value, dict):
+            return {key: await cls.resolve_all(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [await cls.resolve_all(item) for item in value]
+        return value
+
+    @classmethod
+    async def persist(cls, value: Any):
+        """ Writes out every artifact referenced inside value, before a stored record starts pointing at it """
+        for digest in cls._references(value):
+            # Refreshed, so an artifact is kept for as long as stored records go on referencing it
+            if digest in cls._durable and await cls._get_backend().touch(digest):
+                continue
+            cls._durable.discard(digest)
+
+            entry = cls._memory.get(digest)
+            if entry is None and digest not in cls._spilling:
+                logger.warning(f"Artifact {digest} is referenced but was never stored on this node")
+                continue
+
+            artifact, size = entry if entry is not None else (cls._spilling[digest], 0)
+            await cls._write(digest, artifact, size)
+
+    @classmethod
+    async def sweep(cls) -> int:
+        """ Deletes the written artifacts no stored run or session referenced within the retention """
+        config = cls._get_config()
+        if config.retention_seconds is None:
+            return 0
+
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=config.retention_seconds)
+        deleted = await cls._get_backend().delete_unreferenced_since(cutoff)
+        # What this node still holds in memory is written out again instead of assumed stored
+        cls._durable.clear()
+        WorkerMetrics.increment("artifacts_expired", deleted)
+        return deleted
+
+    @classmethod
+    def close(cls):
+        cls._memory.clear()
+        cls._memory_bytes = 0
+        cls._spilling.clear()
+        cls._durable.clear()
+        cls._backend = None
+
+    # ------------------------------------------------------------------
+    # Internal Methods
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _get_config(cls) -> ArtifactConfig:
+        if cls._config is None:
+            cls._config = get_configuration().artifacts
+        return cls._config
+
+    @classmethod
+    def _get_backend(cls) -> ArtifactBackend:
+        if cls._backend is None:
+            config = cls._get_config()
+            if config.spill_backend == "database":
+                from infrastructure.database.database_engine import DatabaseEngine
+                from infrastructure.database.repositories.research_artifact_repository import ResearchArtifactRepository
+
+                cls._backend = DatabaseArtifactBackend(ResearchArtifactRepository(DatabaseEngine.get_engine()))
+            else:
+                cls._backend = DiskArtifactBackend(config.spill_directory)
+        return cls._backend
+
+    @classmethod
+    def _remember(cls, digest: str, value: Any, size: int):
+        cls._memory[digest] = (value, size)
+        cls._memory_bytes += size
+
+    @classmethod
+    async def _evict(cls):
+        config = cls._get_config()
+        # The newest artifact stays, even when it alone is over the limit
+        while cls._memory_bytes > config.memory_max_bytes and len(cls._memory) > 1:
+            digest, (value, size) = cls._memory.popitem(last=False)
+            cls._memory_bytes -= size
+            if digest in cls._durable:
+                continue
+
+            cls._spilling[digest] = value
+            try:
+                await cls._write(digest, value, size)
+                WorkerMetrics.increment("artifacts_spilled")
+            except Exception:
+                logger.exception(f"Could not spill artifact {digest}, keeping it in memory")
+                cls._memory[digest] = (value, size)
+                cls._memory.move_to_end(digest, last=False)
+                cls._memory_bytes += size
+                return
+            finally:
+                cls._spilling.pop(digest, None)
+
+    @classmethod
+    async def _write(cls, digest: str, value: Any, size: int):
+        data = await CpuOffload.run("artifact_compress", _compress, value, size=size)
+        await cls._get_backend().put(digest, data, size)
+        cls._durable.add(digest)
+
+    @staticmethod
+    def _references(value: Any):
+        if is_artifact_ref(value):
+            yield value[ARTIFACT_KEY]
+        elif isinstance(value, dict):
+            for item in value.values():
+                yield from ArtifactStore._references(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                yield from ArtifactStore._references(item)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from infrastructure.database.repositories.research_artifact_repository import ResearchArtifactRepository
+
+
+class ArtifactBackend(ABC):
+    """ Durable tier of the artifact store, holding compressed artifacts by digest """
+
+    @abstractmethod
+    async def get(self, digest: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    async def put(self, digest: str, data: bytes, size: int):
+        pass
+
+    @abstractmethod
+    async def touch(self, digest: str) -> bool:
+        """ Marks the artifact as referenced now, False when it is not stored (anymore) """
+        pass
+
+    @abstractmethod
+    async def delete_unreferenced_since(self, cutoff: datetime) -> int:
+        """ Deletes the artifacts last referenced before cutoff, returning how many were deleted """
+        pass
+
+
+class DiskArtifactBackend(ArtifactBackend):
+    """
+    One file per artifact under ARTIFACT_SPILL_DIR, its modification time being when it was last referenced.
+    Local to the node, so only for deployments where one node serves every run and session.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    async def get(self, digest: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, self._path(digest))
+
+    async def put(self, digest: str, data: bytes, size: int):
+        await asyncio.to_thread(self._write, self._path(digest), data)
+
+    async def touch(self, digest: str) -> bool:
+        return await asyncio.to_thread(self._touch, self._path(digest))
+
+    async def delete_unreferenced_since(self, cutoff: datetime) -> int:
+        return await asyncio.to_thread(self._delete_modified_before, cutoff.timestamp())
+
+    # ------------------------------------------------------------------
+    # Internal Methods
+    # ------------------------------------------------------------------
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}.json.z"
+
+    @staticmethod
+    def _read(path: Path) -> Optional[bytes]:
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _touch(path: Path) -> bool:
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _write(path: Path, data: bytes):
+        if DiskArtifactBackend._touch(path):
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Written aside and renamed, so a reader never sees a partial artifact
+        partial = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        partial.write_bytes(data)
+        os.replace(partial, path)
+
+    def _delete_modified_before(self, cutoff: float) -> int:
+        deleted = 0
+        # Partial files left behind by a crashed write age out the same way
+        for path in self.directory.glob("*/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    if path.name.endswith(".json.z"):
+                        deleted += 1
+            except FileNotFoundError:
+                continue
+        return deleted
+
+
+class DatabaseArtifactBackend(ArtifactBackend):
+    """ The research_artifacts table, shared by every API and worker node """
+
+    def __init__(self, repository: ResearchArtifactRepository):
+        self.repository = repository
+
+    async def get(self, digest: str) -> Optional[bytes]:
+        return await self.repository.get(digest)
+
+    async def put(self, digest: str, data: bytes, size: int):
+        await self.repository.put(digest, data, size)
+
+    async def touch(self, digest: str) -> bool:
+        return await self.repository.touch(digest)
+
+    async def delete_unreferenced_since(self, cutoff: datetime) -> int:
+        return await self.repository.delete_unreferenced_since(cutoff)
@@ -0,0 +1,113 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from loguru import logger
+
+from config.settings import OffloadConfig, get_configuration
+from infrastructure.concurrency.offload_tasks import timed
+from infrastructure.metrics.worker_metrics import WorkerMetrics
+
+T = TypeVar("T")
+
+THREAD = "thread"
+PROCESS = "process"
+
+
+def payload_size(value: Any) -> int:
+    """ Rough character count of a payload, far cheaper than serializing it """
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(payload_size(key) + payload_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sum(payload_size(item) for item in value)
+    return 8
+
+
+class CpuOffload:
+    """
+    Shared executors for CPU-bound work that would otherwise block the event loop.
+
+    Small payloads run inline, where handing them to a pool costs more than the work itself. Larger ones go to
+    a thread pool, which suits work that releases the GIL and keeps the loop responsive for the rest. Large
+    pure-Python work marked process=True goes to a process pool, so it also runs in parallel with the loop.
+    Process pool tasks must be picklable module-level functions, in modules free of application imports
+    (see offload_tasks and output_parsing), because every worker process imports them.
+
+    Each pool accepts at most OFFLOAD_MAX_PENDING tasks, further callers wait on the loop for a slot.
+    Cancelling the caller drops a task that has not started yet, a running one finishes and its result is discarded.
+    Created on first use and shut down by the API lifespan.
+    """
+
+    _config: Optional[OffloadConfig] = None
+    _executors: Dict[str, Executor] = {}
+    _slots: Dict[str, asyncio.Semaphore] = {}
+
+    @classmethod
+    async def run(cls, name: str, func: Callable[..., T], *args: Any, size: int = 0, process: bool = False) -> T:
+        config = cls._get_config()
+        if not config.enabled or size < config.inline_max_chars:
+            return func(*args)
+
+        pool = PROCESS if process and config.process_workers > 0 and size >= config.process_min_chars else THREAD
+        slots = cls._slots.setdefault(pool, asyncio.Semaphore(config.max_pending))
+
+        queued_at = time.perf_counter()
+        try:
+            async with slots:
+                result, run_seconds = await asyncio.wrap_future(cls._executor(pool).submit(timed, func, *args))
+        except asyncio.CancelledError:
+            WorkerMetrics.increment(f"offload_{pool}_cancelled")
+            raise
+        except BrokenProcessPool:
+            # A crashed worker breaks the whole pool, the next task gets a fresh one
+            logger.error(f"Process pool broke while running {name}, restarting it")
+            cls._shutdown(PROCESS)
+            raise
+
+        WorkerMetrics.increment(f"offload_{pool}_tasks")
+        WorkerMetrics.observe(f"offload_{name}_seconds", run_seconds)
+        WorkerMetrics.observe(f"offload_{name}_wait_seconds", time.perf_counter() - queued_at - run_seconds)
+        return result
+
+    @classmethod
+    def close(cls):
+        for pool in list(cls._executors):
+            cls._shutdown(pool)
+        cls._slots.clear()
+
+    # ------------------------------------------------------------------
+    # Internal Methods
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _get_config(cls) -> OffloadConfig:
+        if cls._config is None:
+            cls._config = get_configuration().offload
+        return cls._config
+
+    @classmethod
+    def _executor(cls, pool: str) -> Executor:
+        executor = cls._executors.get(pool)
+        if executor is None:
+            config = cls._get_config()
+            if pool == PROCESS:
+                workers = config.process_workers
+                executor = ProcessPoolExecutor(max_workers=workers,
+                                               mp_context=multiprocessing.get_context(config.process_start_method))
+            else:
+                workers = config.thread_workers
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cpu-offload")
+            logger.info(f"Started CPU offload {pool} pool with {workers} workers")
+            cls._executors[pool] = executor
+        return executor
+
+    @classmethod
+    def _shutdown(cls, pool: str):
+        executor = cls._executors.pop(pool, None)
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
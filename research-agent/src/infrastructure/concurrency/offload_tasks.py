@@ -0,0 +1,11 @@
+import time
+from typing import Any, Callable, Tuple, TypeVar
+
+# Process pool workers unpickle this module, it must stay free of application imports such as the configuration
+T = TypeVar("T")
+
+
+def timed(func: Callable[..., T], *args: Any) -> Tuple[T, float]:
+    # Runs in the pool, so the measured time excludes the wait for a free worker
+    started = time.perf_counter()
+    return func(*args), time.perf_counter() - started
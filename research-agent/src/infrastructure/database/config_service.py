@@ -1,5 +1,5 @@
 from config.constants import DbConstants
-from config.settings import configuration, SupabaseDBConfig
+from config.settings import SupabaseDBConfig, get_configuration
 
 
 class Singleton(type):
@@ -15,6 +15,7 @@ class ConfigService(metaclass=Singleton):
 
     @property
     def supabaseConfig(self) -> SupabaseDBConfig:
+        configuration = get_configuration()
         conn = (
             configuration.supabase.connection_string
             if configuration.supabase and configuration.supabase.connection_string
@@ -29,4 +30,4 @@ class ConfigService(metaclass=Singleton):
             if configuration.supabase and configuration.supabase.db_schema
             else DbConstants.SCHEMA
         )
-        return SupabaseDBConfig(connection_string=conn, db_schema=schema)
+        return configuration.supabase.model_copy(update={"connection_string": conn, "db_schema": schema})
@@ -5,6 +5,7 @@ from loguru import logger
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
 
 from infrastructure.database.config_service import ConfigService
+from infrastructure.database.pool_telemetry import InstrumentedAsyncQueuePool, attach_pool_telemetry
 
 
 def _normalize_async_url(url: str) -> str:
@@ -27,6 +28,7 @@ class DatabaseEngine:
         """Get or create the shared database engine"""
         if cls._engine is None:
             cls._engine = cls._create_engine()
+            attach_pool_telemetry(cls._engine)
             logger.info("Database engine created and initialized")
         return cls._engine
 
@@ -53,26 +55,50 @@ class DatabaseEngine:
         except Exception:
             logger.info("Creating async engine...")
 
+        InstrumentedAsyncQueuePool.slow_checkout_seconds = supabase_config.slow_checkout_seconds
+
         return create_async_engine(
             conn_url,
             echo=False,
             future=True,
 
-            pool_size=5,
-            max_overflow=15,
-            pool_timeout=30,
-            pool_recycle=1800,
+            poolclass=InstrumentedAsyncQueuePool,
+            pool_size=supabase_config.pool_size,
+            max_overflow=supabase_config.max_overflow,
+            pool_timeout=supabase_config.pool_timeout,
+            pool_recycle=supabase_config.pool_recycle,
             pool_pre_ping=True,
 
-            connect_args={
-                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
-                "statement_cache_size": 0,
-                "prepared_statement_cache_size": 0,
-                "command_timeout": 60,
-                "server_settings": {"application_name": "codeskin"},
-            }
+            connect_args=cls._connect_args(supabase_config.connection_mode, supabase_config.statement_cache_size)
         )
 
+    @staticmethod
+    def _connect_args(connection_mode: str, statement_cache_size: int) -> dict:
+        """
+        Pooler mode (pgbouncer transaction pooling) cannot reuse prepared statements across transactions,
+        so caches are off and every statement gets a unique name. Direct connections keep asyncpg's
+        statement cache, so repeated queries skip the parse round trip.
+        """
+        connect_args = {
+            "command_timeout": 60,
+            "server_settings": {"application_name": "codeskin"},
+        }
+
+        if connection_mode == "direct":
+            logger.info(f"Direct database connection, statement cache size {statement_cache_size}")
+            return {
+                **connect_args,
+                "statement_cache_size": statement_cache_size,
+                "prepared_statement_cache_size": statement_cache_size,
+            }
+
+        return {
+            **connect_args,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+        }
+
     @classmethod
     async def close_engine(cls):
         """Close the database engine and all connections"""
@@ -0,0 +1,47 @@
+import time
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from infrastructure.metrics.worker_metrics import WorkerMetrics
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """ Queue pool that times how long each checkout waits for a free connection """
+
+    slow_checkout_seconds: float = 0.5
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            WorkerMetrics.observe("db_checkout_wait_seconds", waited)
+            if self.overflow() > 0:
+                WorkerMetrics.increment("db_overflow_checkouts_total")
+            if waited > self.slow_checkout_seconds:
+                logger.warning(f"Waited {waited:.3f}s for a database connection ({self.status()})")
+
+
+def attach_pool_telemetry(engine: AsyncEngine):
+    """ Records checkouts and connection lifetimes of the engine's pool into WorkerMetrics """
+    pool = engine.sync_engine.pool
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        connection_record.info["created_at"] = time.monotonic()
+        WorkerMetrics.increment("db_connections_opened_total")
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        WorkerMetrics.increment("db_checkouts_total")
+
+    @event.listens_for(pool, "close")
+    def on_close(dbapi_connection, connection_record):
+        WorkerMetrics.increment("db_connections_closed_total")
+        created_at = connection_record.info.get("created_at")
+        if created_at is not None:
+            WorkerMetrics.observe("db_connection_lifetime_seconds", time.monotonic() - created_at)
@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+
+from domain.entities.research_artifact_entities import ResearchArtifact
+
+
+class ResearchArtifactRepository:
+    """
+    Content-addressed blobs spilled by the artifact store. A row's data is written once, only its referenced_at
+    moves, and rows no stored run or session referenced within the retention are deleted.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+
+    async def create_tables(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all, tables=[ResearchArtifact.__table__])
+
+    async def get(self, digest: str) -> Optional[bytes]:
+        artifacts = ResearchArtifact.__table__
+        async with self.engine.connect() as conn:
+            return (await conn.execute(select(artifacts.c.data).where(artifacts.c.digest == digest))).scalar()
+
+    async def put(self, digest: str, data: bytes, size: int):
+        insert = sqlite.insert if self.engine.dialect.name == "sqlite" else postgresql.insert
+        now = datetime.now(timezone.utc)
+        # The digest is the content, a row that exists already holds the same bytes and is only refreshed
+        statement = insert(ResearchArtifact.__table__).values(
+            digest=digest, data=data, size=size, created_at=now, referenced_at=now,
+        ).on_conflict_do_update(index_elements=["digest"], set_={"referenced_at": now})
+
+        async with self.engine.begin() as conn:
+            await conn.execute(statement)
+
+    async def touch(self, digest: str) -> bool:
+        """ Marks the artifact as referenced now, False when it is not stored (anymore) """
+        artifacts = ResearchArtifact.__table__
+        async with self.engine.begin() as conn:
+            result = await conn.execute(update(artifacts).where(artifacts.c.digest == digest)
+                                        .values(referenced_at=datetime.now(timezone.utc)))
+        return result.rowcount > 0
+
+    async def delete_unreferenced_since(self, cutoff: datetime) -> int:
+        artifacts = ResearchArtifact.__table__
+        async with self.engine.begin() as conn:
+            result = await conn.execute(delete(artifacts).where(artifacts.c.referenced_at < cutoff))
+        return result.rowcount
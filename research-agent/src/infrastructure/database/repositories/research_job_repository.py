@@ -0,0 +1,146 @@
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from loguru import logger
+from sqlalchemy import and_, insert, or_, select, text, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+
+from config.constants import DbConstants
+from domain.entities.research_job_entities import ResearchJob
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ResearchJobRepository:
+    """
+    Postgres-backed queue of research jobs.
+
+    Workers claim jobs with FOR UPDATE SKIP LOCKED, so concurrent claims never block on or double-claim a row.
+    A claim holds a lease the worker extends while the job runs. A job whose lease expires, because its worker
+    crashed or hung, becomes claimable again. Every write after the claim checks the lease owner, so a worker
+    that lost its lease cannot overwrite the outcome of the worker that took over.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+
+    async def create_tables(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all, tables=[ResearchJob.__table__])
+
+    async def enqueue(self, job: Dict[str, Any]):
+        """ Inserts a queued job and wakes idle workers once the insert commits """
+        async with self.engine.begin() as conn:
+            await conn.execute(insert(ResearchJob.__table__).values(**job))
+            if self.engine.dialect.name == "postgresql":
+                await conn.execute(text("SELECT pg_notify(:channel, :payload)"),
+                                   {"channel": DbConstants.JOB_NOTIFY_CHANNEL, "payload": str(job["id"])})
+
+    async def get(self, job_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        jobs = ResearchJob.__table__
+        async with self.engine.connect() as conn:
+            row = (await conn.execute(select(jobs).where(jobs.c.id == job_id))).first()
+        return dict(row._mapping) if row else None
+
+    async def claim(self, worker_id: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """ Leases the oldest due job, or a running one whose lease expired, to this worker """
+        jobs = ResearchJob.__table__
+        now = _utc_now()
+        claimable = (select(jobs.c.id)
+                     .where(or_(and_(jobs.c.status == DbConstants.JOB_QUEUED, jobs.c.available_at <= now),
+                                and_(jobs.c.status == DbConstants.JOB_RUNNING, jobs.c.lease_expires_at < now)))
+                     .order_by(jobs.c.available_at, jobs.c.created_at)
+                     .limit(1)
+                     .with_for_update(skip_locked=True)
+                     .scalar_subquery())
+        statement = (update(jobs)
+                     .where(jobs.c.id == claimable)
+                     .values(status=DbConstants.JOB_RUNNING,
+                             lease_owner=worker_id,
+                             lease_expires_at=now + timedelta(seconds=lease_seconds),
+                             attempts=jobs.c.attempts + 1,
+                             updated_at=now)
+                     .returning(*jobs.c))
+
+        async with self.engine.begin() as conn:
+            row = (await conn.execute(statement)).first()
+        return dict(row._mapping) if row else None
+
+    async def extend_lease(self, job_id: uuid.UUID, worker_id: str, lease_seconds: float) -> bool:
+        """ Returns False when the lease was lost to another worker """
+        now = _utc_now()
+        return await self._update_leased(job_id, worker_id,
+                                         lease_expires_at=now + timedelta(seconds=lease_seconds), updated_at=now)
+
+    async def complete(self, job_id: uuid.UUID, worker_id: str, result: Dict[str, Any]) -> bool:
+        return await self._update_leased(job_id, worker_id, status=DbConstants.JOB_COMPLETED, result=result,
+                                         error=None, lease_owner=None, lease_expires_at=None, updated_at=_utc_now())
+
+    async def fail(self, job_id: uuid.UUID, worker_id: str, error: Dict[str, Any],
+                   retry_at: Optional[datetime] = None) -> bool:
+        """ Requeues the job for retry_at, or fails it for good when no retry time is given """
+        values = {"status": DbConstants.JOB_QUEUED, "available_at": retry_at} if retry_at else \
+            {"status": DbConstants.JOB_FAILED}
+        return await self._update_leased(job_id, worker_id, error=error, lease_owner=None, lease_expires_at=None,
+                                         updated_at=_utc_now(), **values)
+
+    async def release(self, job_id: uuid.UUID, worker_id: str) -> bool:
+        """ Hands a job back without counting the attempt, for a worker that shuts down mid-run """
+        jobs = ResearchJob.__table__
+        now = _utc_now()
+        return await self._update_leased(job_id, worker_id, status=DbConstants.JOB_QUEUED, available_at=now,
+                                         attempts=jobs.c.attempts - 1, lease_owner=None, lease_expires_at=None,
+                                         updated_at=now)
+
+    @asynccontextmanager
+    async def listen(self, on_notify: Callable[[], None], enabled: bool = True) -> AsyncIterator[bool]:
+        """
+        Calls on_notify for every enqueued job while the block runs, holding one connection for LISTEN.
+        Yields False when notifications are unavailable and workers have to rely on polling alone.
+        Callers disable it behind a transaction pooler, which accepts LISTEN but never delivers the notifications.
+        """
+        if not enabled or self.engine.dialect.name != "postgresql":
+            yield False
+            return
+
+        def listener(connection, pid, channel, payload):
+            on_notify()
+
+        async with self.engine.connect() as conn:
+            driver_connection = (await conn.get_raw_connection()).driver_connection
+            try:
+                await driver_connection.add_listener(DbConstants.JOB_NOTIFY_CHANNEL, listener)
+            except Exception as e:
+                logger.warning(f"Could not LISTEN for research jobs, polling only: {e}")
+                yield False
+                return
+
+            try:
+                yield True
+            finally:
+                try:
+                    await driver_connection.remove_listener(DbConstants.JOB_NOTIFY_CHANNEL, listener)
+                except Exception:
+                    # The connection is gone already, and with it the subscription
+                    pass
+
+    # ------------------------------------------------------------------
+    # Internal Methods
+    # ------------------------------------------------------------------
+
+    async def _update_leased(self, job_id: uuid.UUID, worker_id: str, **values: Any) -> bool:
+        jobs = ResearchJob.__table__
+        statement = (update(jobs)
+                     .where(jobs.c.id == job_id,
+                            jobs.c.lease_owner == worker_id,
+                            jobs.c.status == DbConstants.JOB_RUNNING)
+                     .values(**values))
+
+        async with self.engine.begin() as conn:
+            result = await conn.execute(statement)
+        return result.rowcount == 1
@@ -0,0 +1,70 @@
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+
+from domain.entities.research_run_entities import (ResearchRun, ResearchNodeOutput, ResearchCitation,
+                                                   ResearchTokenUsage, )
+
+
+class ResearchRunRepository:
+    """
+    Persistence of finished research runs, their node outputs, citations and token usage.
+    """
+
+    TABLES = (ResearchRun, ResearchNodeOutput, ResearchCitation, ResearchTokenUsage)
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+
+    async def create_tables(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all, tables=[t.__table__ for t in self.TABLES])
+
+    async def bulk_insert(self, rows_by_table: Dict[type, List[Dict[str, Any]]]):
+        """ Inserts a batch of runs with their children in one transaction, one executemany per table """
+        async with self.engine.begin() as conn:
+            for table in self.TABLES:
+                rows = rows_by_table.get(table)
+                if rows:
+                    await conn.execute(insert(table.__table__), rows)
+
+    async def list_runs(self, user_name: Optional[str], limit: int,
+                        cursor: Optional[Tuple[datetime, uuid.UUID]] = None) -> List[Dict[str, Any]]:
+        """ Keyset paginated run history, newest first, served by the (user_name, created_at, id) index """
+        runs = ResearchRun.__table__
+        statement = select(runs.c.id, runs.c.user_name, runs.c.query, runs.c.status, runs.c.complexity,
+                           runs.c.total_tokens, runs.c.rerun_of, runs.c.created_at)
+
+        if user_name:
+            statement = statement.where(runs.c.user_name == user_name)
+
+        if cursor:
+            created_at, run_id = cursor
+            statement = statement.where(or_(runs.c.created_at < created_at,
+                                            and_(runs.c.created_at == created_at, runs.c.id < run_id)))
+
+        statement = statement.order_by(runs.c.created_at.desc(), runs.c.id.desc()).limit(limit)
+
+        async with self.engine.connect() as conn:
+            result = await conn.execute(statement)
+            return [dict(row._mapping) for row in result]
+
+    async def get_run(self, run_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        async with self.engine.connect() as conn:
+            run = (await conn.execute(select(ResearchRun.__table__).where(ResearchRun.__table__.c.id == run_id))).first()
+            if run is None:
+                return None
+
+            children = {}
+            for key, table in (("node_outputs", ResearchNodeOutput), ("citations", ResearchCitation),
+                               ("token_usage", ResearchTokenUsage)):
+                result = await conn.execute(select(table.__table__)
+                                            .where(table.__table__.c.run_id == run_id)
+                                            .order_by(table.__table__.c.id))
+                children[key] = [dict(row._mapping) for row in result]
+
+        return {**dict(run._mapping), **children}
@@ -0,0 +1,47 @@
+import uuid
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+
+from domain.entities.research_session_entities import ResearchSession
+
+
+class ResearchSessionRepository:
+    """
+    Persistence of conversation sessions: the working memory window, rolling summary and reusable outputs.
+    Writes are conditional on the number of turns stored, so concurrent writers never overwrite each other.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+
+    async def create_tables(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all, tables=[ResearchSession.__table__])
+
+    async def get(self, session_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        sessions = ResearchSession.__table__
+        async with self.engine.connect() as conn:
+            row = (await conn.execute(select(sessions).where(sessions.c.id == session_id))).first()
+        return dict(row._mapping) if row else None
+
+    async def save(self, session: Dict[str, Any], expected_turns: int) -> bool:
+        """
+        Writes the session only when it still has expected_turns turns stored, a new one when that is 0.
+        Returns False when another writer saved a turn of it first.
+        """
+        sessions = ResearchSession.__table__
+        if expected_turns == 0:
+            insert = sqlite.insert if self.engine.dialect.name == "sqlite" else postgresql.insert
+            statement = insert(sessions).values(**session).on_conflict_do_nothing(index_elements=["id"])
+        else:
+            statement = (update(sessions)
+                         .where(sessions.c.id == session["id"], sessions.c.turns == expected_turns)
+                         .values(**{key: value for key, value in session.items() if key != "id"}))
+
+        async with self.engine.begin() as conn:
+            result = await conn.execute(statement)
+        return result.rowcount > 0
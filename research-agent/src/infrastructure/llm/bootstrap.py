@@ -1,8 +1,11 @@
 from domain.interfaces.llm_interaction_interface import LlmInteractionInterface
+from infrastructure.llm.http_transport import LLMHttpTransport
 from infrastructure.llm.llm_service import LLMService
-from config.settings import configuration
+from config.settings import get_configuration
 from infrastructure.llm.providers.provider_factory import ProviderFactory
+from infrastructure.recording.cassette import Cassette
 from services.llm_interaction_service import LlmInteractionService
+from services.output_length_service import OutputLengthService
 
 
 class LLMApplicationBootstrap:
@@ -13,16 +16,25 @@ class LLMApplicationBootstrap:
 
     @staticmethod
     def build_llm_interaction_service() -> LlmInteractionInterface:
+        cassette = Cassette.get_active()
+        api_key = get_configuration().llm.llm_api_key
+        if cassette is not None and cassette.replaying and not api_key:
+            # Replay never reaches the provider, it only has to be constructible
+            api_key = "replay"
+
         chat_provider, embedding_provider = ProviderFactory.create(
-            provider=configuration.llm.llm_provider,
-            api_key=configuration.llm.llm_api_key,
-            model=configuration.llm.llm_model,
-            embedding_model=configuration.llm.llm_embedding_model,
+            provider=get_configuration().llm.llm_provider,
+            api_key=api_key,
+            model=get_configuration().llm.llm_model,
+            embedding_model=get_configuration().llm.llm_embedding_model,
+            http_client=LLMHttpTransport.get_client(),
         )
 
         llm_service = LLMService(
             chat_provider=chat_provider,
             embedding_provider=embedding_provider,
+            cassette=cassette,
         )
 
-        return LlmInteractionService(llm_service)
+        return LlmInteractionService(llm_service, max_concurrent_calls=get_configuration().llm.max_concurrent_calls,
+                                     output_length_service=OutputLengthService(get_configuration().output_length))
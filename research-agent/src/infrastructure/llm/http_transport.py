@@ -0,0 +1,58 @@
+import importlib.util
+from typing import Optional
+
+import httpx
+from loguru import logger
+
+from config.settings import get_configuration
+
+
+class LLMHttpTransport:
+    """
+    Single pooled HTTP client shared by every LLM provider client.
+
+    Reusing keep-alive connections avoids a TLS handshake per provider and per request.
+    Created on first use and closed by the API lifespan.
+    """
+
+    _client: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    def get_client(cls) -> httpx.AsyncClient:
+        if cls._client is None:
+            cls._client = cls._create_client()
+        return cls._client
+
+    @classmethod
+    def _create_client(cls) -> httpx.AsyncClient:
+        http_config = get_configuration().llm_http
+
+        http2 = http_config.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("LLM_HTTP2 is enabled but the h2 package is not installed, falling back to HTTP/1.1")
+            http2 = False
+
+        logger.info(f"Creating shared LLM HTTP transport (max connections {http_config.max_connections}, "
+                    f"keep-alive {http_config.max_keepalive_connections}, http2 {http2})")
+
+        return httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=http_config.max_connections,
+                max_keepalive_connections=http_config.max_keepalive_connections,
+                keepalive_expiry=http_config.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                connect=http_config.connect_timeout,
+                read=http_config.read_timeout,
+                write=http_config.write_timeout,
+                pool=http_config.pool_timeout,
+            ),
+        )
+
+    @classmethod
+    async def close(cls):
+        if cls._client is not None:
+            logger.info("Closing shared LLM HTTP transport")
+            await cls._client.aclose()
+            cls._client = None
@@ -1,17 +1,21 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 
+from config.constants import TokenConstants
 from infrastructure.llm.providers.base import ChatProvider, EmbeddingProvider
+from infrastructure.recording.cassette import Cassette
 
 
 class LLMService:
-    def __init__(self, chat_provider: ChatProvider, embedding_provider: EmbeddingProvider):
+    def __init__(self, chat_provider: ChatProvider, embedding_provider: EmbeddingProvider,
+                 cassette: Optional[Cassette] = None):
         self.chat_provider = chat_provider
         self.embedding_provider = embedding_provider
+        self.cassette = cassette
 
         self.default_config = {
             "temperature": 0.7,
             "top_p": 0.95,
-            "max_tokens": 2048,
+            "max_tokens": TokenConstants.DEFAULT_COMPLETION_ALLOWANCE,
         }
 
     def set_model(self, model: str):
@@ -20,10 +24,25 @@ class LLMService:
         else:
             raise RuntimeError("This provider does not support model switching")
 
-    async def chat(self, messages: List[Dict], config: dict | None = None):
+    async def chat(self, messages: List[Dict], config: dict | None = None, model: Optional[str] = None):
         cfg = {**self.default_config, **(config or {})}
+        if model:
+            cfg["model"] = model
+        if self.cassette is not None:
+            # max_tokens is learned from earlier calls, it would tie a replay to the order runs were recorded in.
+            # A truncation retry is an identical request then, answered by the next recording in order.
+            identity = {key: value for key, value in cfg.items() if key != "max_tokens"}
+            return await self.cassette.call("chat", {"messages": messages, "config": identity},
+                                            lambda: self.chat_provider.chat(messages, cfg))
         return await self.chat_provider.chat(messages, cfg)
 
     async def embed(self, text: str):
+        if self.cassette is not None:
+            return await self.cassette.call("embedding", {"text": text}, lambda: self.embedding_provider.embed(text))
         return await self.embedding_provider.embed(text)
 
+    async def embed_many(self, texts: List[str]):
+        if self.cassette is not None:
+            return await self.cassette.call("embedding", {"texts": texts},
+                                            lambda: self.embedding_provider.embed_many(texts))
+        return await self.embedding_provider.embed_many(texts)
@@ -0,0 +1,42 @@
+import json
+import re
+from typing import Any, Optional
+
+import json_repair
+
+# Kept free of application imports, process pool workers import this module to parse large outputs
+_JSON_PATTERNS = [re.compile(r"\{.*\}", re.DOTALL), re.compile(r"\[.*\]", re.DOTALL)]
+
+
+def parse_llm_output(llm_response: str) -> Optional[Any]:
+    """
+    Extract valid JSON from the LLM response.
+    """
+    if not llm_response:
+        return None
+
+    llm_response = llm_response.strip()
+
+    try:
+        json_parsed = json_repair.loads(llm_response)
+
+        if isinstance(json_parsed, dict):
+            if "response" in json_parsed:
+                return json_parsed["response"]
+            return json_parsed
+
+    except json.JSONDecodeError:
+        pass
+
+    for pattern in _JSON_PATTERNS:
+        match = pattern.search(llm_response)
+        if match:
+            try:
+                parsed = json.loads(match.group())
+                if isinstance(parsed, dict) and "response" in parsed:
+                    return parsed["response"]
+                return parsed
+            except json.JSONDecodeError:
+                continue
+
+    return None
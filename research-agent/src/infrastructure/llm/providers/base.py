@@ -1,11 +1,16 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict, Tuple
+from typing import Any, List, Dict, Tuple
 
 
 class ChatProvider(ABC):
     @abstractmethod
-    async def chat(self, messages: List[Dict], config: Dict) -> Tuple[str, int]:
-        """Execute a chat completion and return (text, tokens)."""
+    async def chat(self, messages: List[Dict], config: Dict) -> Tuple[str, Dict[str, Any]]:
+        """Execute a chat completion and return (text, usage) with prompt, completion and total tokens.
+
+        Usage also carries the "finish_reason" of the completion, "length" when max_tokens cut it off.
+        A "model" key in config overrides the provider default for this call only.
+        """
         pass
 
 
@@ -13,3 +18,7 @@ class EmbeddingProvider(ABC):
     @abstractmethod
     async def embed(self, text: str) -> List[float]:
         pass
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embed several texts, providers with a batch endpoint override this with a single request."""
+        return list(await asyncio.gather(*[self.embed(text) for text in texts]))
@@ -1,14 +1,26 @@
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional
 
+import httpx
 from openai import AsyncOpenAI
 from openai.types.chat import ChatCompletionMessageParam
 
 from infrastructure.llm.providers.base import ChatProvider, EmbeddingProvider
 
 
+def _usage_to_dict(usage: Any) -> Dict[str, int]:
+    if not usage:
+        return {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+
+    return {
+        "prompt_tokens": usage.prompt_tokens or 0,
+        "completion_tokens": usage.completion_tokens or 0,
+        "total_tokens": usage.total_tokens or 0,
+    }
+
+
 class OpenAIChatProvider(ChatProvider):
-    def __init__(self, api_key: str, model: str):
-        self.client = AsyncOpenAI(api_key=api_key)
+    def __init__(self, api_key: str, model: str, http_client: Optional[httpx.AsyncClient] = None):
+        self.client = AsyncOpenAI(api_key=api_key, http_client=http_client)
         self.model = model
 
     # GPT 5 Implementation
@@ -27,9 +39,9 @@ class OpenAIChatProvider(ChatProvider):
     #         response.usage.total_tokens if response.usage else 0,
     #     )
 
-    async def chat(self, messages: List[ChatCompletionMessageParam], config: Dict) -> Tuple[str, int]:
+    async def chat(self, messages: List[ChatCompletionMessageParam], config: Dict) -> Tuple[str, Dict[str, Any]]:
         response = await self.client.chat.completions.create(
-            model=self.model,
+            model=config.get("model") or self.model,
             messages=messages,
             temperature=config.get("temperature", 0.7),
             top_p=config.get("top_p", 0.95),
@@ -37,15 +49,19 @@ class OpenAIChatProvider(ChatProvider):
 
         return (
             response.choices[0].message.content,
-            response.usage.total_tokens if response.usage else 0,
+            {**_usage_to_dict(response.usage), "finish_reason": response.choices[0].finish_reason},
         )
 
 
 class OpenAIEmbeddingProvider(EmbeddingProvider):
-    def __init__(self, api_key: str, model: str):
-        self.client = AsyncOpenAI(api_key=api_key)
+    def __init__(self, api_key: str, model: str, http_client: Optional[httpx.AsyncClient] = None):
+        self.client = AsyncOpenAI(api_key=api_key, http_client=http_client)
         self.model = model
 
     async def embed(self, text: str) -> List[float]:
         resp = await self.client.embeddings.create(model=self.model, input=text)
         return resp.data[0].embedding
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        resp = await self.client.embeddings.create(model=self.model, input=texts)
+        return [item.embedding for item in sorted(resp.data, key=lambda item: item.index)]
@@ -1,5 +1,6 @@
-from typing import List, Dict, Tuple
+from typing import Any, List, Dict, Tuple, Optional
 
+import httpx
 from openai import AsyncOpenAI
 from openai.types.chat import ChatCompletionMessageParam
 
@@ -7,18 +8,18 @@ from infrastructure.llm.providers.base import ChatProvider, EmbeddingProvider
 
 
 class OpenRouterChatProvider(ChatProvider):
-    def __init__(self, api_key: str, model: str):
-        self.client = AsyncOpenAI(api_key=api_key)
+    def __init__(self, api_key: str, model: str, http_client: Optional[httpx.AsyncClient] = None):
+        self.client = AsyncOpenAI(api_key=api_key, http_client=http_client)
         self.model = model
 
-    async def chat(self, messages: List[ChatCompletionMessageParam], config: Dict) -> Tuple[str, int]:
+    async def chat(self, messages: List[ChatCompletionMessageParam], config: Dict) -> Tuple[str, Dict[str, Any]]:
         pass
 
 
 class OpenRouterEmbeddingProvider(EmbeddingProvider):
 
-    def __init__(self, api_key: str, model: str):
-        self.client = AsyncOpenAI(api_key=api_key)
+    def __init__(self, api_key: str, model: str, http_client: Optional[httpx.AsyncClient] = None):
+        self.client = AsyncOpenAI(api_key=api_key, http_client=http_client)
         self.model = model
 
     async def embed(self, text: str) -> List[float]:
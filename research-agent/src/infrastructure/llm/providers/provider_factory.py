@@ -1,6 +1,3 @@
-from infrastructure.llm.providers.openai_provider import OpenAIChatProvider, OpenAIEmbeddingProvider
-
-
 class ProviderFactory:
     """
     Responsible for creating concrete LLM providers.
@@ -8,11 +5,14 @@ class ProviderFactory:
     """
 
     @staticmethod
-    def create(provider: str, api_key: str, model: str, embedding_model: str):
+    def create(provider: str, api_key: str, model: str, embedding_model: str, http_client=None):
         if provider == "openai":
+            # Deferred, the OpenAI SDK is the slowest import on the startup path
+            from infrastructure.llm.providers.openai_provider import OpenAIChatProvider, OpenAIEmbeddingProvider
+
             return (
-                OpenAIChatProvider(api_key=api_key, model=model),
-                OpenAIEmbeddingProvider(api_key=api_key, model=embedding_model),
+                OpenAIChatProvider(api_key=api_key, model=model, http_client=http_client),
+                OpenAIEmbeddingProvider(api_key=api_key, model=embedding_model, http_client=http_client),
             )
 
         raise ValueError(f"Unsupported LLM provider: {provider}")
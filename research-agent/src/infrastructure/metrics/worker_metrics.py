@@ -0,0 +1,99 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class WorkerMetrics:
+    """
+    In-process counters and timers for one API worker.
+
+    In multi-worker mode every worker flushes a snapshot to APP_METRICS_DIR as <pid>.json,
+    so any worker can serve the aggregate of all live workers.
+    """
+
+    _counters: Dict[str, float] = {}
+    _timers: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def increment(cls, name: str, value: float = 1):
+        cls._counters[name] = cls._counters.get(name, 0) + value
+
+    @classmethod
+    def observe(cls, name: str, seconds: float):
+        timer = cls._timers.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+        timer["count"] += 1
+        timer["sum"] += seconds
+        timer["max"] = max(timer["max"], seconds)
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "timestamp": time.time(),
+            "counters": dict(cls._counters),
+            "timers": {name: dict(timer) for name, timer in cls._timers.items()},
+        }
+
+    @classmethod
+    def flush(cls, metrics_dir: str):
+        directory = Path(metrics_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        target = directory / f"{os.getpid()}.json"
+        temporary = target.with_suffix(".tmp")
+        temporary.write_text(json.dumps(cls.snapshot()))
+        os.replace(temporary, target)
+
+    @classmethod
+    def remove(cls, metrics_dir: str):
+        (Path(metrics_dir) / f"{os.getpid()}.json").unlink(missing_ok=True)
+
+    @classmethod
+    def aggregate(cls, metrics_dir: Optional[str]) -> Dict[str, Any]:
+        """ Sums the latest snapshot of every live worker, the calling worker uses its current values """
+        snapshots = {os.getpid(): cls.snapshot()}
+
+        if metrics_dir and Path(metrics_dir).is_dir():
+            for path in Path(metrics_dir).glob("*.json"):
+                try:
+                    pid = int(path.stem)
+                    if pid in snapshots:
+                        continue
+                    if not _pid_alive(pid):
+                        path.unlink(missing_ok=True)
+                        continue
+                    snapshots[pid] = json.loads(path.read_text())
+                except (ValueError, OSError) as e:
+                    logger.warning(f"Skipping unreadable worker metrics file {path}: {e}")
+
+        counters: Dict[str, float] = {}
+        timers: Dict[str, Dict[str, float]] = {}
+
+        for snapshot in snapshots.values():
+            for name, value in snapshot.get("counters", {}).items():
+                counters[name] = counters.get(name, 0) + value
+            for name, timer in snapshot.get("timers", {}).items():
+                total = timers.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+                total["count"] += timer.get("count", 0)
+                total["sum"] += timer.get("sum", 0.0)
+                total["max"] = max(total["max"], timer.get("max", 0.0))
+
+        return {
+            "workers": sorted(snapshots),
+            "counters": counters,
+            "timers": timers,
+        }
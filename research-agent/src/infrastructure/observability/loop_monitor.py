@@ -0,0 +1,77 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from loguru import logger
+
+from config.settings import LoopMonitorConfig
+from infrastructure.metrics.worker_metrics import WorkerMetrics
+
+
+class EventLoopMonitor:
+    """
+    Detects callbacks that block the event loop.
+
+    A heartbeat task records how late each of its wake-ups is as the loop lag. A watchdog thread notices
+    when the heartbeat stops for longer than LOOP_MONITOR_STALL_SECONDS and logs the stack of the loop
+    thread while it is still blocked, which points at the offending code rather than at whatever ran after it.
+    """
+
+    def __init__(self, loop_monitor_config: LoopMonitorConfig):
+        self.config = loop_monitor_config
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        if not self.config.enabled or self._heartbeat is not None:
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._heartbeat = asyncio.create_task(self._beat())
+        self._watchdog = threading.Thread(target=self._watch, name="event-loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Event loop monitor started (stall threshold {self.config.stall_seconds}s)")
+
+    async def stop(self):
+        if self._heartbeat is None:
+            return
+        self._stopped.set()
+        self._heartbeat.cancel()
+        await asyncio.gather(self._heartbeat, return_exceptions=True)
+        self._heartbeat = None
+        self._watchdog = None
+
+    # ------------------------------------------------------------------
+    # Internal Methods
+    # ------------------------------------------------------------------
+
+    async def _beat(self):
+        interval = self.config.interval_seconds
+        while True:
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.monotonic() - self._last_beat - interval)
+            WorkerMetrics.observe("event_loop_lag_seconds", lag)
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stopped.wait(self.config.interval_seconds):
+            beat = self._last_beat
+            blocked_for = time.monotonic() - beat - self.config.interval_seconds
+            if blocked_for < self.config.stall_seconds or beat == reported_beat:
+                continue
+
+            # One report per stall, taken while the loop thread is still inside the blocking call
+            reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "unavailable"
+            WorkerMetrics.increment("event_loop_stalls")
+            logger.warning(f"Event loop blocked for at least {blocked_for:.3f}s, loop thread stack:\n{stack}")
@@ -0,0 +1,123 @@
+import asyncio
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+def _top(counter: Counter, samples: int, top: int) -> List[Dict[str, Any]]:
+    return [
+        {"function": label, "samples": count, "percent": round(100.0 * count / max(samples, 1), 1)}
+        for label, count in counter.most_common(top)
+    ]
+
+
+def _sample_thread(thread_id: int, seconds: float, interval: float, top: int) -> Dict[str, Any]:
+    """ Samples the stack of one thread, blocking the calling thread for the whole duration """
+    self_counts: Counter = Counter()
+    cumulative_counts: Counter = Counter()
+    stacks: Counter = Counter()
+    samples = 0
+
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            samples += 1
+            self_counts[labels[0]] += 1
+            # Recursive functions count once per sample
+            cumulative_counts.update(set(labels))
+            stacks[";".join(reversed(labels))] += 1
+        time.sleep(interval)
+
+    return {
+        "samples": samples,
+        "self": _top(self_counts, samples, top),
+        "cumulative": _top(cumulative_counts, samples, top),
+        # Collapsed stacks, the input format of flamegraph.pl and speedscope
+        "stacks": [f"{stack} {count}" for stack, count in stacks.most_common(top * 4)],
+    }
+
+
+class CpuProfiler:
+    """
+    Sampling profiler for the event loop thread.
+
+    Samples are taken from a separate thread, so the loop keeps serving requests while it is profiled
+    and time spent in blocking calls shows up exactly where the loop was stuck.
+    """
+
+    _lock = asyncio.Lock()
+
+    @classmethod
+    async def profile(cls, seconds: float, interval_ms: float, top: int) -> Dict[str, Any]:
+        if cls._lock.locked():
+            raise RuntimeError("A CPU profile is already running in this worker")
+
+        async with cls._lock:
+            loop_thread_id = threading.get_ident()
+            logger.info(f"Profiling the event loop for {seconds}s every {interval_ms}ms")
+            result = await asyncio.to_thread(_sample_thread, loop_thread_id, seconds, interval_ms / 1000, top)
+            return {"seconds": seconds, "interval_ms": interval_ms, **result}
+
+
+class MemoryTracker:
+    """
+    tracemalloc snapshots of one worker.
+
+    Tracing starts with the baseline snapshot and stops when it is cleared, since it slows every
+    allocation down for as long as it runs.
+    """
+
+    _baseline: Optional[tracemalloc.Snapshot] = None
+
+    @classmethod
+    async def take_baseline(cls, frames: int) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        cls._baseline = await asyncio.to_thread(tracemalloc.take_snapshot)
+        current, peak = tracemalloc.get_traced_memory()
+        return {"tracing": True, "traced_bytes": current, "peak_bytes": peak}
+
+    @classmethod
+    async def diff(cls, top: int) -> Dict[str, Any]:
+        if cls._baseline is None:
+            raise RuntimeError("No baseline snapshot, take one first")
+
+        baseline = cls._baseline
+        snapshot = await asyncio.to_thread(tracemalloc.take_snapshot)
+        differences = await asyncio.to_thread(snapshot.compare_to, baseline, "lineno")
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "top": [
+                {
+                    "location": str(difference.traceback[0]) if difference.traceback else "unknown",
+                    "size_diff_bytes": difference.size_diff,
+                    "size_bytes": difference.size,
+                    "count_diff": difference.count_diff,
+                }
+                for difference in differences[:top]
+            ],
+        }
+
+    @classmethod
+    def stop(cls) -> Dict[str, Any]:
+        cls._baseline = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        return {"tracing": False}
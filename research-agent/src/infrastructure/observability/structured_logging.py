@@ -0,0 +1,125 @@
+import logging
+import random
+import re
+import sys
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from config.constants import LogConstants
+from config.settings import LoggingConfig
+
+_DATA_URL = re.compile(r"data:[\w.+/-]+;base64,[A-Za-z0-9+/=]+")
+_BASE64_RUN = re.compile(r"[A-Za-z0-9+/]{%d,}={0,2}" % LogConstants.BASE64_MIN_CHARS)
+
+_TEXT_FORMAT = ("<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | "
+                "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>")
+
+_max_field_chars = 2000
+_sample_rates: Dict[str, float] = {}
+_debug_enabled = False
+
+
+def _redact_text(text: str, max_chars: int) -> str:
+    if len(text) >= LogConstants.REDACTION_SCAN_MIN_CHARS:
+        text = _DATA_URL.sub(lambda m: f"<data url, {len(m.group())} chars>", text)
+        text = _BASE64_RUN.sub(lambda m: f"<base64, {len(m.group())} chars>", text)
+    if len(text) > max_chars:
+        text = f"{text[:max_chars]}... <{len(text) - max_chars} more chars>"
+    return text
+
+
+def redact(value: Any, max_chars: Optional[int] = None) -> Any:
+    """ Copy of a log payload with secrets masked, base64 blobs replaced by their size and long strings truncated """
+    max_chars = max_chars or _max_field_chars
+
+    if isinstance(value, str):
+        return _redact_text(value, max_chars)
+    if isinstance(value, dict):
+        return {key: "***" if str(key).lower() in LogConstants.REDACTED_KEYS else redact(item, max_chars)
+                for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item, max_chars) for item in value]
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return _redact_text(repr(value), max_chars)
+
+
+def should_sample(category: str) -> bool:
+    rate = _sample_rates.get(category, 1.0)
+    return rate >= 1.0 or (rate > 0 and random.random() < rate)
+
+
+def log_payload(category: str, message: str, payload: Any):
+    """
+    Debug log of a request or response payload.
+
+    Nothing is formatted unless DEBUG is enabled and the category is sampled, and the payload
+    is redacted only for records that are actually written.
+    """
+    if not _debug_enabled or not should_sample(category):
+        return
+    (logger.bind(category=category, sampled=True)
+     .opt(lazy=True, depth=1)
+     .debug(message + ": {}", lambda: redact(payload)))
+
+
+class InterceptHandler(logging.Handler):
+    """
+    Forwards stdlib records to loguru.
+
+    The caller location is taken from the record itself instead of walking the stack for every record,
+    and the logger name becomes the record category so noisy libraries can be sampled.
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+
+        (logger.patch(lambda r: r.update(name=record.name, function=record.funcName, line=record.lineno))
+         .bind(category=record.name)
+         .opt(exception=record.exc_info)
+         .log(level, record.getMessage()))
+
+
+def _sampling_filter(record: Dict[str, Any]) -> bool:
+    """ Warnings and errors are always kept, already sampled payload records are not drawn twice """
+    if record["level"].no >= logging.WARNING or record["extra"].get("sampled"):
+        return True
+    return should_sample(record["extra"].get("category", LogConstants.DEFAULT_CATEGORY))
+
+
+def _truncate_message(record: Dict[str, Any]):
+    if len(record["message"]) > _max_field_chars:
+        record["message"] = _redact_text(record["message"], _max_field_chars)
+
+
+def configure_logging(config: LoggingConfig):
+    """
+    Replaces the default loguru sink with a sampled, size bounded one.
+
+    With LOG_ENQUEUE the sink writes from a background thread, so a slow stderr never blocks the event loop.
+    LOG_FORMAT=json writes one JSON object per record, including the bound extras such as the category.
+    """
+    global _max_field_chars, _sample_rates, _debug_enabled
+
+    _max_field_chars = config.max_field_chars
+    _sample_rates = dict(config.sample_rates)
+    level_no = logger.level(config.level.upper()).no
+    _debug_enabled = level_no <= logging.DEBUG
+
+    logger.remove()
+    logger.configure(extra={"category": LogConstants.DEFAULT_CATEGORY}, patcher=_truncate_message)
+    logger.add(sys.stderr,
+               level=level_no,
+               format=_TEXT_FORMAT,
+               filter=_sampling_filter if _sample_rates else None,
+               serialize=config.format == "json",
+               enqueue=config.enqueue,
+               backtrace=True,
+               diagnose=False)
+
+    # Stdlib records below the configured level are dropped before a LogRecord is built
+    logging.basicConfig(handlers=[InterceptHandler()], level=level_no, force=True)
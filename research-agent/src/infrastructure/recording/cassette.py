@@ -0,0 +1,139 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+from loguru import logger
+
+from config.settings import CassetteConfig, get_configuration
+from infrastructure.observability.structured_logging import redact
+
+T = TypeVar("T")
+
+# Entries written between two flushes of the gzip stream
+_FLUSH_EVERY = 50
+
+
+class CassetteMissError(RuntimeError):
+    pass
+
+
+class Cassette:
+    """
+    Record/replay of LLM and search interactions.
+
+    In record mode every call is executed and appended, with its usage and timing, to
+    CASSETTE_DIR/<pid>-<timestamp>.jsonl.gz. In replay mode calls are answered from all cassettes
+    in CASSETTE_DIR by a hash of the request, identical requests in the order they were recorded,
+    optionally after sleeping as long as the recorded call took.
+    """
+
+    _active: Optional["Cassette"] = None
+    _created = False
+
+    def __init__(self, cassette_config: CassetteConfig):
+        if not cassette_config.directory:
+            raise ValueError(f"CASSETTE_DIR is required when CASSETTE_MODE is {cassette_config.mode}")
+
+        self.config = cassette_config
+        self.directory = Path(cassette_config.directory)
+        self._entries: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._last_served: Dict[str, Dict[str, Any]] = {}
+        self._file = None
+        self._unflushed = 0
+
+        if self.replaying:
+            self._load()
+
+    @classmethod
+    def get_active(cls) -> Optional["Cassette"]:
+        """ The cassette configured for this process, None unless CASSETTE_MODE is record or replay """
+        if not cls._created:
+            cassette_config = get_configuration().cassette
+            cls._active = cls(cassette_config) if cassette_config.mode != "off" else None
+            cls._created = True
+        return cls._active
+
+    @classmethod
+    def close(cls):
+        if cls._active is not None and cls._active._file is not None:
+            cls._active._file.close()
+            cls._active._file = None
+
+    @property
+    def replaying(self) -> bool:
+        return self.config.mode == "replay"
+
+    @staticmethod
+    def request_key(kind: str, request: Dict[str, Any]) -> str:
+        payload = json.dumps({"kind": kind, "request": request}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def call(self, kind: str, request: Dict[str, Any], func: Callable[[], Awaitable[T]]) -> T:
+        key = self.request_key(kind, request)
+
+        if self.replaying:
+            entry = self._next_entry(kind, key)
+            if self.config.reproduce_timing:
+                await asyncio.sleep(entry["elapsed_seconds"])
+            if kind == "chat":
+                return entry["response"], entry["usage"]
+            return entry["response"]
+
+        started = time.perf_counter()
+        response = await func()
+        entry = {
+            "kind": kind,
+            "key": key,
+            # Long prompts and images are only kept in part, the key already identifies the request
+            "request": redact(request),
+            "response": response,
+            "usage": None,
+            "elapsed_seconds": round(time.perf_counter() - started, 4),
+        }
+        if kind == "chat":
+            entry["response"], entry["usage"] = response
+        self._write(entry)
+        return response
+
+    # ------------------------------------------------------------------
+    # Internal Methods
+    # ------------------------------------------------------------------
+
+    def _next_entry(self, kind: str, key: str) -> Dict[str, Any]:
+        recorded = self._entries.get(key)
+        if recorded:
+            self._last_served[key] = recorded.popleft()
+        if key not in self._last_served:
+            raise CassetteMissError(f"No recorded {kind} response for request {key[:12]} in {self.directory}")
+        # Extra identical requests, such as retries, get the last recorded answer again
+        return self._last_served[key]
+
+    def _load(self):
+        paths: List[Path] = sorted(self.directory.glob("*.jsonl.gz"))
+        for path in paths:
+            with gzip.open(path, "rt", encoding="utf-8") as cassette_file:
+                for line in cassette_file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]].append(entry)
+        logger.info(f"Replaying {sum(len(e) for e in self._entries.values())} recorded calls "
+                    f"from {len(paths)} cassettes in {self.directory}")
+
+    def _write(self, entry: Dict[str, Any]):
+        if self._file is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f"{os.getpid()}-{time.strftime('%Y%m%dT%H%M%S')}.jsonl.gz"
+            self._file = gzip.open(path, "at", encoding="utf-8")
+            logger.info(f"Recording LLM and search calls to {path}")
+
+        self._file.write(json.dumps(entry, default=str) + "\n")
+        self._unflushed += 1
+        if self._unflushed >= _FLUSH_EVERY:
+            self._file.flush()
+            self._unflushed = 0
@@ -1,42 +1,27 @@
 import asyncio
-import logging
+import contextlib
+import importlib.util
 import os
-import sys
+import signal
+import tempfile
 
 from uvicorn import Server, Config
+from uvicorn.supervisors import Multiprocess
 
 import api
 from loguru import logger
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
-from config.settings import configuration
+from config.settings import get_configuration
 from exceptions.app_exceptions import AppErrorCodes
-from exceptions.app_exceptions import (ResultValidationException, InternalServerError, AppException, )
+from exceptions.app_exceptions import (ResultValidationException, InternalServerError, AppException,
+                                       TokenBudgetExceededException, SessionNotFoundException,
+                                       RunNotFoundException, InvalidImageException, AdmissionRejectedException,
+                                       JobNotFoundException, )
+from infrastructure.observability.structured_logging import configure_logging
 
 
-class InterceptHandler(logging.Handler):
-    def emit(self, record: logging.LogRecord) -> None:
-        try:
-            level = logger.level(record.levelname).name
-        except ValueError:
-            level = record.levelno
-        frame, depth = logging.currentframe(), 2
-        while frame and frame.f_code.co_filename == logging.__file__:
-            frame = frame.f_back
-            depth += 1
-        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
-
-
-logging.basicConfig(handlers=[InterceptHandler()], level=0, force=True)
-
-logger.remove()
-logger.add(sys.stderr, level=configuration.api.log_level, backtrace=True, diagnose=False)
-
-app = api.create_app()
-
-
-@app.exception_handler(ResultValidationException)
 async def result_validation_exception_handler(request: Request, exc: ResultValidationException):
     return JSONResponse(status_code=int(AppErrorCodes.VALIDATION_ERROR[0]),
                         content={
@@ -46,7 +31,6 @@ async def result_validation_exception_handler(request: Request, exc: ResultValid
                         })
 
 
-@app.exception_handler(InternalServerError)
 async def internal_server_exception_handler(request: Request, exc: InternalServerError):
     return JSONResponse(status_code=int(AppErrorCodes.INTERNAL_SERVER_ERROR[0]),
                         content={
@@ -56,7 +40,62 @@ async def internal_server_exception_handler(request: Request, exc: InternalServe
                         })
 
 
-@app.exception_handler(AppException)
+async def token_budget_exception_handler(request: Request, exc: TokenBudgetExceededException):
+    return JSONResponse(status_code=int(AppErrorCodes.TOKEN_BUDGET_EXCEEDED[0]),
+                        content={
+                            "status_code": AppErrorCodes.TOKEN_BUDGET_EXCEEDED[0],
+                            "message": str(exc),
+                            "details": exc.details,
+                        })
+
+
+async def session_not_found_exception_handler(request: Request, exc: SessionNotFoundException):
+    return JSONResponse(status_code=int(AppErrorCodes.SESSION_NOT_FOUND[0]),
+                        content={
+                            "status_code": AppErrorCodes.SESSION_NOT_FOUND[0],
+                            "message": str(exc),
+                            "details": exc.details,
+                        })
+
+
+async def run_not_found_exception_handler(request: Request, exc: RunNotFoundException):
+    return JSONResponse(status_code=int(AppErrorCodes.RUN_NOT_FOUND[0]),
+                        content={
+                            "status_code": AppErrorCodes.RUN_NOT_FOUND[0],
+                            "message": str(exc),
+                            "details": exc.details,
+                        })
+
+
+async def job_not_found_exception_handler(request: Request, exc: JobNotFoundException):
+    return JSONResponse(status_code=int(AppErrorCodes.JOB_NOT_FOUND[0]),
+                        content={
+                            "status_code": AppErrorCodes.JOB_NOT_FOUND[0],
+                            "message": str(exc),
+                            "details": exc.details,
+                        })
+
+
+async def admission_rejected_exception_handler(request: Request, exc: AdmissionRejectedException):
+    return JSONResponse(status_code=int(AppErrorCodes.SERVER_BUSY[0]),
+                        headers={"Retry-After": str(exc.details["retry_after_seconds"])},
+                        content={
+                            "status_code": AppErrorCodes.SERVER_BUSY[0],
+                            "message": str(exc),
+                            "details": exc.details,
+                        })
+
+
+async def invalid_image_exception_handler(request: Request, exc: InvalidImageException):
+    status_code = int(exc.details["status_code"])
+    return JSONResponse(status_code=status_code,
+                        content={
+                            "status_code": status_code,
+                            "message": str(exc),
+                            "details": exc.details,
+                        })
+
+
 async def app_exception_handler(request: Request, exc: AppException):
     return JSONResponse(status_code=int(AppErrorCodes.INTERNAL_SERVER_ERROR[0]),
                         content={
@@ -66,24 +105,124 @@ async def app_exception_handler(request: Request, exc: AppException):
                         })
 
 
-async def run_api():
-    host = configuration.api.host
+def _create_app():
+    configure_logging(get_configuration().logging)
+
+    application = api.create_app()
+    for exception_type, handler in ((ResultValidationException, result_validation_exception_handler),
+                                    (InternalServerError, internal_server_exception_handler),
+                                    (TokenBudgetExceededException, token_budget_exception_handler),
+                                    (SessionNotFoundException, session_not_found_exception_handler),
+                                    (RunNotFoundException, run_not_found_exception_handler),
+                                    (JobNotFoundException, job_not_found_exception_handler),
+                                    (AdmissionRejectedException, admission_rejected_exception_handler),
+                                    (InvalidImageException, invalid_image_exception_handler),
+                                    (AppException, app_exception_handler)):
+        application.add_exception_handler(exception_type, handler)
+    return application
+
+
+# Process pool workers started with spawn or forkserver import this module as __mp_main__, they only unpickle
+# offloaded functions and must not configure logging or build an application of their own
+app = _create_app() if __name__ != "__mp_main__" else None
+
+
+def _loop_implementation() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def _http_implementation() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def _event_loop_factory():
+    if _loop_implementation() == "uvloop":
+        import uvloop
+
+        return uvloop.new_event_loop
+    return None
+
+
+def _server_address():
+    host = get_configuration().api.host
     is_windows = os.name == "nt"
-    port = configuration.api.port or (5000 if is_windows else 8000)
-    logger.info(f"Starting Uvicorn server on {host}:{port}")
+    port = get_configuration().api.port or (5000 if is_windows else 8000)
+    return host, port
+
+
+async def run_api():
+    host, port = _server_address()
+    logger.info(f"Starting Uvicorn server on {host}:{port} ({_loop_implementation()}/{_http_implementation()})")
     server = Server(Config(app=app,
                            host=host,
                            port=port,
-                           log_level=configuration.api.log_level.lower(),
+                           http=_http_implementation(),
+                           log_level=get_configuration().api.log_level.lower(),
                            log_config=None,
                            ))
     await server.serve()
 
 
+def run_api_workers():
+    """
+    Pre-forks APP_WORKERS uvicorn workers on one shared listening socket.
+
+    Every worker imports `main:app` on its own, so it builds its own database engine and LLM clients.
+    Send SIGHUP to the parent for a rolling restart, SIGTTIN/SIGTTOU to add or remove a worker.
+    """
+    host, port = _server_address()
+    workers = get_configuration().app_workers or os.cpu_count() or 1
+
+    if not get_configuration().metrics_dir:
+        # Inherited by the spawned workers, which flush their metrics snapshots here
+        os.environ["APP_METRICS_DIR"] = tempfile.mkdtemp(prefix="research-agent-metrics-")
+
+    logger.info(f"Starting {workers} Uvicorn workers on {host}:{port} "
+                f"({_loop_implementation()}/{_http_implementation()})")
+    config = Config(app="main:app",
+                    host=host,
+                    port=port,
+                    workers=workers,
+                    loop=_loop_implementation(),
+                    http=_http_implementation(),
+                    timeout_graceful_shutdown=get_configuration().graceful_shutdown_seconds,
+                    log_level=get_configuration().api.log_level.lower(),
+                    log_config=None,
+                    )
+    server = Server(config=config)
+    sock = config.bind_socket()
+    Multiprocess(config, target=server.run, sockets=[sock]).run()
+
+
+async def run_worker():
+    """
+    Runs queued research jobs instead of serving HTTP, so worker nodes scale independently of the API nodes.
+    SIGTERM or SIGINT stops claiming jobs and gives running ones GRACEFUL_SHUTDOWN_SECONDS to finish.
+    """
+    from api.dependency_injection import Dependencies
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(signal_number, stop.set)
+
+    worker = Dependencies.research_worker_service()
+    # Same startup and shutdown as the API: database, run history, metrics, loop monitor and clients
+    async with api.lifespan(app):
+        await worker.run(stop, get_configuration().graceful_shutdown_seconds)
+
+
 async def main():
-    if configuration.app_mode == "api":
+    if get_configuration().app_mode == "api":
         await run_api()
+    elif get_configuration().app_mode == "worker":
+        await run_worker()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if get_configuration().app_mode == "api_workers":
+        run_api_workers()
+    else:
+        with asyncio.Runner(loop_factory=_event_loop_factory()) as runner:
+            runner.run(main())
@@ -0,0 +1,156 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from config.constants import AdmissionConstants
+from config.settings import AdmissionConfig
+from exceptions.app_exceptions import AdmissionRejectedException
+from infrastructure.metrics.worker_metrics import WorkerMetrics
+
+
+class _Lane:
+    def __init__(self):
+        # Waiters ordered by (finish tag, arrival), cancelled ones are skipped when they reach the top
+        self.queue: List[Tuple[float, int, str, asyncio.Future]] = []
+        self.waiting = 0
+        self.running = 0
+        self.virtual_time = 0.0
+        self.finish_tags: Dict[str, float] = {}
+
+
+class AdmissionControlService:
+    """
+    Admission control in front of research runs.
+
+    Responsibilities:
+    - Cap concurrent runs and queue the excess in an interactive and a batch lane, interactive first
+    - Order each lane by weighted fair queuing on user_name, so one heavy user cannot starve the others
+    - Reject with a Retry-After hint as soon as the queue depth or estimated wait exceeds the lane limit
+
+    Limits apply per worker process.
+    """
+
+    def __init__(self, admission_config: AdmissionConfig):
+        self.config = admission_config
+        self._lanes = {lane: _Lane() for lane in AdmissionConstants.LANES}
+        self._running = 0
+        self._arrivals = itertools.count()
+        self._run_seconds = admission_config.initial_run_seconds
+
+    def ensure_capacity(self, lane: str = AdmissionConstants.INTERACTIVE):
+        """ Raises right away when a run in this lane would be rejected, before any work is done for it """
+        if not self.config.enabled or self._can_start_now(lane):
+            return
+
+        depth = self._lanes[lane].waiting
+        estimated_wait = self._estimated_wait(lane)
+        if depth >= self.config.queue_depth[lane] or estimated_wait > self.config.max_wait_seconds[lane]:
+            WorkerMetrics.increment(f"admission_rejected_{lane}")
+            raise AdmissionRejectedException.from_queue(lane, depth, estimated_wait,
+                                                        retry_after_seconds=max(1, math.ceil(estimated_wait)))
+
+    @asynccontextmanager
+    async def admit(self, user_name: Optional[str], lane: str = AdmissionConstants.INTERACTIVE) -> AsyncIterator[None]:
+        """ Holds a run slot for the duration of the block, waiting for it in the lane when none is free """
+        if not self.config.enabled:
+            yield
+            return
+
+        queued_at = time.monotonic()
+        if self._can_start_now(lane):
+            self._start(lane)
+        else:
+            await self._wait_for_slot(user_name or "", lane)
+
+        started = time.monotonic()
+        WorkerMetrics.observe(f"admission_wait_seconds_{lane}", started - queued_at)
+        try:
+            yield
+        finally:
+            self._finish(lane, time.monotonic() - started)
+
+    # ------------------------------------------------------------------
+    # Internal Methods
+    # ------------------------------------------------------------------
+
+    def _can_start_now(self, lane: str) -> bool:
+        return self._has_free_slot(lane) and not self._waiting_ahead(lane)
+
+    def _has_free_slot(self, lane: str) -> bool:
+        if self._running >= self.config.max_concurrent_runs:
+            return False
+        # Batch runs never take the slots held back for interactive traffic
+        return lane != AdmissionConstants.BATCH or self._lanes[lane].running < self.config.batch_max_running
+
+    def _waiting_ahead(self, lane: str) -> int:
+        """ Waiters a new run in this lane queues behind, its own lane and every higher priority lane """
+        lanes = AdmissionConstants.LANES
+        return sum(self._lanes[name].waiting for name in lanes[:lanes.index(lane) + 1])
+
+    def _estimated_wait(self, lane: str) -> float:
+        slots = self.config.max_concurrent_runs
+        if lane == AdmissionConstants.BATCH:
+            slots = min(slots, self.config.batch_max_running)
+        return (self._waiting_ahead(lane) + 1) * self._run_seconds / max(slots, 1)
+
+    async def _wait_for_slot(self, user_name: str, lane: str):
+        self.ensure_capacity(lane)
+
+        queue = self._lanes[lane]
+        start_tag = max(queue.virtual_time, queue.finish_tags.get(user_name, 0.0))
+        finish_tag = start_tag + 1.0 / self.config.user_weights.get(user_name, 1.0)
+        queue.finish_tags[user_name] = finish_tag
+
+        granted = asyncio.get_running_loop().create_future()
+        heapq.heappush(queue.queue, (finish_tag, next(self._arrivals), user_name, granted))
+        queue.waiting += 1
+
+        try:
+            await granted
+        except asyncio.CancelledError:
+            if granted.cancelled():
+                queue.waiting -= 1
+                if queue.finish_tags.get(user_name) == finish_tag:
+                    del queue.finish_tags[user_name]
+            else:
+                # The slot was handed over just before the waiter went away, pass it on
+                self._finish(lane, None)
+            raise
+
+    def _start(self, lane: str):
+        self._running += 1
+        self._lanes[lane].running += 1
+
+    def _finish(self, lane: str, run_seconds: Optional[float]):
+        self._running -= 1
+        self._lanes[lane].running -= 1
+        if run_seconds is not None:
+            alpha = AdmissionConstants.RUN_SECONDS_EWMA_ALPHA
+            self._run_seconds = (1 - alpha) * self._run_seconds + alpha * run_seconds
+        self._dispatch()
+
+    def _dispatch(self):
+        """ Hands free slots to the waiter with the smallest finish tag of the highest priority lane """
+        while self._running < self.config.max_concurrent_runs:
+            for lane in AdmissionConstants.LANES:
+                queue = self._lanes[lane]
+                while queue.queue and queue.queue[0][3].cancelled():
+                    heapq.heappop(queue.queue)
+                if queue.queue and self._has_free_slot(lane):
+                    break
+            else:
+                return
+
+            finish_tag, _, user_name, granted = heapq.heappop(queue.queue)
+            queue.waiting -= 1
+            queue.virtual_time = finish_tag
+            if queue.finish_tags.get(user_name) == finish_tag:
+                # Nothing of this user is queued anymore, the next arrival starts from the virtual time
+                del queue.finish_tags[user_name]
+
+            self._start(lane)
+            granted.set_result(None)
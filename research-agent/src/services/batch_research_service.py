@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import OrderedDict
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Optional, Set
+
+from loguru import logger
+
+from config.constants import AdmissionConstants
+from config.settings import BatchConfig
+from domain.interfaces.orchestrator_processing_interface import OrchestratorProcessingInterface
+from exceptions.app_exceptions import AppException
+from services.request_coalescing_service import RequestCoalescingService
+
+class BatchResearchService:
+    """
+    Runs JSONL batches of research queries through the orchestrator.
+
+    Responsibilities:
+    - Read the input lazily and keep at most `max_concurrency` items in flight, so memory stays flat
+    - Answer repeated queries from the first execution instead of running them again
+    - Stream one JSONL result per item in completion order, with per-item errors
+    """
+
+    def __init__(self, orchestrator_processing_service: OrchestratorProcessingInterface, batch_config: BatchConfig):
+        self.orchestrator_processing_service = orchestrator_processing_service
+        self.config = batch_config
+
+    async def run(self, lines: AsyncIterable[str], default_user_name: Optional[str] = None) -> AsyncIterator[str]:
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.config.max_concurrency)
+        slots = asyncio.Semaphore(self.config.max_concurrency)
+        executions: OrderedDict[str, asyncio.Task] = OrderedDict()
+        in_flight: Set[asyncio.Task] = set()
+
+        async def process(line_number: int, line: str):
+            try:
+                await results.put(await self._process_line(line_number, line, default_user_name, executions))
+            finally:
+                slots.release()
+
+        async def produce():
+            line_number = 0
+            async for line in lines:
+                line_number += 1
+                if not line.strip():
+                    continue
+                await slots.acquire()
+                task = asyncio.create_task(process(line_number, line))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+
+            if in_flight:
+                await asyncio.wait(set(in_flight))
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                getter = asyncio.ensure_future(results.get())
+                await asyncio.wait({getter, producer}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    break
+                yield json.dumps(getter.result(), default=str) + "\n"
+
+            # Every item finished before the producer did, so what is left is already queued
+            while not results.empty():
+                yield json.dumps(results.get_nowait(), default=str) + "\n"
+
+            await producer
+        finally:
+            # The client went away or the input failed, nothing is left to deliver the results to
+            producer.cancel()
+            for task in list(in_flight) + list(executions.values()):
+                task.cancel()
+
+    # ------------------------------------------------------------------
+    # Internal Methods
+    # ------------------------------------------------------------------
+
+    async def _process_line(self, line_number: int, line: str, default_user_name: Optional[str],
+                            executions: OrderedDict[str, asyncio.Task]) -> Dict[str, Any]:
+        try:
+            item = json.loads(line)
+            if not isinstance(item, dict) or not isinstance(item.get("query"), str) or not item["query"].strip():
+                raise ValueError("Each line must be a JSON object with a non-empty query string")
+        except ValueError as e:
+            return {"line": line_number, "id": None, "status": "error", "error": {"message": str(e)}}
+
+        item_id = item.get("id", line_number)
+        user_name = item.get("user_name") or default_user_name
+        # Scoped to the user, so a run and the budget it is charged to are never shared between users of a batch
+        key = RequestCoalescingService.build_key(item["query"], {"user_name": user_name,
+                                                                 "session_id": item.get("session_id")})
+
+        execution = executions.get(key)
+        duplicate_of = None
+        if execution is None:
+            execution = asyncio.create_task(self._execute(user_name, item["query"], item.get("session_id")),
+                                            name=str(item_id))
+            executions[key] = execution
+            self._evict_finished(executions)
+        else:
+            executions.move_to_end(key)
+            duplicate_of = execution.get_name()
+
+        result: Dict[str, Any] = {"line": line_number, "id": item_id}
+        try:
+            response = await asyncio.shield(execution)
+            result.update(status=response.get("status"), result=response)
+        except AppException as e:
+            result.update(status="error", error={"message": str(e), "details": e.details})
+        except Exception as e:
+            logger.exception(f"Batch item on line {line_number} failed")
+            result.update(status="error", error={"message": str(e)})
+
+        if duplicate_of is not None:
+            result["duplicate_of"] = duplicate_of
+        return result
+
+    async def _execute(self, user_name: Optional[str], query: str, session_id: Optional[str]) -> Dict[str, Any]:
+        from services.orchestrator_processing_service import graph_state_to_api_response
+
+        graph_state = await self.orchestrator_processing_service.process_user_query(user_name, query,
+                                                                                    session_id=session_id,
+                                                                                    lane=AdmissionConstants.BATCH)
+        return graph_state_to_api_response(graph_state)
+
+    def _evict_finished(self, executions: OrderedDict[str, asyncio.Task]):
+        """ Bounds the dedupe cache, only finished executions are evicted so duplicates still in flight join them """
+        while len(executions) > self.config.dedupe_cache_size:
+            oldest_key = next(iter(executions))
+            if not executions[oldest_key].done():
+                break
+            del executions[oldest_key]
@@ -0,0 +1,49 @@
+import time
+from typing import Any, Mapping, Optional
+
+from config.constants import DeadlineConstants
+from config.settings import DeadlineConfig
+
+
+class DeadlineService:
+    """
+    Turns the deadline of a run into call timeouts and degradation decisions for the graph nodes.
+
+    Responsibilities:
+    - Resolve the deadline of a run from the request, or RUN_DEADLINE_SECONDS by default
+    - Give every LLM and search call its node's share of the time left, holding the rest back for later nodes
+    - Tell nodes when the time left is short enough to use a faster model, fewer documents or no comparison
+
+    Deadlines are wall clock times, they stay meaningful in persisted state and on other workers.
+    """
+
+    def __init__(self, deadline_config: DeadlineConfig):
+        self.config = deadline_config
+
+    def deadline_for(self, deadline_seconds: Optional[float] = None) -> Optional[float]:
+        seconds = deadline_seconds or self.config.default_seconds
+        return time.time() + seconds if seconds else None
+
+    @staticmethod
+    def remaining(state: Mapping[str, Any]) -> Optional[float]:
+        deadline = state.get("deadline")
+        return max(0.0, deadline - time.time()) if deadline else None
+
+    def call_timeout(self, state: Mapping[str, Any], node: str) -> Optional[float]:
+        remaining = self.remaining(state)
+        if remaining is None:
+            return None
+        return remaining * DeadlineConstants.NODE_TIME_SHARE.get(node, 1.0)
+
+    def running_short(self, state: Mapping[str, Any]) -> bool:
+        """ Nodes switch to the fast model tier and compare fewer documents """
+        remaining = self.remaining(state)
+        return remaining is not None and remaining < self.config.degrade_below_seconds
+
+    def should_skip_comparison(self, state: Mapping[str, Any]) -> bool:
+        remaining = self.remaining(state)
+        return remaining is not None and remaining < self.config.skip_comparison_below_seconds
+
+    @property
+    def degraded_max_docs(self) -> int:
+        return self.config.degraded_max_docs
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import io
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from loguru import logger
+
+from config.constants import GraphNodeConstants
+from config.settings import ImageConfig
+from domain.interfaces.tools_interface import ToolsInterface
+from exceptions.app_exceptions import InvalidImageException
+from services.model_tier_service import ModelTierService
+from services.token_budget_service import TokenBudgetService
+
+# EXIF tag holding the camera orientation, 1 means the pixels are already upright
+_EXIF_ORIENTATION = 0x0112
+
+
+def _downscale(data: bytes, max_dimension: int, jpeg_quality: int) -> Dict[str, Any]:
+    """ Fits the image into max_dimension and re-encodes it as JPEG, runs in a worker thread """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        original_width, original_height = image.size
+        upright = image.getexif().get(_EXIF_ORIENTATION, 1) == 1
+
+        if image.format == "JPEG" and upright and max(image.size) <= max_dimension:
+            # Already small enough, recompressing would only lose quality
+            encoded, width, height = data, original_width, original_height
+        else:
+            # JPEG decoders can skip straight to a reduced scale instead of decoding every pixel
+            image.draft("RGB", (max_dimension, max_dimension))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+            if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+                # Diagrams are often exported with a transparent background, which JPEG would turn black
+                rgba = image.convert("RGBA")
+                image = Image.new("RGB", rgba.size, (255, 255, 255))
+                image.paste(rgba, mask=rgba.getchannel("A"))
+            else:
+                image = image.convert("RGB")
+
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=jpeg_quality, optimize=True)
+            encoded, (width, height) = buffer.getvalue(), image.size
+
+    return {
+        "base64": base64.b64encode(encoded).decode("ascii"),
+        "width": width,
+        "height": height,
+        "original_width": original_width,
+        "original_height": original_height,
+        "bytes": len(encoded),
+    }
+
+
+class ImageProcessingService:
+    """
+    Prepares uploaded images for the vision model and turns them into research context.
+
+    Responsibilities:
+    - Downscale and recompress uploads to IMAGE_MAX_DIMENSION in a worker thread, off the event loop
+    - Cache processed images and their descriptions by content hash, so a resubmitted image
+      is neither reprocessed nor sent to the vision model again
+    - Share one processing and one description between concurrent uploads of the same image
+    """
+
+    def __init__(self, tools_service: ToolsInterface, model_tier_service: ModelTierService,
+                 token_budget_service: TokenBudgetService, image_config: ImageConfig):
+        self.tools_service = tools_service
+        self.model_tier_service = model_tier_service
+        self.token_budget_service = token_budget_service
+        self.config = image_config
+        self._processed: OrderedDict[str, asyncio.Task] = OrderedDict()
+        self._descriptions: OrderedDict[str, asyncio.Task] = OrderedDict()
+
+    @property
+    def max_upload_bytes(self) -> int:
+        return self.config.max_upload_bytes
+
+    async def describe(self, data: bytes, user_name: Optional[str]) -> Dict[str, Any]:
+        """ Returns the description and dimensions of the image, from the cache when it was seen before """
+        if not data:
+            raise InvalidImageException.from_error(ValueError("The uploaded file is empty"))
+        if len(data) > self.config.max_upload_bytes:
+            raise InvalidImageException.too_large(self.config.max_upload_bytes)
+
+        content_hash = await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest())
+        cached = content_hash in self._descriptions
+        description = await self._cached(self._descriptions, content_hash,
+                                         lambda: self._describe(content_hash, data, user_name))
+
+        return {**description, "content_hash": content_hash, "cached": cached}
+
+    @staticmethod
+    def with_image_context(query: str, image: Dict[str, Any]) -> str:
+        return f"{query}\n\nAttached image ({image['original_width']}x{image['original_height']}):\n{image['description']}"
+
+    # ------------------------------------------------------------------
+    # Internal Methods
+    # ------------------------------------------------------------------
+
+    async def _describe(self, content_hash: str, data: bytes, user_name: Optional[str]) -> Dict[str, Any]:
+        image = await self._cached(self._processed, content_hash, lambda: self._process(data))
+
+        response, tokens_used = await self.tools_service.describe_image(
+            image["base64"], llm_config=self.model_tier_service.config_for(GraphNodeConstants.IMAGE_DESCRIBER))
+        self.token_budget_service.record_usage(user_name, tokens_used)
+
+        description = response.get("description") if isinstance(response, dict) else response
+        if not description:
+            raise RuntimeError("The vision model returned an empty image description")
+
+        return {
+            "description": str(description),
+            **{key: value for key, value in image.items() if key != "base64"},
+        }
+
+    async def _process(self, data: bytes) -> Dict[str, Any]:
+        try:
+            image = await asyncio.to_thread(_downscale, data, self.config.max_dimension, self.config.jpeg_quality)
+        except Exception as e:
+            raise InvalidImageException.from_error(e)
+
+        logger.info(f"Processed image {image['original_width']}x{image['original_height']} "
+                    f"into {image['width']}x{image['height']}, {len(data)} -> {image['bytes']} bytes")
+        return image
+
+    async def _cached(self, cache: OrderedDict[str, asyncio.Task], key: str,
+                      factory: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """ Awaits the cached task for key, starting it when missing, failed results are not kept """
+        task = cache.get(key)
+        if task is None:
+            task = asyncio.create_task(factory())
+            cache[key] = task
+            task.add_done_callback(lambda finished: self._settle(cache, key, finished))
+        else:
+            cache.move_to_end(key)
+
+        # A client going away must not cancel the work other uploads of the same image are waiting on
+        return await asyncio.shield(task)
+
+    def _settle(self, cache: OrderedDict[str, asyncio.Task], key: str, task: asyncio.Task):
+        """ Drops a failed entry, a successful one makes room for itself by evicting the oldest finished entries """
+        if task.cancelled() or task.exception() is not None:
+            if cache.get(key) is task:
+                del cache[key]
+            return
+
+        while len(cache) > self.config.cache_size:
+            oldest_key = next(iter(cache))
+            if not cache[oldest_key].done():
+                break
+            del cache[oldest_key]
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, TYPE_CHECKING
+
+from config.constants import DbConstants
+from exceptions.app_exceptions import JobNotFoundException
+
+if TYPE_CHECKING:
+    from infrastructure.database.repositories.research_job_repository import ResearchJobRepository
+
+
+class JobQueueService:
+    """
+    API side of the research job queue.
+
+    Responsibilities:
+    - Enqueue research queries for the worker nodes instead of running them in the API process
+    - Report the status, and once finished the result, of a job
+    """
+
+    def __init__(self, repository: ResearchJobRepository):
+        self.repository = repository
+
+    async def submit(self, user_name: Optional[str], query: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+        job_id = uuid.uuid4()
+        now = datetime.now(timezone.utc)
+        await self.repository.enqueue({
+            "id": job_id,
+            "user_name": user_name,
+            "query": query,
+            "session_id": session_id,
+            "status": DbConstants.JOB_QUEUED,
+            "attempts": 0,
+            "available_at": now,
+            "created_at": now,
+            "updated_at": now,
+        })
+        return {"job_id": str(job_id), "status": DbConstants.JOB_QUEUED}
+
+    async def get(self, job_id: uuid.UUID, user_name: Optional[str]) -> Dict[str, Any]:
+        """ A job of another user is reported as not found, like sessions and runs """
+        job = await self.repository.get(job_id)
+        if job is None or job["user_name"] != user_name:
+            raise JobNotFoundException.from_job_id(str(job_id))
+
+        return {
+            "job_id": str(job["id"]),
+            "status": job["status"],
+            "attempts": job["attempts"],
+            "result": job["result"],
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+        }
@@ -1,14 +1,20 @@
+from __future__ import annotations
+
 import asyncio
-import json
-import re
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, TYPE_CHECKING
 
-import json_repair
 from loguru import logger
-from openai.types.chat import ChatCompletionMessageParam, ChatCompletionSystemMessageParam, ChatCompletionUserMessageParam, ChatCompletionContentPartImageParam, ChatCompletionContentPartTextParam
 
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessageParam, ChatCompletionSystemMessageParam, ChatCompletionUserMessageParam, ChatCompletionContentPartImageParam, ChatCompletionContentPartTextParam
+
+from config.constants import LogConstants, OutputLengthConstants
 from domain.interfaces.llm_interaction_interface import LlmInteractionInterface
+from infrastructure.concurrency.cpu_offload import CpuOffload
 from infrastructure.llm.llm_service import LLMService
+from infrastructure.llm.output_parsing import parse_llm_output
+from infrastructure.observability.structured_logging import log_payload, redact
+from services.output_length_service import OutputLengthService
 
 
 class LlmInteractionService(LlmInteractionInterface):
@@ -18,6 +24,7 @@ class LlmInteractionService(LlmInteractionInterface):
     Responsibilities:
     - Build structured messages (text / image)
     - Handle retries and resilience
+    - Size max_tokens per node, and retry outputs cut off at the limit with a larger one
     - Normalize LLM output into clean JSON
     """
 
@@ -27,23 +34,41 @@ class LlmInteractionService(LlmInteractionInterface):
         Extra text or formating interferes with data parsing and can lead to errors or inefficiencies.
         """
 
-    _semaphore = asyncio.Semaphore(10)
-
-    def __init__(self, llm_service: LLMService):
+    def __init__(self, llm_service: LLMService, max_concurrent_calls: int = 10,
+                 output_length_service: Optional[OutputLengthService] = None):
         self.llm_service = llm_service
+        self.output_length_service = output_length_service
+        # One instance serves the whole process, so API and batch traffic share the provider limit
+        self._semaphore = asyncio.Semaphore(max_concurrent_calls)
 
     async def make_llm_call(self,
                             system_prompt: Optional[str],
                             user_prompt: str, model: Optional[str] = None,
                             message_type: str = "text",
-                            media_base64: Optional[str] = None, ) -> Dict:
+                            media_base64: Optional[str] = None,
+                            config: Optional[Dict[str, Any]] = None, ) -> Dict:
         """
         Executes an LLM request with retries, validation, and structured output.
+        Token usage is accumulated over every attempt, including failed parses.
+        Output that fails validation is retried on the next "fallback_models" entry of config, if any.
+        A "timeout" in config bounds the whole call in seconds, raising TimeoutError when it runs out.
+        The "node" of config picks the learned completion limit, "max_tokens_ceiling" caps it and its retries.
         """
 
         max_parse_attempts = 3
         last_raw_response = None
-        last_tokens = 0
+        config = dict(config or {})
+        config_model = config.pop("model", None)
+        model = model or config_model
+        fallback_models = list(config.pop("fallback_models", None) or [])
+        timeout = config.pop("timeout", None)
+        node = config.pop("node", None)
+        ceiling = config.pop("max_tokens_ceiling", None)
+        if self.output_length_service is not None:
+            config["max_tokens"], ceiling = self.output_length_service.limits(node, config.get("max_tokens"), ceiling)
+        elif ceiling is not None:
+            config["max_tokens"] = min(config.get("max_tokens") or ceiling, ceiling)
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
 
         # messages = self._build_gpt5_input(system_prompt=system_prompt,
         #     user_prompt=user_prompt,
@@ -54,36 +79,45 @@ class LlmInteractionService(LlmInteractionInterface):
                                           user_prompt=user_prompt,
                                           message_type=message_type,
                                           media_base64=media_base64, )
-        logger.debug(messages)
+        log_payload(LogConstants.LLM_PAYLOAD, "LLM request", messages)
 
-        for attempt in range(1, max_parse_attempts + 1):
-            response, tokens = await self._safe_llm_call_with_retries(self.llm_service.chat, messages, )
+        # A deadline covers every attempt, retry waits and fallback models included
+        async with asyncio.timeout(timeout):
+            for attempt in range(1, max_parse_attempts + 1):
+                response = await self._generate(messages, config, model, node, ceiling, usage)
+                last_raw_response = response
 
-            last_raw_response = response
-            last_tokens = tokens
+                log_payload(LogConstants.LLM_PAYLOAD, "LLM response", response)
 
-            logger.debug(f"LLM response: {response}")
+                parsed = await self._parse_llm_response(response)
 
-            parsed = self._parse_llm_response(response)
+                if parsed is not None:
+                    return {
+                        "response": parsed,
+                        "tokens": usage,
+                        "model": model,
+                    }
 
-            if parsed is not None:
-                return {
-                    "response": parsed,
-                    "tokens": tokens,
-                }
+                if fallback_models:
+                    model = fallback_models.pop(0)
+                    logger.warning(f"LLM parse failed (attempt {attempt}/{max_parse_attempts}). Retrying on {model}...")
+                    continue
 
-            logger.warning(f"LLM parse failed (attempt {attempt}/{max_parse_attempts}). Retrying...")
+                logger.warning(f"LLM parse failed (attempt {attempt}/{max_parse_attempts}). Retrying...")
 
         # All parse attempts failed
-        logger.error("LLM returned invalid output after %d attempts. Last raw response: %s, tokens: %s",
-            max_parse_attempts,
-            last_raw_response, last_tokens)
+        logger.error("LLM returned invalid output after {} attempts. Last raw response: {}, tokens: {}",
+                     max_parse_attempts, redact(last_raw_response), usage)
 
         raise RuntimeError("LLM returned invalid or non-JSON output after multiple attempts")
 
     async def get_embedding(self, text: str):
         return await self.llm_service.embed(text)
 
+    async def get_embeddings(self, texts: List[str]):
+        """ Embeds all texts in one provider request where the provider supports batches """
+        return await self.llm_service.embed_many(texts)
+
     # ------------------------------------------------------------------
     # Internal Methods
     # ------------------------------------------------------------------
@@ -177,64 +211,65 @@ class LlmInteractionService(LlmInteractionInterface):
         return input_blocks
 
 
+    async def _generate(self, messages: List[ChatCompletionMessageParam], config: Dict[str, Any], model: Optional[str],
+                        node: Optional[str], ceiling: Optional[int], usage: Dict[str, int]) -> Optional[str]:
+        """
+        Calls the LLM, calling again with a grown max_tokens while the output is cut off at the limit.
+        The grown limit stays in config for the parse retries that may follow.
+        """
+        truncation_retries = self.output_length_service.config.truncation_retries if self.output_length_service else 0
+
+        while True:
+            response, tokens = await self._safe_llm_call_with_retries(self.llm_service.chat, messages, config,
+                                                                      model=model, )
+            for key in usage:
+                usage[key] += tokens.get(key, 0)
+
+            if self.output_length_service is None:
+                return response
+
+            truncated = tokens.get("finish_reason") == OutputLengthConstants.TRUNCATED
+            self.output_length_service.observe(node, tokens.get("completion_tokens", 0), truncated)
+            grown = self.output_length_service.grown_limit(config["max_tokens"], ceiling) if truncated else None
+            if grown is None or truncation_retries <= 0:
+                return response
+
+            truncation_retries -= 1
+            logger.warning(f"LLM output of {node or 'call'} hit max_tokens {config['max_tokens']}, retrying with {grown}")
+            config["max_tokens"] = grown
+
+
     async def _safe_llm_call_with_retries(self, func, *args, max_retries: int = 3, base_delay: float = 1.0, **kwargs, ):
         last_exception = None
 
         for attempt in range(1, max_retries + 1):
             try:
-                return await func(*args, **kwargs)
+                async with self._semaphore:
+                    return await func(*args, **kwargs)
 
             except Exception as e:
                 last_exception = e
                 err = str(e).lower()
 
-                if "timeout" in err or "503" in err or "service unavailable" in err:
+                if ("timeout" in err or "503" in err or "service unavailable" in err
+                        or "429" in err or "rate limit" in err):
                     if attempt < max_retries:
                         delay = base_delay * (2 ** (attempt - 1))
                         logger.warning(f"[LLM Retry] Attempt {attempt}/{max_retries}, retrying in {delay:.1f}s")
                         await asyncio.sleep(delay)
                         continue
 
-                logger.error(str(e))
-                logger.error("LLM call failed", exc_info=True)
+                logger.opt(exception=e).error(f"LLM call failed: {redact(str(e))}")
                 break
 
         raise RuntimeError(f"LLM failed after {max_retries} retries") from last_exception
 
 
-    def _parse_llm_response(self, llm_response: str) -> Optional[Dict]:
+    async def _parse_llm_response(self, llm_response: Optional[str]) -> Optional[Any]:
         """
-        Extract valid JSON from the LLM response.
+        Extract valid JSON from the LLM response, off the event loop when the response is large.
         """
         if not llm_response:
             return None
-
-        llm_response = llm_response.strip()
-
-        try:
-            json_parsed = json_repair.loads(llm_response)
-
-            if isinstance(json_parsed, dict):
-                if "response" in json_parsed:
-                    return json_parsed["response"]
-                return json_parsed
-
-        except json.JSONDecodeError as e:
-            logger.warning(f"Invalid JSON response from LLM, trying Regex")
-            logger.warning(f"JSON Decode Error: {str(e)}")
-
-        patterns = [r"\{.*\}", r"\[.*\]"]
-
-        for pattern in patterns:
-            match = re.search(pattern, llm_response, re.DOTALL)
-            if match:
-                json_str = match.group()
-                try:
-                    parsed = json.loads(json_str)
-                    if isinstance(parsed, dict) and "response" in parsed:
-                        return parsed["response"]
-                    return parsed
-                except json.JSONDecodeError as e:
-                    logger.info(f"Could not parse JSON response with regex: {llm_response}")
-
-        return None
+        return await CpuOffload.run("llm_output_parse", parse_llm_output, llm_response,
+                                    size=len(llm_response), process=True)
@@ -0,0 +1,57 @@
+from typing import Any, Dict, List, Optional
+
+from config.constants import ModelTierConstants
+from config.settings import LLMConfig
+
+
+class ModelTierService:
+    """
+    Resolves which model every graph node calls.
+
+    Nodes map to tiers (LLM_NODE_TIERS over ModelTierConstants.DEFAULT_NODE_TIERS) and tiers
+    map to models (LLM_MODEL_TIERS). Unmapped tiers use the provider default model.
+    """
+
+    def __init__(self, llm_config: LLMConfig):
+        self.default_model = llm_config.llm_model
+        self.tier_models = llm_config.model_tiers or {}
+        self.node_tiers = {**ModelTierConstants.DEFAULT_NODE_TIERS, **(llm_config.node_tiers or {})}
+        self.fallback_enabled = llm_config.tier_fallback
+
+    def model_for(self, node: str) -> Optional[str]:
+        tier = self.node_tiers.get(node)
+        return self.tier_models.get(tier, self.default_model) if tier else self.default_model
+
+    def fallback_models_for(self, node: str) -> List[str]:
+        """ Models of the higher tiers, tried in order when the node output fails validation """
+        tier = self.node_tiers.get(node)
+        if not self.fallback_enabled or tier not in ModelTierConstants.TIER_ORDER:
+            return []
+
+        current = self.model_for(node)
+        fallbacks = []
+        for higher_tier in ModelTierConstants.TIER_ORDER[ModelTierConstants.TIER_ORDER.index(tier) + 1:]:
+            model = self.tier_models.get(higher_tier)
+            if model and model != current and model not in fallbacks:
+                fallbacks.append(model)
+
+        return fallbacks
+
+    def config_for(self, node: str) -> Dict[str, Any]:
+        # The node also sizes the completion limit of the call
+        config: Dict[str, Any] = {"node": node}
+
+        model = self.model_for(node)
+        if model:
+            config["model"] = model
+
+        fallback_models = self.fallback_models_for(node)
+        if fallback_models:
+            config["fallback_models"] = fallback_models
+
+        return config
+
+    def fast_config_for(self, node: str) -> Dict[str, Any]:
+        """ The cheapest tier's model without fallbacks, for a node running out of time """
+        model = self.tier_models.get(ModelTierConstants.TIER_ORDER[0]) or self.model_for(node)
+        return {"node": node, "model": model} if model else {"node": node}
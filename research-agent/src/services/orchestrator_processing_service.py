@@ -1,3 +1,6 @@
+import asyncio
+import json
+import uuid
 from typing import Optional, Dict, Any
 
 from langchain_core.messages import HumanMessage
@@ -6,13 +9,34 @@ from loguru import logger
 from agents.orchestrator_graph import OrchestratorGraph
 from domain.interfaces.orchestrator_processing_interface import OrchestratorProcessingInterface
 from domain.states.orchestrator_state import ResearchState
+from domain.states.token_usage import summarize_token_usage
+from config.constants import AdmissionConstants, DeadlineConstants, GraphNodeConstants
+from exceptions.app_exceptions import TokenBudgetExceededException, RunNotFoundException
+from infrastructure.artifacts.artifact_store import ArtifactStore
+from services.admission_control_service import AdmissionControlService
+from services.deadline_service import DeadlineService
+from services.request_coalescing_service import RequestCoalescingService
+from services.run_history_service import RunHistoryService
+from services.session_memory_service import SessionMemoryService
+from services.speculative_retrieval_service import SpeculativeRetrievalService
+from services.token_budget_service import TokenBudgetService
 
 
-def _create_initial_state(user_name: Optional[str], query: str):
+def _create_initial_state(user_name: Optional[str], query: str, token_budget: Optional[int] = None,
+                          session_id: Optional[str] = None, session: Optional[Dict[str, Any]] = None,
+                          deadline: Optional[float] = None):
+    session = session or {}
     initial_state = ResearchState(
-        query=[HumanMessage(content=query)],
+        run_id=str(uuid.uuid4()),
+        session_id=session_id,
+        conversation_summary=session.get("conversation_summary"),
+        session_context=session.get("session_context") or {},
+        query=[*session.get("query", []), HumanMessage(content=query)],
         response=None,
-        tokens_used=None,
+        tokens_used={},
+        token_budget=token_budget,
+        deadline=deadline,
+        degraded=[],
         user_name=user_name,
         state_metadata={},
         has_error=False,
@@ -23,18 +47,23 @@ def _create_initial_state(user_name: Optional[str], query: str):
 
     return initial_state
 
-def _create_error_state(user_name: Optional[str], query: str, error_message: str):
+def _create_error_state(user_name: Optional[str], query: str, error_message: str,
+                        error_code: str = "UNABLE_TO_START_PROCESSING",
+                        tokens_used: Optional[Dict[str, Dict[str, int]]] = None,
+                        session_id: Optional[str] = None):
     initial_state = ResearchState(
+        run_id=str(uuid.uuid4()),
+        session_id=session_id,
         query=[HumanMessage(content=query)],
         response=f"Sorry, I encountered an error: {error_message}",
-        tokens_used=None,
+        tokens_used=tokens_used or {},
         user_name=user_name,
         state_metadata={
             "status": "error",
             "message": error_message,
         },
         has_error=True,
-        error_code="UNABLE_TO_START_PROCESSING",
+        error_code=error_code,
         error_severity="HIGH",
         error_context="",
         user_friendly_error="", )
@@ -42,16 +71,50 @@ def _create_error_state(user_name: Optional[str], query: str, error_message: str
     return initial_state
 
 
+def _restore_node_outputs(stored_run: Dict[str, Any], resume_from: str) -> Dict[str, Any]:
+    """ State fields of a stored run produced upstream of the node a re-execution resumes from """
+    order = GraphNodeConstants.PIPELINE_ORDER
+    stale = {field
+             for node in order[order.index(resume_from):]
+             for field in GraphNodeConstants.OUTPUT_FIELDS.get(node, ())}
+
+    restored = {}
+    for node_output in stored_run.get("node_outputs") or []:
+        restored.update({field: value for field, value in node_output["output"].items()
+                         if field not in stale and field != "response"})
+
+    return restored
+
+
+async def _best_available_response(state: ResearchState) -> str:
+    """ The most finished output of a run that did not get to generate its plan """
+    for field in ("final_plan", "recommended_approach", "approaches"):
+        if state.get(field):
+            return json.dumps(await ArtifactStore.load(state[field]))
+    return ""
+
+
 def graph_state_to_api_response(state: ResearchState) -> Dict[str, Any]:
     metadata = state.get("state_metadata", {})
 
     return {
+        "run_id": state.get("run_id"),
+        "session_id": state.get("session_id"),
+        "rerun_of": metadata.get("rerun_of"),
         "status": metadata.get("status", "completed"),
+        "degraded": bool(state.get("degraded")),
         "response": state.get("response", ""),
         "conversation_state": {
             "user_name": state.get("user_name"),
+            "complexity": state.get("complexity"),
             "query": [msg.content if hasattr(msg, "content") else str(msg) for msg in state.get("query", [])],
-            "tokens_used": state.get("tokens_used"),
+            "tokens_used": {
+                **summarize_token_usage(state.get("tokens_used")),
+                "by_node": state.get("tokens_used") or {},
+            },
+            "degradations": state.get("degraded") or [],
+            "query_clusters": state.get("query_clusters"),
+            "speculation": state.get("speculation"),
 
             "has_error": state.get("has_error"),
             "error_code": state.get("error_code"),
@@ -63,36 +126,141 @@ def graph_state_to_api_response(state: ResearchState) -> Dict[str, Any]:
 
 class OrchestratorProcessingService(OrchestratorProcessingInterface):
 
-    def __init__(self, orchestrator: OrchestratorGraph):
+    def __init__(self, orchestrator: OrchestratorGraph, token_budget_service: TokenBudgetService,
+                 request_coalescing_service: RequestCoalescingService, run_history_service: RunHistoryService,
+                 session_memory_service: SessionMemoryService, admission_control_service: AdmissionControlService,
+                 deadline_service: DeadlineService, speculative_retrieval_service: SpeculativeRetrievalService):
         self.orchestrator = orchestrator
+        self.token_budget_service = token_budget_service
+        self.request_coalescing_service = request_coalescing_service
+        self.run_history_service = run_history_service
+        self.session_memory_service = session_memory_service
+        self.admission_control_service = admission_control_service
+        self.deadline_service = deadline_service
+        self.speculative_retrieval_service = speculative_retrieval_service
         self.graph = self.orchestrator.graph.compile()
 
 
-    async def process_user_query(self, user_name: str, query: str) -> ResearchState:
+    def ensure_can_start(self, user_name: str, lane: str = AdmissionConstants.INTERACTIVE):
+        """ Raises when the user is over budget or the lane would reject the run, before any work is spent on it """
+        self.token_budget_service.ensure_user_allowance(user_name)
+        self.admission_control_service.ensure_capacity(lane)
+
+    async def process_user_query(self, user_name: str, query: str,
+                                 idempotency_key: Optional[str] = None,
+                                 session_id: Optional[str] = None,
+                                 lane: str = AdmissionConstants.INTERACTIVE,
+                                 deadline_seconds: Optional[float] = None) -> ResearchState:
+        self.ensure_can_start(user_name, lane)
+        # Counted from the request, so time spent queued for admission comes out of it
+        deadline = self.deadline_service.deadline_for(deadline_seconds)
+
+        # Loaded per caller, so a session of another user is rejected before joining a run
+        session = await self.session_memory_service.load(session_id, user_name) if session_id else {}
+
+        # Keyed on the user and the session they sent, identical requests without one share a run and its new
+        # session. Only callers with the same deadline and lane join each other, the run is admitted and cut short
+        # for both. A run is recorded, remembered and charged as its user, so it is never shared between users
+        run_key = RequestCoalescingService.build_key(query, {"user_name": user_name,
+                                                            "session_id": session_id,
+                                                            "deadline_seconds": deadline_seconds,
+                                                            "lane": lane})
+        scoped_idempotency_key = f"{user_name}:{idempotency_key}" if idempotency_key else None
+
+        final_state = await self.request_coalescing_service.run(run_key,
+                                                                lambda: self._start_new_run(user_name, query,
+                                                                                            session_id, session,
+                                                                                            lane, deadline),
+                                                                idempotency_key=scoped_idempotency_key)
+
+        # Coalesced waiters share one result, each gets its own shallow copy
+        return ResearchState(**{**final_state, "user_name": user_name})
+
+    async def rerun(self, run_id: str, user_name: str, edits: Dict[str, Any]) -> ResearchState:
+        """ Re-executes a stored run from the first node downstream of the edited fields, reusing everything upstream """
+        self.token_budget_service.ensure_user_allowance(user_name)
+        self.admission_control_service.ensure_capacity()
+
+        try:
+            stored_run = await self.run_history_service.get_run(uuid.UUID(run_id))
+        except ValueError:
+            stored_run = None
+
+        if stored_run is None or stored_run["user_name"] != user_name:
+            raise RunNotFoundException.from_run_id(run_id)
+
+        edits = {field: value for field, value in edits.items() if field in GraphNodeConstants.EDIT_RESUME_NODES}
+        resume_from = min((GraphNodeConstants.EDIT_RESUME_NODES[field] for field in edits),
+                          key=GraphNodeConstants.PIPELINE_ORDER.index,
+                          default=GraphNodeConstants.GENERATOR)
+
+        logger.info(f"Re-executing run {run_id} from {resume_from} with edits to {sorted(edits)}")
+        initial_state = _create_initial_state(user_name, stored_run["query"],
+                                              self.token_budget_service.config.run_token_budget,
+                                              deadline=self.deadline_service.deadline_for())
+        initial_state.update(_restore_node_outputs(stored_run, resume_from))
+        initial_state.update(edits)
+        initial_state.update(complexity=stored_run["complexity"],
+                             resume_from=resume_from,
+                             state_metadata={"rerun_of": run_id, "resumed_from": resume_from})
+
+        async with self.admission_control_service.admit(user_name):
+            final_state = await self._execute_graph(initial_state)
+        self.run_history_service.record(final_state)
+        return final_state
+
+    # -------------------
+    # Helper Functions
+    # -------------------
+
+    async def _start_new_run(self, user_name: str, query: str, session_id: Optional[str],
+                             session: Dict[str, Any], lane: str, deadline: Optional[float]) -> ResearchState:
+        session_id = session_id or str(uuid.uuid4())
+        async with self.admission_control_service.admit(user_name, lane):
+            return await self._run_admitted(user_name, query, session_id, session, deadline)
+
+    async def _run_admitted(self, user_name: str, query: str, session_id: str,
+                            session: Dict[str, Any], deadline: Optional[float]) -> ResearchState:
         try:
             # Utilities.save_graph_as_jpg(self.graph, "../assets/orchestrator_graph.jpg")
 
             logger.info(f"Beginning graph execution for user {user_name}. Assigning initial state")
-            initial_state = _create_initial_state(user_name, query)
+            initial_state = _create_initial_state(user_name, query,
+                                                  self.token_budget_service.config.run_token_budget,
+                                                  session_id=session_id,
+                                                  session=session,
+                                                  deadline=deadline)
 
-            return await self._execute_graph(initial_state)
+            final_state = await self._execute_graph(initial_state)
 
         except Exception as e:
             logger.error(f"Error starting new conversation: {e}")
-            return _create_error_state(user_name, query, str(e))
+            final_state = _create_error_state(user_name, query, str(e), session_id=session_id)
 
-    # -------------------
-    # Helper Functions
-    # -------------------
+        # Persisted once per run, coalesced waiters share this record
+        self.run_history_service.record(final_state)
+        self.session_memory_service.save(final_state)
+        return final_state
 
     async def _execute_graph(self, initial_state: ResearchState) -> ResearchState:
         try:
             logger.info("Executing orchestrator graph")
 
-            final_state: ResearchState = await self.graph.ainvoke(initial_state)
+            final_state = await self._run_until_deadline(initial_state)
 
             if not final_state.get("response"):
-                final_state["response"] = ""
+                final_state["response"] = await _best_available_response(final_state)
+
+            degraded = final_state.get("degraded") or []
+            if DeadlineConstants.DEADLINE_EXCEEDED in degraded and not final_state["response"]:
+                return _create_error_state(initial_state["user_name"],
+                                           initial_state["query"][-1].content,
+                                           "The request did not produce an answer before its deadline",
+                                           error_code="DEADLINE_EXCEEDED",
+                                           tokens_used=final_state.get("tokens_used"),
+                                           session_id=initial_state["session_id"])
+            if degraded:
+                logger.warning(f"Run {final_state.get('run_id')} degraded to make its deadline: {degraded}")
 
             current_metadata = final_state.get("state_metadata", {})
 
@@ -103,8 +271,39 @@ class OrchestratorProcessingService(OrchestratorProcessingInterface):
 
             return final_state
 
+        except TokenBudgetExceededException as e:
+            logger.warning(f"Aborting graph execution, token budget exhausted: {e.details}")
+            return _create_error_state(initial_state["user_name"],
+                                       initial_state["query"][-1].content,
+                                       str(e),
+                                       error_code="TOKEN_BUDGET_EXCEEDED",
+                                       tokens_used=e.details.get("tokens_used"),
+                                       session_id=initial_state["session_id"])
+
         except Exception as e:
             logger.exception("LangGraph execution failed")
             return _create_error_state(initial_state["user_name"],
                                        initial_state["query"][-1].content,
-                                       str(e))
+                                       str(e),
+                                       session_id=initial_state["session_id"])
+
+        finally:
+            # A run cancelled, cut off or failed before the executor never takes what was speculated for it
+            self.speculative_retrieval_service.discard(initial_state.get("run_id"))
+
+    async def _run_until_deadline(self, initial_state: ResearchState) -> ResearchState:
+        """ Streams the graph, so the state reached so far is at hand when the deadline cuts the run short """
+        state = initial_state
+        deadline = asyncio.timeout(DeadlineService.remaining(initial_state))
+        try:
+            async with deadline:
+                async for state in self.graph.astream(initial_state, stream_mode="values"):
+                    pass
+        except TimeoutError:
+            # A provider or HTTP timeout inside the graph is a failure of the run, not its deadline
+            if not deadline.expired():
+                raise
+            logger.warning("Deadline reached, answering with the best output available")
+            state = ResearchState(**{**state, "degraded": [*(state.get("degraded") or []),
+                                                           DeadlineConstants.DEADLINE_EXCEEDED]})
+        return state
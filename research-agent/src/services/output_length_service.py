@@ -0,0 +1,59 @@
+import math
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional, Tuple
+
+from config.constants import OutputLengthConstants, TokenConstants
+from config.settings import OutputLengthConfig
+from infrastructure.metrics.worker_metrics import WorkerMetrics
+
+
+class OutputLengthService:
+    """
+    Sizes the completion limit of every LLM call to what its node actually generates.
+
+    Responsibilities:
+    - Start every node at its configured limit (LLM_NODE_MAX_TOKENS over OutputLengthConstants.DEFAULT_NODE_MAX_TOKENS)
+    - Learn the limit from a percentile of the node's recent completion sizes, with headroom on top
+    - Keep every limit under LLM_MAX_TOKENS and the completion allowance of the token budget
+    - Grow the limit of an output that was cut off, for a retry of the call
+    """
+
+    def __init__(self, output_length_config: OutputLengthConfig):
+        self.config = output_length_config
+        self.node_max_tokens = {**OutputLengthConstants.DEFAULT_NODE_MAX_TOKENS, **(output_length_config.node_max_tokens or {})}
+        self._completions: Dict[str, Deque[int]] = defaultdict(lambda: deque(maxlen=self.config.window))
+
+    def limits(self, node: Optional[str], requested: Optional[int] = None,
+               ceiling: Optional[int] = None) -> Tuple[int, int]:
+        """ Returns the max_tokens of a call and the most it may grow to, an explicitly requested limit wins """
+        ceiling = min(self.config.max_tokens, ceiling) if ceiling is not None else self.config.max_tokens
+        limit = requested or self._limit_for(node)
+        return min(limit, ceiling), ceiling
+
+    def grown_limit(self, limit: int, ceiling: int) -> Optional[int]:
+        """ The limit to retry a truncated output with, None when it cannot grow any further """
+        grown = min(limit * OutputLengthConstants.TRUNCATION_GROWTH, ceiling)
+        return grown if grown > limit else None
+
+    def observe(self, node: Optional[str], completion_tokens: int, truncated: bool):
+        if truncated:
+            WorkerMetrics.increment("llm_outputs_truncated")
+            # A cut off output only tells that the node needed more, its retry records the real size
+            return
+        if node and completion_tokens > 0:
+            self._completions[node].append(completion_tokens)
+
+    # ------------------------------------------------------------------
+    # Internal Methods
+    # ------------------------------------------------------------------
+
+    def _limit_for(self, node: Optional[str]) -> int:
+        configured = self.node_max_tokens.get(node, TokenConstants.DEFAULT_COMPLETION_ALLOWANCE)
+        completions = self._completions.get(node)
+        if not self.config.adaptive or not completions or len(completions) < self.config.min_samples:
+            return configured
+
+        ordered = sorted(completions)
+        rank = max(0, math.ceil(self.config.percentile / 100 * len(ordered)) - 1)
+        learned = math.ceil(ordered[min(rank, len(ordered) - 1)] * self.config.headroom)
+        return max(TokenConstants.MIN_COMPLETION_ALLOWANCE, learned)
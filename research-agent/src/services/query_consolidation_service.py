@@ -0,0 +1,80 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from config.settings import QueryConsolidationConfig
+from domain.interfaces.llm_interaction_interface import LlmInteractionInterface
+from infrastructure.metrics.worker_metrics import WorkerMetrics
+
+
+def _similarity_matrix(embeddings: List[List[float]]) -> np.ndarray:
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms == 0, 1.0, norms)
+    return matrix @ matrix.T
+
+
+def _cluster(similarity: np.ndarray, order: List[int], threshold: float) -> Dict[int, List[int]]:
+    """ Leader clustering, a query joins the most similar earlier leader or starts a cluster of its own """
+    clusters: Dict[int, List[int]] = {}
+    leaders: List[int] = []
+
+    for index in order:
+        if leaders:
+            scores = similarity[index, leaders]
+            best = int(np.argmax(scores))
+            if scores[best] >= threshold:
+                clusters[leaders[best]].append(index)
+                continue
+        leaders.append(index)
+        clusters[index] = [index]
+
+    return clusters
+
+
+class QueryConsolidationService:
+    """
+    Merges the planner's near-duplicate research queries before they reach the executor.
+
+    Responsibilities:
+    - Embed all planned queries in a single batch request
+    - Cluster them by cosine similarity and keep one representative query per cluster
+    - Prefer queries researched earlier in the session as representatives, their documents are cached
+    - Fall back to the planner's queries unchanged when embeddings are unavailable
+    """
+
+    def __init__(self, llm_service: LlmInteractionInterface, query_consolidation_config: QueryConsolidationConfig):
+        self.llm_service = llm_service
+        self.config = query_consolidation_config
+
+    async def consolidate(self, research_queries: List[str],
+                          preferred: Optional[List[str]] = None) -> Tuple[List[str], Optional[Dict[str, List[str]]]]:
+        """ Returns the representative queries in planner order and the queries each of them absorbed """
+        queries = list(dict.fromkeys(query for query in research_queries if isinstance(query, str) and query.strip()))
+        if not self.config.enabled or len(queries) < 2:
+            return queries, None
+
+        try:
+            embeddings = await self.llm_service.get_embeddings(queries)
+            if not embeddings or len(embeddings) != len(queries):
+                raise ValueError(f"expected {len(queries)} embeddings, got {len(embeddings or [])}")
+            similarity = _similarity_matrix(embeddings)
+        except Exception as e:
+            logger.warning(f"Could not consolidate the research queries, keeping all of them: {e}")
+            return queries, None
+
+        preferred_queries = set(preferred or [])
+        order = sorted(range(len(queries)), key=lambda index: queries[index] not in preferred_queries)
+        clusters = _cluster(similarity, order, self.config.similarity_threshold)
+
+        representatives = sorted(clusters)
+        merged = {queries[leader]: [queries[index] for index in members[1:]]
+                  for leader, members in clusters.items() if len(members) > 1}
+
+        WorkerMetrics.increment("research_queries_planned", len(queries))
+        WorkerMetrics.increment("research_queries_merged", len(queries) - len(representatives))
+        if merged:
+            logger.info(f"Consolidated {len(queries)} research queries into {len(representatives)}")
+
+        return [queries[index] for index in representatives], merged or None
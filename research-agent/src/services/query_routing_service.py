@@ -0,0 +1,91 @@
+import asyncio
+import math
+import re
+from typing import List, Optional
+
+from loguru import logger
+
+from config.constants import RoutingConstants
+from domain.interfaces.llm_interaction_interface import LlmInteractionInterface
+
+
+def _cosine_similarity(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _centroid(vectors: List[List[float]]) -> List[float]:
+    return [sum(values) / len(vectors) for values in zip(*vectors)]
+
+
+class QueryRoutingService:
+    """
+    Classifies queries as simple or complex before any LLM call is made.
+
+    Cheap lexical heuristics decide the clear cases, ambiguous queries are compared
+    against embedded simple/complex exemplars. Any failure falls back to the full pipeline.
+    """
+
+    def __init__(self, llm_service: LlmInteractionInterface, enabled: bool, embedding_margin: float):
+        self.llm_service = llm_service
+        self.enabled = enabled
+        self.embedding_margin = embedding_margin
+        self._centroids: Optional[tuple] = None
+        self._centroid_lock = asyncio.Lock()
+
+    async def classify(self, user_query: str) -> str:
+        if not self.enabled:
+            return RoutingConstants.COMPLEX
+
+        heuristic = self._classify_by_heuristics(user_query)
+        if heuristic is not None:
+            logger.info(f"Query routed as {heuristic} by heuristics")
+            return heuristic
+
+        try:
+            complexity = await self._classify_by_embedding(user_query)
+            logger.info(f"Query routed as {complexity} by embedding similarity")
+            return complexity
+        except Exception as e:
+            logger.warning(f"Embedding based routing failed, using the full pipeline: {e}")
+            return RoutingConstants.COMPLEX
+
+    # ------------------------------------------------------------------
+    # Internal Methods
+    # ------------------------------------------------------------------
+
+    def _classify_by_heuristics(self, user_query: str) -> Optional[str]:
+        text = user_query.strip().lower()
+        word_count = len(text.split())
+        complex_markers = sum(1 for marker in RoutingConstants.COMPLEX_MARKERS if re.search(rf"\b{marker}\b", text))
+
+        if word_count >= RoutingConstants.COMPLEX_MIN_WORDS or complex_markers >= 2:
+            return RoutingConstants.COMPLEX
+
+        looks_simple = any(re.search(pattern, text) for pattern in RoutingConstants.SIMPLE_PATTERNS)
+        if looks_simple and complex_markers == 0 and word_count <= RoutingConstants.SIMPLE_MAX_WORDS:
+            return RoutingConstants.SIMPLE
+
+        return None
+
+    async def _classify_by_embedding(self, user_query: str) -> str:
+        simple_centroid, complex_centroid = await self._get_centroids()
+        query_embedding = await self.llm_service.get_embedding(user_query)
+
+        simple_score = _cosine_similarity(query_embedding, simple_centroid)
+        complex_score = _cosine_similarity(query_embedding, complex_centroid)
+
+        if simple_score - complex_score > self.embedding_margin:
+            return RoutingConstants.SIMPLE
+        return RoutingConstants.COMPLEX
+
+    async def _get_centroids(self) -> tuple:
+        async with self._centroid_lock:
+            if self._centroids is None:
+                simple = await asyncio.gather(*[self.llm_service.get_embedding(text)
+                                                for text in RoutingConstants.SIMPLE_EXEMPLARS])
+                complex_ = await asyncio.gather(*[self.llm_service.get_embedding(text)
+                                                  for text in RoutingConstants.COMPLEX_EXEMPLARS])
+                self._centroids = (_centroid(list(simple)), _centroid(list(complex_)))
+        return self._centroids
@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+import json
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+
+class RequestCoalescingService:
+    """
+    Single-flight execution of identical research requests.
+
+    Responsibilities:
+    - Collapse concurrent requests with the same normalized query and options onto one execution
+    - Attach client retries carrying an idempotency key to the run they originally started
+    - Keep the shared execution alive when an individual waiter disconnects
+    """
+
+    def __init__(self, idempotency_ttl_seconds: int):
+        self.idempotency_ttl_seconds = idempotency_ttl_seconds
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._idempotent_runs: Dict[str, Tuple[float, asyncio.Task]] = {}
+
+    @staticmethod
+    def build_key(query: str, options: Optional[Dict[str, Any]] = None) -> str:
+        normalized_query = re.sub(r"\s+", " ", query or "").strip().lower()
+        payload = json.dumps({"query": normalized_query, "options": options or {}}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[T]], idempotency_key: Optional[str] = None) -> T:
+        self._evict_expired_idempotency_keys()
+
+        task = self._lookup_idempotent_run(idempotency_key)
+
+        if task is None:
+            task = self._inflight.get(key)
+
+        if task is None:
+            task = asyncio.create_task(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda finished: self._release(key, finished))
+        else:
+            logger.info(f"Joining in-flight research run {key[:12]}")
+
+        if idempotency_key and idempotency_key not in self._idempotent_runs:
+            self._idempotent_runs[idempotency_key] = (time.monotonic() + self.idempotency_ttl_seconds, task)
+
+        return await asyncio.shield(task)
+
+    # ------------------------------------------------------------------
+    # Internal Methods
+    # ------------------------------------------------------------------
+
+    def _lookup_idempotent_run(self, idempotency_key: Optional[str]) -> Optional[asyncio.Task]:
+        if not idempotency_key:
+            return None
+
+        entry = self._idempotent_runs.get(idempotency_key)
+        if entry is None:
+            return None
+
+        task = entry[1]
+        if task.done() and (task.cancelled() or task.exception() is not None):
+            # Failed runs are not replayed, the retry starts a fresh execution
+            del self._idempotent_runs[idempotency_key]
+            return None
+
+        logger.info(f"Idempotency key {idempotency_key} matched an existing research run")
+        return task
+
+    def _release(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def _evict_expired_idempotency_keys(self):
+        now = time.monotonic()
+        expired = [k for k, (expires_at, _) in self._idempotent_runs.items() if expires_at < now]
+        for k in expired:
+            del self._idempotent_runs[k]
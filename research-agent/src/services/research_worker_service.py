@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Set, TYPE_CHECKING
+
+from loguru import logger
+
+from config.constants import AdmissionConstants, DbConstants
+from config.settings import JobQueueConfig
+from domain.interfaces.orchestrator_processing_interface import OrchestratorProcessingInterface
+from exceptions.app_exceptions import AdmissionRejectedException, AppException
+from infrastructure.metrics.worker_metrics import WorkerMetrics
+
+if TYPE_CHECKING:
+    from infrastructure.database.repositories.research_job_repository import ResearchJobRepository
+
+
+class _LeaseLost(Exception):
+    pass
+
+
+class ResearchWorkerService:
+    """
+    Executes queued research jobs on a worker node.
+
+    Responsibilities:
+    - Claim up to `worker_concurrency` jobs at a time and run each through the orchestrator
+    - Extend the lease of every running job, and abandon a job whose lease was taken over
+    - Write the result back, or requeue with backoff until the attempts run out
+    - Wake up on LISTEN/NOTIFY when a job is enqueued, polling as a fallback
+    - Hand running jobs back to the queue when it stops before they finish
+    """
+
+    def __init__(self, repository: ResearchJobRepository, orchestrator_processing_service: OrchestratorProcessingInterface,
+                 job_queue_config: JobQueueConfig):
+        self.repository = repository
+        self.orchestrator_processing_service = orchestrator_processing_service
+        self.config = job_queue_config
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup = asyncio.Event()
+        self._running: Set[asyncio.Task] = set()
+
+    async def run(self, stop: asyncio.Event, shutdown_grace_seconds: float):
+        """ Processes jobs until stop is set, then gives running jobs the grace period to finish """
+        await self.repository.create_tables()
+
+        try:
+            async with self.repository.listen(self._wakeup.set, enabled=self.config.listen) as listening:
+                logger.info(f"Research worker {self.worker_id} started, concurrency {self.config.worker_concurrency}, "
+                            f"{'notified' if listening else 'polling'} for new jobs")
+                while not stop.is_set():
+                    self._wakeup.clear()
+                    claimed = await self._fill_slots()
+                    if claimed and len(self._running) < self.config.worker_concurrency:
+                        # Slots are left and the last claim found a job, more may be waiting
+                        continue
+                    await self._wait_for_work(stop)
+        except asyncio.CancelledError:
+            await self._drain(0)
+            raise
+
+        await self._drain(shutdown_grace_seconds)
+        logger.info(f"Research worker {self.worker_id} stopped")
+
+    # ------------------------------------------------------------------
+    # Internal Methods
+    # ------------------------------------------------------------------
+
+    async def _fill_slots(self) -> bool:
+        claimed = False
+        while len(self._running) < self.config.worker_concurrency:
+            try:
+                job = await self.repository.claim(self.worker_id, self.config.lease_seconds)
+            except Exception:
+                logger.exception("Could not claim a research job")
+                return False
+            if job is None:
+                return claimed
+
+            claimed = True
+            task = asyncio.create_task(self._process(job), name=str(job["id"]))
+            self._running.add(task)
+            task.add_done_callback(self._job_finished)
+        return claimed
+
+    def _job_finished(self, task: asyncio.Task):
+        self._running.discard(task)
+        # A free slot is a reason to look for work again
+        self._wakeup.set()
+
+    async def _wait_for_work(self, stop: asyncio.Event):
+        waiters = {asyncio.ensure_future(self._wakeup.wait()), asyncio.ensure_future(stop.wait())}
+        try:
+            await asyncio.wait(waiters, timeout=self.config.poll_seconds, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    async def _process(self, job: Dict[str, Any]):
+        job_id = job["id"]
+        WorkerMetrics.increment("jobs_claimed")
+        WorkerMetrics.observe("job_queue_wait_seconds", max(0.0, (_utc_now() - _aware(job["created_at"])).total_seconds()))
+
+        if job["attempts"] > self.config.max_attempts:
+            # Only reachable through expired leases, the worker running it died every time
+            await self.repository.fail(job_id, self.worker_id, {"message": "Job lease expired too many times"})
+            WorkerMetrics.increment("jobs_failed")
+            return
+
+        # Keyed per attempt, a retry has to run again rather than replay the failed attempt's error state
+        run = asyncio.create_task(self.orchestrator_processing_service.process_user_query(
+            job["user_name"], job["query"], idempotency_key=f"{job_id}:{job['attempts']}",
+            session_id=job["session_id"], lane=AdmissionConstants.BATCH))
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, run))
+        started = asyncio.get_running_loop().time()
+        try:
+            state = await run
+        except asyncio.CancelledError:
+            if heartbeat.done() and isinstance(heartbeat.exception(), _LeaseLost):
+                logger.warning(f"Lost the lease of job {job_id}, another worker took it over")
+                WorkerMetrics.increment("jobs_lease_lost")
+                return
+            # The worker is shutting down, the job goes back to the queue for another worker
+            await asyncio.shield(self.repository.release(job_id, self.worker_id))
+            raise
+        except Exception as e:
+            # Application errors, such as an exhausted token budget, fail the same way on every attempt
+            retryable = isinstance(e, AdmissionRejectedException) or not isinstance(e, AppException)
+            details = {"message": str(e), **(e.details if isinstance(e, AppException) else {})}
+            await self._handle_failure(job, details, retryable, e)
+            return
+        finally:
+            heartbeat.cancel()
+            WorkerMetrics.observe("job_run_seconds", asyncio.get_running_loop().time() - started)
+
+        from services.orchestrator_processing_service import graph_state_to_api_response
+
+        if state.get("has_error"):
+            # The processing service answers graph failures with an error state instead of raising
+            error_code = state.get("error_code")
+            details = {"message": (state.get("state_metadata") or {}).get("message"), "error_code": error_code}
+            await self._handle_failure(job, details, error_code not in DbConstants.JOB_PERMANENT_ERROR_CODES)
+            return
+
+        if await self.repository.complete(job_id, self.worker_id, graph_state_to_api_response(state)):
+            WorkerMetrics.increment("jobs_completed")
+        else:
+            logger.warning(f"Finished job {job_id} after its lease was taken over, the result is discarded")
+
+    async def _heartbeat(self, job_id: uuid.UUID, run: asyncio.Task):
+        while True:
+            await asyncio.sleep(self.config.heartbeat_seconds)
+            try:
+                extended = await self.repository.extend_lease(job_id, self.worker_id, self.config.lease_seconds)
+            except Exception:
+                # A transient database error, the lease outlasts a few missed heartbeats
+                logger.exception(f"Could not extend the lease of job {job_id}")
+                continue
+            if not extended:
+                run.cancel()
+                raise _LeaseLost()
+
+    async def _handle_failure(self, job: Dict[str, Any], details: Dict[str, Any], retryable: bool,
+                              error: Optional[Exception] = None):
+        job_id = job["id"]
+        retry_at = None
+        if retryable and job["attempts"] < self.config.max_attempts:
+            retry_at = _utc_now() + timedelta(seconds=self.config.retry_backoff_seconds * 2 ** (job["attempts"] - 1))
+
+        await self.repository.fail(job_id, self.worker_id, details, retry_at=retry_at)
+        if retry_at:
+            logger.warning(f"Job {job_id} failed on attempt {job['attempts']}, retrying at {retry_at.isoformat()}: "
+                           f"{details['message']}")
+            WorkerMetrics.increment("jobs_retried")
+        else:
+            logger.opt(exception=error).error(f"Job {job_id} failed after {job['attempts']} attempts: {details['message']}")
+            WorkerMetrics.increment("jobs_failed")
+
+    async def _drain(self, grace_seconds: float):
+        if not self._running:
+            return
+        _, pending = set(), set(self._running)
+        if grace_seconds > 0:
+            logger.info(f"Waiting up to {grace_seconds}s for {len(self._running)} running jobs")
+            _, pending = await asyncio.wait(pending, timeout=grace_seconds)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(moment: datetime) -> datetime:
+    # SQLite hands timestamps back without their time zone, they are stored in UTC
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
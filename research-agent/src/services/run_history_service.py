@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from loguru import logger
+
+from config.constants import DbConstants, GraphNodeConstants, RoutingConstants
+from config.settings import PersistenceConfig
+from domain.states.token_usage import summarize_token_usage
+from infrastructure.artifacts.artifact_store import ArtifactStore
+
+if TYPE_CHECKING:
+    from domain.states.orchestrator_state import ResearchState
+    from infrastructure.database.repositories.research_run_repository import ResearchRunRepository
+
+
+def encode_cursor(created_at: datetime, run_id: uuid.UUID) -> str:
+    payload = json.dumps([created_at.isoformat(), str(run_id)])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    created_at, run_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    return datetime.fromisoformat(created_at), uuid.UUID(run_id)
+
+
+class RunHistoryService:
+    """
+    Write-behind persistence and paginated lookup of finished research runs.
+
+    Responsibilities:
+    - Accept finished runs without blocking the request (bounded queue, drop on overflow)
+    - Flush queued runs in bulk when a batch fills up or the flush interval elapses
+    - Drain whatever is still queued on shutdown
+    """
+
+    def __init__(self, repository: ResearchRunRepository, persistence_config: PersistenceConfig):
+        self.repository = repository
+        self.config = persistence_config
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=persistence_config.queue_size)
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if not self.config.enabled or self._worker is not None:
+            return
+        await self.repository.create_tables()
+        self._closing = False
+        self._worker = asyncio.create_task(self._flush_loop())
+        logger.info("Run history write-behind worker started")
+
+    async def stop(self):
+        """ Stops accepting runs and waits for the worker to drain the queue """
+        if self._worker is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._worker
+        self._worker = None
+        logger.info("Run history write-behind worker stopped")
+
+    def record(self, state: ResearchState):
+        """ Queues a finished run for persistence, never waits on the database """
+        if self._worker is None or self._closing:
+            return
+        try:
+            self._queue.put_nowait(self._to_rows(state))
+        except asyncio.QueueFull:
+            logger.warning(f"Run history queue is full, dropping run {state.get('run_id')}")
+            return
+
+        if self._queue.qsize() >= self.config.batch_size:
+            self._wakeup.set()
+
+    async def list_runs(self, user_name: Optional[str], limit: int, cursor: Optional[str]) -> Dict[str, Any]:
+        limit = max(1, min(limit, DbConstants.RUN_HISTORY_MAX_PAGE_SIZE))
+        runs = await self.repository.list_runs(user_name, limit, decode_cursor(cursor) if cursor else None)
+
+        next_cursor = None
+        if len(runs) == limit:
+            next_cursor = encode_cursor(runs[-1]["created_at"], runs[-1]["id"])
+
+        return {"runs": runs, "next_cursor": next_cursor}
+
+    async def get_run(self, run_id: uuid.UUID, resolve_artifacts: bool = False) -> Optional[Dict[str, Any]]:
+        """ The stored run, node outputs hold artifact references unless resolve_artifacts is set """
+        run = await self.repository.get_run(run_id)
+        if run is not None and resolve_artifacts:
+            run = await ArtifactStore.resolve_all(run)
+        return run
+
+    # ------------------------------------------------------------------
+    # Internal Methods
+    # ------------------------------------------------------------------
+
+    async def _flush_loop(self):
+        """ Flushes a batch as soon as it fills up, otherwise whatever is queued once per flush interval """
+        while not (self._closing and self._queue.empty()):
+            if not self._closing and self._queue.qsize() < self.config.batch_size:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.config.flush_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+            await self._flush(self._drain(min(self._queue.qsize(), self.config.batch_size)))
+
+    def _drain(self, count: int) -> List[Dict[type, List[Dict[str, Any]]]]:
+        return [self._queue.get_nowait() for _ in range(count)]
+
+    async def _flush(self, batch: List[Dict[type, List[Dict[str, Any]]]]):
+        if not batch:
+            return
+
+        rows_by_table: Dict[type, List[Dict[str, Any]]] = {}
+        for rows in batch:
+            for table, table_rows in rows.items():
+                rows_by_table.setdefault(table, []).extend(table_rows)
+
+        try:
+            await ArtifactStore.persist(rows_by_table)
+            await self.repository.bulk_insert(rows_by_table)
+            logger.debug("Persisted {} research runs", len(batch))
+        except Exception:
+            logger.exception(f"Failed to persist {len(batch)} research runs")
+
+    @staticmethod
+    def _to_rows(state: ResearchState) -> Dict[type, List[Dict[str, Any]]]:
+        from domain.entities.research_run_entities import (ResearchRun, ResearchNodeOutput, ResearchCitation,
+                                                           ResearchTokenUsage, )
+
+        run_id = uuid.UUID(state["run_id"]) if state.get("run_id") else uuid.uuid4()
+        by_node = state.get("tokens_used") or {}
+        totals = summarize_token_usage(by_node)
+        metadata = state.get("state_metadata") or {}
+
+        run = {
+            "id": run_id,
+            "user_name": state.get("user_name"),
+            "query": state["query"][-1].content if state.get("query") else "",
+            "status": metadata.get("status", "completed"),
+            "complexity": state.get("complexity"),
+            "response": state.get("response"),
+            "recommended_approach": state.get("recommended_approach"),
+            "reasoning": state.get("reasoning"),
+            "final_plan": state.get("final_plan"),
+            "error_code": state.get("error_code") or None,
+            "prompt_tokens": totals["prompt_tokens"],
+            "completion_tokens": totals["completion_tokens"],
+            "total_tokens": totals["total_tokens"],
+            "rerun_of": uuid.UUID(metadata["rerun_of"]) if metadata.get("rerun_of") else None,
+            "created_at": datetime.now(timezone.utc),
+        }
+
+        node_outputs = []
+        for node, fields in GraphNodeConstants.OUTPUT_FIELDS.items():
+            if node == GraphNodeConstants.QUICK_ANSWER and state.get("complexity") != RoutingConstants.SIMPLE:
+                # Complex runs answer through the generator, their response is no quick answer output
+                continue
+            output = {field: state.get(field) for field in fields if state.get(field) is not None}
+            if output:
+                node_outputs.append({"run_id": run_id, "node": node, "output": output})
+
+        return {
+            ResearchRun: [run],
+            ResearchNodeOutput: node_outputs,
+            ResearchCitation: [{"run_id": run_id, "url": str(url)} for url in state.get("citations") or []],
+            ResearchTokenUsage: [{"run_id": run_id, "node": node,
+                                  "prompt_tokens": usage.get("prompt_tokens", 0),
+                                  "completion_tokens": usage.get("completion_tokens", 0),
+                                  "total_tokens": usage.get("total_tokens", 0)}
+                                 for node, usage in by_node.items() if usage],
+        }
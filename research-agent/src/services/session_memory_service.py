@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from loguru import logger
+
+from config.constants import GraphNodeConstants, MessageConstants
+from domain.interfaces.tools_interface import ToolsInterface
+from domain.states.conversation_memory import (message_to_record, records_to_messages, research_topics,
+                                               truncate_message, )
+from exceptions.app_exceptions import SessionNotFoundException
+from infrastructure.artifacts.artifact_store import ArtifactStore
+from services.model_tier_service import ModelTierService
+from services.token_budget_service import TokenBudgetService
+
+if TYPE_CHECKING:
+    from domain.states.orchestrator_state import ResearchState
+    from infrastructure.database.repositories.research_session_repository import ResearchSessionRepository
+
+
+class SessionMemoryService:
+    """
+    Multi-turn research sessions stored in Postgres.
+
+    Responsibilities:
+    - Resume a session with its working memory window, rolling summary and previous outputs
+    - Fold turns beyond WORKING_MEMORY_MESSAGE_LIMIT into the rolling summary
+    - Save sessions after the response, in order per session, without adding request latency
+    - Append a turn after those other processes saved meanwhile, instead of overwriting them
+    """
+
+    # Saves still running, shared so shutdown can wait for them without holding the instance
+    _pending: Dict[str, asyncio.Task] = {}
+
+    def __init__(self, repository: ResearchSessionRepository, tools_service: ToolsInterface,
+                 model_tier_service: ModelTierService, token_budget_service: TokenBudgetService):
+        self.repository = repository
+        self.tools_service = tools_service
+        self.model_tier_service = model_tier_service
+        self.token_budget_service = token_budget_service
+
+    @classmethod
+    async def wait_for_pending_saves(cls):
+        if cls._pending:
+            await asyncio.gather(*cls._pending.values(), return_exceptions=True)
+
+    async def load(self, session_id: str, user_name: Optional[str]) -> Dict[str, Any]:
+        """ Returns the state fields resuming the session, empty for a session that does not exist yet """
+        try:
+            key = uuid.UUID(session_id)
+        except ValueError:
+            raise SessionNotFoundException.from_session_id(session_id)
+
+        pending = self._pending.get(session_id)
+        if pending is not None:
+            await asyncio.wait({pending})
+
+        try:
+            session = await self.repository.get(key)
+        except Exception as e:
+            logger.warning(f"Could not load session {session_id}, continuing without memory: {e}")
+            return {}
+
+        if session is None:
+            return {}
+
+        if session["user_name"] != user_name:
+            raise SessionNotFoundException.from_session_id(session_id)
+
+        return {
+            "query": records_to_messages(session["messages"]),
+            "conversation_summary": session["summary"],
+            "session_context": session["context"],
+        }
+
+    def save(self, state: ResearchState):
+        """ Schedules the session update, chained behind any save of the same session still running """
+        session_id = state.get("session_id")
+        if not session_id or state.get("has_error"):
+            return
+
+        previous = self._pending.get(session_id)
+        task = asyncio.create_task(self._save(state, previous))
+        self._pending[session_id] = task
+        task.add_done_callback(lambda finished: self._release(session_id, finished))
+
+    # ------------------------------------------------------------------
+    # Internal Methods
+    # ------------------------------------------------------------------
+
+    async def _save(self, state: ResearchState, previous: Optional[asyncio.Task]):
+        if previous is not None:
+            await asyncio.wait({previous})
+
+        session_id = state["session_id"]
+        records = [message_to_record(m) for m in state.get("query") or []]
+        turn = [*records[-1:], {"role": MessageConstants.AI_ROLE, "content": state.get("response") or ""}]
+        stored = {"messages": records[:-1], "summary": state.get("conversation_summary"),
+                  "context": state.get("session_context") or {}}
+
+        for _ in range(MessageConstants.SESSION_SAVE_ATTEMPTS):
+            try:
+                session = await self._with_turn(state, stored, turn)
+                # The session keeps references to the stored documents and approaches, not copies
+                await ArtifactStore.persist(session["context"])
+                if await self.repository.save(session, stored["context"].get("turns", 0)):
+                    return
+
+                # Another process saved a turn of this session meanwhile, this turn goes after it
+                current = await self.repository.get(session["id"])
+            except Exception:
+                logger.exception(f"Failed to save session {session_id}")
+                return
+            stored = current or {"messages": [], "summary": None, "context": {}}
+
+        logger.warning(f"Session {session_id} kept changing while saving, this turn was not saved")
+
+    async def _with_turn(self, state: ResearchState, stored: Dict[str, Any],
+                         turn: List[Dict[str, str]]) -> Dict[str, Any]:
+        """ The stored session with this turn appended, older turns folded into the summary """
+        messages = [*stored["messages"], *turn]
+        summary = stored["summary"]
+
+        if len(messages) > MessageConstants.WORKING_MEMORY_MESSAGE_LIMIT:
+            overflow = messages[:-MessageConstants.WORKING_MEMORY_RETAINED_MESSAGES]
+            summary, folded = await self._summarize(state, summary, overflow)
+            messages = messages[-(MessageConstants.WORKING_MEMORY_RETAINED_MESSAGES if folded
+                                  else MessageConstants.WORKING_MEMORY_MESSAGE_LIMIT):]
+
+        previous_context = stored["context"] or {}
+        context = {field: state.get(field) for field in MessageConstants.SESSION_CONTEXT_FIELDS}
+        context["topic_approaches"] = self._topic_approaches(state, previous_context)
+        context["turns"] = previous_context.get("turns", 0) + 1
+
+        return {
+            "id": uuid.UUID(state["session_id"]),
+            "user_name": state.get("user_name"),
+            "summary": summary,
+            "messages": messages,
+            "context": context,
+            "turns": context["turns"],
+            "updated_at": datetime.now(timezone.utc),
+        }
+
+    async def _summarize(self, state: ResearchState, summary: Optional[str],
+                         overflow: List[Dict[str, str]]) -> Tuple[Optional[str], bool]:
+        """ Returns the new summary and whether the overflow was folded into it """
+        llm_config = self.model_tier_service.config_for(GraphNodeConstants.SUMMARIZER)
+        messages = [{"role": m["role"], "content": truncate_message(m["content"])} for m in overflow]
+
+        try:
+            response, tokens_used = await self.tools_service.summarize_conversation(summary, messages,
+                                                                                    llm_config=llm_config)
+        except Exception as e:
+            logger.warning(f"Conversation summarization failed, keeping the full window: {e}")
+            return summary, False
+
+        self.token_budget_service.record_usage(state.get("user_name"), tokens_used)
+        new_summary = response.get("summary") if isinstance(response, dict) else response
+        if not new_summary:
+            return summary, False
+
+        return str(new_summary), True
+
+    @staticmethod
+    def _topic_approaches(state: ResearchState, previous_context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """ Per topic approaches of this turn, the freshly compared ones plus those reused from the last turn """
+        topics = set(research_topics(state))
+        fresh = [a for a in state.get("topic_approaches") or [] if a.get("topic") in topics]
+        compared = {a.get("topic") for a in fresh}
+        reused = [a for a in previous_context.get("topic_approaches") or []
+                  if a.get("topic") in topics and a.get("topic") not in compared]
+        return fresh + reused
+
+    def _release(self, session_id: str, task: asyncio.Task):
+        if self._pending.get(session_id) is task:
+            del self._pending[session_id]
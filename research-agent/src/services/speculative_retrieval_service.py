@@ -0,0 +1,171 @@
+import asyncio
+import re
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from loguru import logger
+
+from config.settings import SpeculationConfig
+from domain.interfaces.tools_interface import ToolsInterface
+from infrastructure.metrics.worker_metrics import WorkerMetrics
+
+
+def _terms(text: str) -> Set[str]:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def _similarity(first: str, second: str) -> float:
+    first_terms, second_terms = _terms(first), _terms(second)
+    if not first_terms or not second_terms:
+        return 0.0
+    return len(first_terms & second_terms) / len(first_terms | second_terms)
+
+
+class _Speculation:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task):
+        self.finished_at = time.monotonic()
+        if not task.cancelled():
+            # Marks a failure of a retrieval nobody ends up awaiting as handled
+            task.exception()
+
+    def elapsed(self, now: float) -> float:
+        return (self.finished_at or now) - self.started_at
+
+
+class SpeculativeRetrievalService:
+    """
+    Retrieval started for the decomposed subtasks while the planner is still running.
+
+    Responsibilities:
+    - Start one retrieval per subtask as soon as the decomposition is known
+    - Match the planner's final queries to those retrievals and cancel the ones no query needs
+    - Hand the matched retrievals to the executor, which only searches what is still missing
+    - Record how many retrievals, and how many seconds of them, were wasted
+    """
+
+    def __init__(self, tools_service: ToolsInterface, speculation_config: SpeculationConfig):
+        self.tools_service = tools_service
+        self.config = speculation_config
+        # run_id -> subtask -> retrieval, then run_id -> planner query -> retrieval once reconciled
+        self._started: Dict[str, Dict[str, _Speculation]] = {}
+        self._matched: Dict[str, Dict[str, asyncio.Task]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.enabled
+
+    def start(self, run_id: Optional[str], subtasks: List[Any]):
+        if not self.config.enabled or not run_id:
+            return
+
+        candidates = dict.fromkeys(subtask.strip() for subtask in subtasks
+                                   if isinstance(subtask, str) and subtask.strip())
+        self._started[run_id] = {
+            candidate: _Speculation(asyncio.create_task(self.tools_service.research_executor([candidate])))
+            for candidate in candidates
+        }
+        WorkerMetrics.increment("speculative_retrievals_started", len(candidates))
+
+    def reconcile(self, run_id: Optional[str], research_queries: List[str]) -> Optional[Dict[str, Any]]:
+        """ Keeps the retrievals matching a planner query, cancels the rest and returns what was wasted """
+        started = self._started.pop(run_id, None) if run_id else None
+        if not started:
+            return None
+
+        matched: Dict[str, asyncio.Task] = {}
+        unused = dict(started)
+        for query in research_queries:
+            best = max(unused, key=lambda candidate: _similarity(query, candidate), default=None)
+            if best is not None and _similarity(query, best) >= self.config.match_threshold:
+                matched[query] = unused.pop(best).task
+
+        now = time.monotonic()
+        cancelled = 0
+        wasted_seconds = 0.0
+        for speculation in unused.values():
+            if not speculation.task.done():
+                speculation.task.cancel()
+                cancelled += 1
+            wasted_seconds += speculation.elapsed(now)
+
+        if matched:
+            self._matched[run_id] = matched
+
+        WorkerMetrics.increment("speculative_retrievals_reused", len(matched))
+        WorkerMetrics.increment("speculative_retrievals_wasted", len(unused))
+        WorkerMetrics.observe("speculative_retrieval_wasted_seconds", wasted_seconds)
+
+        summary = {
+            "started": len(started),
+            "reused": len(matched),
+            "wasted": len(unused),
+            "cancelled": cancelled,
+            "wasted_seconds": round(wasted_seconds, 3),
+        }
+        logger.info(f"Speculative retrieval for run {run_id}: {summary}")
+        return summary
+
+    def discard(self, run_id: Optional[str]):
+        """ Cancels whatever is still speculated for a run that will not reach the executor """
+        started = self._started.pop(run_id, None) or {}
+        matched = self._matched.pop(run_id, None) or {}
+        for task in [speculation.task for speculation in started.values()] + list(matched.values()):
+            task.cancel()
+
+    async def research(self, run_id: Optional[str], research_queries: List[str],
+                       timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Researches the queries, taking matched speculative retrievals instead of searching again.
+        Queries still unresearched when the timeout runs out are returned as skipped.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        matched = (self._matched.pop(run_id, None) if run_id else None) or {}
+        for query in [query for query in matched if query not in research_queries]:
+            matched.pop(query).cancel()
+        remaining = [query for query in research_queries if query not in matched]
+
+        results = await asyncio.gather(self._research(remaining, timeout),
+                                       *[asyncio.wait_for(task, timeout) for task in matched.values()],
+                                       return_exceptions=True)
+        if isinstance(results[0], BaseException):
+            raise results[0]
+
+        docs = list(results[0].get("retrieved_docs", []))
+        citations = list(results[0].get("citations", []))
+        skipped = list(results[0].get("skipped_queries", []))
+        failed = []
+        for query, result in zip(matched, results[1:]):
+            if isinstance(result, TimeoutError):
+                skipped.append(query)
+                continue
+            if isinstance(result, BaseException):
+                failed.append(query)
+                continue
+            # Tagged with the planner's query, which is the topic the comparisons group documents by
+            docs.extend({**doc, "query": query} for doc in result.get("retrieved_docs", []))
+            citations.extend(result.get("citations", []))
+
+        if failed:
+            logger.warning(f"Speculative retrieval failed for {len(failed)} queries, researching them again")
+            time_left = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+            retry = await self._research(failed, time_left)
+            docs.extend(retry.get("retrieved_docs", []))
+            citations.extend(retry.get("citations", []))
+            skipped.extend(retry.get("skipped_queries", []))
+
+        return {"retrieved_docs": docs, "citations": list(dict.fromkeys(citations)), "skipped_queries": skipped}
+
+    # ------------------------------------------------------------------
+    # Internal Methods
+    # ------------------------------------------------------------------
+
+    async def _research(self, research_queries: List[str], timeout: Optional[float] = None) -> Dict[str, Any]:
+        if not research_queries:
+            return {}
+        return await self.tools_service.research_executor(research_queries, timeout=timeout)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+import time
+from collections import defaultdict, deque
+from string import Template
+from typing import Any, Deque, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from loguru import logger
+
+from config.constants import TokenConstants
+from config.settings import TokenBudgetConfig
+from domain.states.token_usage import TokenUsage, summarize_token_usage
+from exceptions.app_exceptions import TokenBudgetExceededException
+from infrastructure.concurrency.cpu_offload import CpuOffload, payload_size
+
+if TYPE_CHECKING:
+    from domain.states.orchestrator_state import ResearchState
+
+
+def _estimate_total(payloads: Tuple[Any, ...]) -> int:
+    return sum(TokenBudgetService.estimate_tokens(payload) for payload in payloads)
+
+
+def _take_fitting(documents: List[Dict[str, Any]], available: int) -> List[Dict[str, Any]]:
+    fitted = []
+    for document in documents:
+        cost = TokenBudgetService.estimate_tokens(document)
+        if cost > available:
+            break
+        fitted.append(document)
+        available -= cost
+    return fitted
+
+
+class TokenBudgetService:
+    """
+    Enforces per-run and per-user token budgets.
+
+    Responsibilities:
+    - Estimate the prompt size of a node before it calls the LLM
+    - Cap the completion size so a call can never overshoot the remaining budget
+    - Trim retrieved context to fit, or abort the run when nothing fits
+    - Track per-user spend over a rolling window
+
+    Per-user spend is tracked per worker process, so with API workers or worker nodes a user may spend
+    USER_TOKEN_BUDGET in each of them.
+    """
+
+    def __init__(self, budget_config: TokenBudgetConfig):
+        self.config = budget_config
+        self._user_usage: Dict[str, Deque[Tuple[float, int]]] = defaultdict(deque)
+
+    @staticmethod
+    def estimate_tokens(payload: Any) -> int:
+        if payload is None:
+            return 0
+        text = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+        return len(text) // TokenConstants.CHARS_PER_TOKEN + 1
+
+    def remaining_for_user(self, user_name: Optional[str]) -> Optional[int]:
+        if self.config.user_token_budget is None or not user_name:
+            return None
+        return self.config.user_token_budget - self._user_spend(user_name)
+
+    def remaining_for_run(self, state: ResearchState) -> Optional[int]:
+        budget = state.get("token_budget")
+        if budget is None:
+            return None
+        return budget - summarize_token_usage(state.get("tokens_used"))["total_tokens"]
+
+    def remaining(self, state: ResearchState) -> Optional[int]:
+        limits = [limit for limit in (self.remaining_for_run(state), self.remaining_for_user(state.get("user_name")))
+                  if limit is not None]
+        return min(limits) if limits else None
+
+    def ensure_user_allowance(self, user_name: Optional[str]):
+        remaining = self.remaining_for_user(user_name)
+        if remaining is not None and remaining <= 0:
+            raise TokenBudgetExceededException.from_budget(scope="user",
+                                                           budget=self.config.user_token_budget,
+                                                           required=TokenConstants.MIN_COMPLETION_ALLOWANCE)
+
+    async def completion_config(self, state: ResearchState, prompt: Template, *inputs: Any) -> Dict[str, Any]:
+        """ Caps the completions of a node call at what the budget leaves, aborting if the call cannot fit it """
+        remaining = self.remaining(state)
+        if remaining is None:
+            return {}
+
+        prompt_tokens = self.estimate_tokens(prompt.template) + await self._estimate_inputs(inputs)
+        allowance = remaining - prompt_tokens
+
+        if allowance < TokenConstants.MIN_COMPLETION_ALLOWANCE:
+            raise TokenBudgetExceededException.from_budget(scope=self._limiting_scope(state),
+                                                           budget=remaining,
+                                                           required=prompt_tokens + TokenConstants.MIN_COMPLETION_ALLOWANCE,
+                                                           tokens_used=state.get("tokens_used"))
+
+        return {"max_tokens_ceiling": allowance}
+
+    async def fit_documents(self, state: ResearchState, documents: List[Dict[str, Any]], prompt: Template,
+                            *inputs: Any) -> List[Dict[str, Any]]:
+        """ Drops the lowest ranked documents until the prompt leaves room for a minimal completion """
+        remaining = self.remaining(state)
+        if remaining is None or not documents:
+            return documents
+
+        available = (remaining
+                     - TokenConstants.MIN_COMPLETION_ALLOWANCE
+                     - self.estimate_tokens(prompt.template)
+                     - await self._estimate_inputs(inputs))
+
+        fitted = await CpuOffload.run("fit_documents", _take_fitting, documents, available,
+                                      size=payload_size(documents))
+
+        if len(fitted) < len(documents):
+            logger.info(f"Trimmed context from {len(documents)} to {len(fitted)} documents to fit the token budget")
+
+        return fitted
+
+    def record_usage(self, user_name: Optional[str], usage: Optional[TokenUsage]):
+        if not user_name or not usage:
+            return
+        self._user_usage[user_name].append((time.monotonic(), usage.get("total_tokens", 0)))
+
+    # ------------------------------------------------------------------
+    # Internal Methods
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    async def _estimate_inputs(inputs: Tuple[Any, ...]) -> int:
+        # Serializing retrieved documents is the expensive part, the remaining budget is read on the loop
+        return await CpuOffload.run("token_estimate", _estimate_total, inputs, size=payload_size(inputs))
+
+    def _user_spend(self, user_name: str) -> int:
+        window = self._user_usage[user_name]
+        cutoff = time.monotonic() - self.config.user_budget_window_seconds
+
+        while window and window[0][0] < cutoff:
+            window.popleft()
+
+        return sum(tokens for _, tokens in window)
+
+    def _limiting_scope(self, state: ResearchState) -> str:
+        run_remaining = self.remaining_for_run(state)
+        user_remaining = self.remaining_for_user(state.get("user_name"))
+
+        if user_remaining is not None and (run_remaining is None or user_remaining < run_remaining):
+            return "user"
+        return "run"
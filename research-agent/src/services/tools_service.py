@@ -1,24 +1,50 @@
-from typing import List, Dict, Any
+import asyncio
+from functools import partial
+from string import Template
+from typing import List, Dict, Any, Optional
 
 from loguru import logger
 
 from domain.interfaces.llm_interaction_interface import LlmInteractionInterface
 from domain.interfaces.tools_interface import ToolsInterface
 from domain.prompts.orchestrator_prompts import OrchestratorPrompts
+from infrastructure.concurrency.cpu_offload import CpuOffload, payload_size
+from infrastructure.recording.cassette import Cassette
 
 
 class ToolsService(ToolsInterface):
 
-    def __init__(self, llm_service: LlmInteractionInterface):
+    def __init__(self, llm_service: LlmInteractionInterface, cassette: Optional[Cassette] = None):
         self.llm_service = llm_service
+        self.cassette = cassette
 
-    async def decompose_tasks(self, user_query: str):
+    async def quick_answer(self, user_query: str, llm_config: Optional[Dict[str, Any]] = None,
+                           conversation_context: str = ""):
+        logger.info("Answering simple query directly")
+
+        user_prompt = await self._render_prompt(OrchestratorPrompts.QUICK_ANSWER_PROMPT,
+                                                user_query=user_query,
+                                                conversation_context=conversation_context or "None")
+        output = await self.llm_service.make_llm_call(system_prompt="",
+                                                      user_prompt=user_prompt,
+                                                      config=llm_config)
+
+        response = output.get("response")
+        tokens_used = output.get("tokens")
+
+        return response, tokens_used
+
+
+    async def decompose_tasks(self, user_query: str, llm_config: Optional[Dict[str, Any]] = None,
+                              conversation_context: str = ""):
         logger.info("Starting to get task list")
 
+        user_prompt = await self._render_prompt(OrchestratorPrompts.TASK_DECOMPOSER_USER_PROMPT,
+                                                user_query=user_query,
+                                                conversation_context=conversation_context or "None")
         output = await self.llm_service.make_llm_call(system_prompt="",
-                                                      user_prompt=OrchestratorPrompts.TASK_DECOMPOSER_USER_PROMPT
-                                                      .substitute(user_query=user_query)
-                                                      )
+                                                      user_prompt=user_prompt,
+                                                      config=llm_config)
 
         response = output.get("response")
         tokens_used = output.get("tokens")
@@ -26,48 +52,65 @@ class ToolsService(ToolsInterface):
         return response, tokens_used
 
 
-    async def research_planner(self, sub_task_list: str):
+    async def research_planner(self, sub_task_list: str, llm_config: Optional[Dict[str, Any]] = None,
+                               previous_queries: Optional[List[str]] = None):
         logger.info("Researching topics")
 
+        user_prompt = await self._render_prompt(OrchestratorPrompts.RESEARCH_PLANNER_USER_PROMPT,
+                                                sub_task_list=sub_task_list,
+                                                previous_queries=previous_queries or "None")
         output = await self.llm_service.make_llm_call(system_prompt="",
-                                                      user_prompt=OrchestratorPrompts.RESEARCH_PLANNER_USER_PROMPT
-                                                      .substitute(sub_task_list=sub_task_list)
-                                                      )
+                                                      user_prompt=user_prompt,
+                                                      config=llm_config)
 
         response = output.get("response")
         tokens_used = output.get("tokens")
 
         return response, tokens_used
 
-    async def research_executor(self, research_topics: List[str]):
+    async def research_executor(self, research_topics: List[str], timeout: Optional[float] = None):
+        """ Searches the topics in order, the ones left when the timeout runs out are returned as skipped """
         logger.info("Researching citations and relevant docs")
 
         docs = []
         citations = []
+        skipped = []
+        deadline = asyncio.get_running_loop().time() + timeout if timeout is not None else None
+
+        for index, query in enumerate(research_topics):
+            try:
+                async with asyncio.timeout_at(deadline):
+                    results = await self.search_web(query)
+            except TimeoutError:
+                skipped = research_topics[index:]
+                logger.warning(f"Research ran out of time, skipping {len(skipped)} of {len(research_topics)} topics")
+                break
 
-        for query in research_topics:
-            results = await self.search_web(query)
             for r in results:
                 docs.append({
                     "content": r["snippet"],
-                    "source": r["url"]
+                    "source": r["url"],
+                    "query": query,
                 })
                 citations.append(r["url"])
 
         return {
             "retrieved_docs": docs,
-            "citations": list(set(citations))
+            "citations": list(set(citations)),
+            "skipped_queries": skipped,
         }
 
 
-    async def approach_comparator(self, research_topics: List[str], relevant_docs: List[Dict[str, Any]]):
+    async def approach_comparator(self, research_topics: List[str], relevant_docs: List[Dict[str, Any]],
+                                  llm_config: Optional[Dict[str, Any]] = None):
         logger.info("Comparing approaches")
 
+        user_prompt = await self._render_prompt(OrchestratorPrompts.APPROACH_COMPARATOR_SYSTEM_PROMPT,
+                                                research_topics=research_topics,
+                                                relevant_docs=relevant_docs)
         output = await self.llm_service.make_llm_call(system_prompt="",
-                                                      user_prompt=OrchestratorPrompts.APPROACH_COMPARATOR_SYSTEM_PROMPT
-                                                      .substitute(research_topics=research_topics,
-                                                                  relevant_docs=relevant_docs)
-                                                      )
+                                                      user_prompt=user_prompt,
+                                                      config=llm_config)
 
         response = output.get("response")
         tokens_used = output.get("tokens")
@@ -75,13 +118,14 @@ class ToolsService(ToolsInterface):
         return response, tokens_used
 
 
-    async def solution_synthesizer(self, approaches: List[Dict[str, Any]]):
+    async def solution_synthesizer(self, approaches: List[Dict[str, Any]], llm_config: Optional[Dict[str, Any]] = None):
         logger.info("Synthesizing solution and reasoning behind selection of an approach")
 
+        user_prompt = await self._render_prompt(OrchestratorPrompts.SOLUTION_SYNTHESIZER_PROMPT,
+                                                approaches=approaches)
         output = await self.llm_service.make_llm_call(system_prompt="",
-                                                      user_prompt=OrchestratorPrompts.SOLUTION_SYNTHESIZER_PROMPT
-                                                      .substitute(approaches=approaches)
-                                                      )
+                                                      user_prompt=user_prompt,
+                                                      config=llm_config)
 
         response = output.get("response")
         tokens_used = output.get("tokens")
@@ -89,13 +133,48 @@ class ToolsService(ToolsInterface):
         return response, tokens_used
 
 
-    async def structured_plan_generator(self, selected_approach: Dict[str, Any]):
+    async def structured_plan_generator(self, selected_approach: Dict[str, Any],
+                                        llm_config: Optional[Dict[str, Any]] = None):
         logger.info("Synthesizing solution")
 
+        user_prompt = await self._render_prompt(OrchestratorPrompts.STRUCTURED_PLAN_GENERATOR_PROMPT,
+                                                selected_approach=selected_approach)
         output = await self.llm_service.make_llm_call(system_prompt="",
-                                                      user_prompt=OrchestratorPrompts.STRUCTURED_PLAN_GENERATOR_PROMPT
-                                                      .substitute(selected_approach=selected_approach)
-                                                      )
+                                                      user_prompt=user_prompt,
+                                                      config=llm_config)
+
+        response = output.get("response")
+        tokens_used = output.get("tokens")
+
+        return response, tokens_used
+
+
+    async def summarize_conversation(self, summary: str, messages: List[Dict[str, Any]],
+                                     llm_config: Optional[Dict[str, Any]] = None):
+        logger.info("Summarizing older conversation turns")
+
+        user_prompt = await self._render_prompt(OrchestratorPrompts.CONVERSATION_SUMMARY_PROMPT,
+                                                summary=summary or "None",
+                                                messages=messages)
+        output = await self.llm_service.make_llm_call(system_prompt="",
+                                                      user_prompt=user_prompt,
+                                                      config=llm_config)
+
+        response = output.get("response")
+        tokens_used = output.get("tokens")
+
+        return response, tokens_used
+
+
+    async def describe_image(self, image_base64: str, llm_config: Optional[Dict[str, Any]] = None):
+        logger.info("Describing uploaded image")
+
+        output = await self.llm_service.make_llm_call(system_prompt="",
+                                                      user_prompt=OrchestratorPrompts.IMAGE_DESCRIPTION_PROMPT
+                                                      .substitute(),
+                                                      message_type="image",
+                                                      media_base64=image_base64,
+                                                      config=llm_config)
 
         response = output.get("response")
         tokens_used = output.get("tokens")
@@ -108,8 +187,19 @@ class ToolsService(ToolsInterface):
     # _____________________________
 
 
+    async def _render_prompt(self, prompt: Template, **values: Any) -> str:
+        # Documents and approaches render through repr(), which is slow enough to stall the loop when large
+        return await CpuOffload.run("prompt_render", partial(prompt.substitute, **values), size=payload_size(values))
+
+
     async def search_web(self, query: str):
-        pass
+        if self.cassette is not None:
+            return await self.cassette.call("search", {"query": query}, lambda: self._search_web(query))
+        return await self._search_web(query)
+
+
+    async def _search_web(self, query: str):
+        return []
 
 
 